@@ -0,0 +1,64 @@
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.constants import END
+
+from omnia_sdk.workflow.chatbot.chatbot_configuration import ChatbotConfiguration
+from omnia_sdk.workflow.chatbot.chatbot_state import Message
+from omnia_sdk.workflow.chatbot.constants import CONFIGURABLE, THREAD_ID, USER
+from omnia_sdk.workflow.langgraph.chatbot.chatbot_graph import ChatbotFlow, State
+"""
+This benchmark counts how many times checkpointer is read for every inbound message.
+Every read deserializes complete conversation history, which is expensive with remote or disk checkpointers.
+
+Run with:
+    python -m omnia_sdk.benchmarks.checkpoint_reads
+"""
+
+
+class CountingMemorySaver(MemorySaver):
+    def __init__(self):
+        super().__init__()
+        self.reads = 0
+
+    def get_tuple(self, config):
+        self.reads += 1
+        return super().get_tuple(config)
+
+
+class EchoChatbot(ChatbotFlow):
+
+    def start(self, state: State, config: dict):
+        self.send_text_response(text=self.get_user_message(state=state).get_text(), state=state, config=config)
+
+    def ask(self, state: State, config: dict):
+        self.wait_user_input(state=state, config=config, variable_name="answer")
+
+    def _nodes(self):
+        self.add_node("start", self.start)
+        self.add_node("ask", self.ask)
+        self.create_entry_point(start_node="start")
+
+    def _transitions(self):
+        self.add_edge("start", "ask")
+        self.add_edge("ask", END)
+
+
+def count_reads(messages: int = 10) -> list[int]:
+    """
+    Runs the echo chatbot for the number of messages and returns checkpoint reads for every message.
+    Messages alternate between starting a new conversation cycle and resuming interrupted graph.
+    """
+    checkpointer = CountingMemorySaver()
+    chatbot = EchoChatbot(checkpointer=checkpointer, configuration=ChatbotConfiguration(default_language="en"))
+    config = {CONFIGURABLE: {THREAD_ID: "benchmark", "channel": "CONSOLE"}}
+    reads = []
+    for i in range(messages):
+        checkpointer.reads = 0
+        chatbot.run(message=Message.get_message(role=USER, text=f"message {i}"), config=config)
+        reads.append(checkpointer.reads)
+    return reads
+
+
+if __name__ == "__main__":
+    reads_per_message = count_reads()
+    print(f"checkpoint reads per message: {reads_per_message}")
+    print(f"average: {sum(reads_per_message) / len(reads_per_message):.2f}")
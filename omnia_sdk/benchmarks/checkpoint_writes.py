@@ -0,0 +1,73 @@
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.constants import END
+
+from omnia_sdk.workflow.chatbot.chatbot_configuration import ChatbotConfiguration
+from omnia_sdk.workflow.chatbot.chatbot_state import Message
+from omnia_sdk.workflow.chatbot.constants import CONFIGURABLE, THREAD_ID, USER
+from omnia_sdk.workflow.langgraph.chatbot.chatbot_graph import ChatbotFlow, State
+"""
+This benchmark measures how many bytes are serialized by the checkpointer for every inbound message as session grows.
+Each turn runs three nodes which append one message, change one variable and do nothing respectively.
+
+Run with:
+    python -m omnia_sdk.benchmarks.checkpoint_writes
+"""
+
+
+class MeasuringMemorySaver(MemorySaver):
+    def __init__(self):
+        super().__init__()
+        self.written_bytes = 0
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        values = checkpoint["channel_values"]
+        self.written_bytes += sum(len(self.serde.dumps_typed(values[k])[1]) for k in new_versions if k in values)
+        return super().put(config, checkpoint, metadata, new_versions)
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        self.written_bytes += sum(len(self.serde.dumps_typed(value)[1]) for _, value in writes)
+        return super().put_writes(config, writes, task_id, task_path)
+
+
+class GrowingChatbot(ChatbotFlow):
+
+    def reply(self, state: State, config: dict):
+        self.send_text_response(text="Thank you for your message, how else can I help?", state=state, config=config)
+
+    def count(self, state: State):
+        self.save_variable(name="turns", value=(self.get_variable(state=state, name="turns") or 0) + 1, state=state)
+
+    def idle(self, state: State):
+        _ = self.get_language(state=state)
+
+    def _nodes(self):
+        self.add_node("reply", self.reply)
+        self.add_node("count", self.count)
+        self.add_node("idle", self.idle)
+        self.create_entry_point(start_node="reply")
+
+    def _transitions(self):
+        self.add_edge("reply", "count")
+        self.add_edge("count", "idle")
+        self.add_edge("idle", END)
+
+
+def measure_writes(turns: int = 200, sample_every: int = 50) -> dict[int, int]:
+    """
+    Runs the chatbot for number of turns and returns bytes written by the checkpointer for sampled turns.
+    """
+    checkpointer = MeasuringMemorySaver()
+    chatbot = GrowingChatbot(checkpointer=checkpointer, configuration=ChatbotConfiguration(default_language="en"))
+    config = {CONFIGURABLE: {THREAD_ID: "benchmark", "channel": "CONSOLE"}}
+    samples = {}
+    for turn in range(1, turns + 1):
+        checkpointer.written_bytes = 0
+        chatbot.run(message=Message.get_message(role=USER, text=f"message number {turn}"), config=config)
+        if turn == 1 or turn % sample_every == 0:
+            samples[turn] = checkpointer.written_bytes
+    return samples
+
+
+if __name__ == "__main__":
+    for turn, written_bytes in measure_writes().items():
+        print(f"turn {turn:>4}: {written_bytes:>8} bytes written")
@@ -0,0 +1,45 @@
+import os
+import tempfile
+import tracemalloc
+
+from langgraph.checkpoint.memory import MemorySaver
+
+from omnia_sdk.benchmarks.checkpoint_writes import GrowingChatbot
+from omnia_sdk.workflow.chatbot.chatbot_configuration import ChatbotConfiguration
+from omnia_sdk.workflow.chatbot.chatbot_state import Message
+from omnia_sdk.workflow.chatbot.constants import CONFIGURABLE, THREAD_ID, USER
+from omnia_sdk.workflow.langgraph.chatbot.sqlite_checkpointer import SQLiteCheckpointer
+"""
+This benchmark measures process memory held by the checkpointer while many sessions are served.
+Sessions are evicted after the TTL with SQLiteCheckpointer, while MemorySaver keeps every checkpoint forever.
+
+Run with:
+    python -m omnia_sdk.benchmarks.checkpointer_memory
+"""
+
+
+def measure_memory(checkpointer, sessions: int = 300, turns: int = 5, sample_every: int = 100) -> dict[int, float]:
+    """
+    Runs sessions one after another and returns traced memory in MB after sampled number of sessions.
+    """
+    chatbot = GrowingChatbot(checkpointer=checkpointer, configuration=ChatbotConfiguration(default_language="en"))
+    samples = {}
+    tracemalloc.start()
+    for session in range(1, sessions + 1):
+        config = {CONFIGURABLE: {THREAD_ID: f"session-{session}", "channel": "CONSOLE"}}
+        for turn in range(turns):
+            chatbot.run(message=Message.get_message(role=USER, text=f"message number {turn}"), config=config)
+        if session % sample_every == 0:
+            samples[session] = tracemalloc.get_traced_memory()[0] / 1024 / 1024
+    tracemalloc.stop()
+    return samples
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        sqlite_checkpointer = SQLiteCheckpointer(path=os.path.join(directory, "checkpoints.db"), max_checkpoints=2, ttl_seconds=1,
+                                                 eviction_interval_seconds=0.1)
+        with sqlite_checkpointer:
+            for name, checkpointer in [("MemorySaver", MemorySaver()), ("SQLiteCheckpointer", sqlite_checkpointer)]:
+                samples = measure_memory(checkpointer=checkpointer)
+                print(f"{name:>18}: " + ", ".join(f"{sessions} sessions {mb:.1f} MB" for sessions, mb in samples.items()))
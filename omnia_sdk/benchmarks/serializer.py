@@ -0,0 +1,61 @@
+import time
+
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from omnia_sdk.workflow.chatbot.chatbot_state import ConversationCycle, Message
+from omnia_sdk.workflow.chatbot.constants import ASSISTANT, USER
+from omnia_sdk.workflow.langgraph.chatbot.chatbot_serializer import ChatbotStateSerializer
+from omnia_sdk.workflow.tools.channels.omni_channels import ButtonDefinition, get_outbound_buttons_format
+"""
+This benchmark compares size and speed of checkpointed chatbot state with LangGraph's default serializer and
+ChatbotStateSerializer, with and without compression.
+Values are serialized as they are stored in channels: messages of the current cycle and the finished cycles.
+
+Run with:
+    python -m omnia_sdk.benchmarks.serializer
+"""
+
+
+def build_history(messages: int, cycle_length: int = 10) -> list[ConversationCycle]:
+    cycles = []
+    for start in range(0, messages, cycle_length):
+        cycle = ConversationCycle(messages=[], intent="order_status")
+        for i in range(start, min(start + cycle_length, messages)):
+            if i % 5 == 4:
+                buttons = [ButtonDefinition("REPLY", "Yes", "yes"), ButtonDefinition("REPLY", "No", "no")]
+                content = get_outbound_buttons_format(text="Did this answer your question?", buttons=buttons)
+                cycle.messages.append(Message(role=ASSISTANT, content=content))
+            else:
+                role = USER if i % 2 == 0 else ASSISTANT
+                cycle.messages.append(Message.get_message(role=role, text=f"Message number {i}, where is my order?"))
+        cycles.append(cycle)
+    return cycles
+
+
+def measure(serializer, value, repeats: int = 20) -> tuple[int, float, float]:
+    """
+    Returns serialized size in bytes and microseconds per dump and load.
+    """
+    serialized = serializer.dumps_typed(value)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        serializer.dumps_typed(value)
+    dump = (time.perf_counter() - start) / repeats * 1e6
+    start = time.perf_counter()
+    for _ in range(repeats):
+        serializer.loads_typed(serialized)
+    load = (time.perf_counter() - start) / repeats * 1e6
+    return len(serialized[1]), dump, load
+
+
+if __name__ == "__main__":
+    serializers = {
+        "jsonplus": JsonPlusSerializer(),
+        "omnia": ChatbotStateSerializer(compression_threshold=None),
+        "omnia+zstd": ChatbotStateSerializer(),
+    }
+    for messages in (10, 100, 1000):
+        history = build_history(messages)
+        for name, serializer in serializers.items():
+            size, dump, load = measure(serializer, history)
+            print(f"{messages:>5} messages {name:>11}: {size:>8} bytes, dump {dump:>9.1f} us, load {load:>9.1f} us")
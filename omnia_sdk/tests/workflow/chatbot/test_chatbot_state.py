@@ -0,0 +1,46 @@
+import copy
+
+import pytest
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from omnia_sdk.workflow.chatbot.chatbot_state import Message
+from omnia_sdk.workflow.chatbot.constants import BUTTON_REPLY, LIST_REPLY, PAYLOAD, TEXT, TYPE, USER
+
+"""
+This module tests text extraction and serialization of messages.
+"""
+
+
+@pytest.mark.parametrize("content, text", [
+    ({TYPE: TEXT.upper(), TEXT: "Hi"}, "Hi"),
+    ({TYPE: BUTTON_REPLY, PAYLOAD: "yes", TEXT: "Yes"}, "yes"),
+    ({TYPE: LIST_REPLY, TEXT: "Option", PAYLOAD: "option"}, "Option"),
+    ({"body": {TYPE: TEXT.upper(), TEXT: "Hi"}}, "Hi"),
+    ({TYPE: "IMAGE", "url": "https://example.com/image.png"}, None),
+])
+def test_get_text_should_extract_text_from_content(content, text):
+    assert Message(role=USER, content=content).get_text() == text
+
+
+def test_get_text_should_follow_reassigned_content():
+    message = Message.get_message(role=USER, text="Hi")
+    message.content = {TYPE: TEXT.upper(), TEXT: "Hello"}
+
+    assert message.get_text() == "Hello"
+
+
+def test_malformed_content_should_fail_only_on_get_text():
+    message = Message(role=USER, content={TEXT: "missing type"})
+
+    with pytest.raises(KeyError):
+        message.get_text()
+
+
+def test_message_should_be_slotted_and_serializable():
+    message = Message.get_message(role=USER, text="Hi")
+    serializer = JsonPlusSerializer()
+
+    assert not hasattr(message, "__dict__")
+    assert serializer.loads_typed(serializer.dumps_typed(message)).get_text() == "Hi"
+    assert copy.deepcopy(message) == message
+    assert repr(message) == "Message(role='user', content={'type': 'TEXT', 'text': 'Hi'})"
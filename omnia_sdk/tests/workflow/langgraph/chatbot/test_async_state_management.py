@@ -0,0 +1,62 @@
+import asyncio
+
+from langgraph.constants import END
+
+from omnia_sdk.workflow.chatbot.chatbot_configuration import ChatbotConfiguration
+from omnia_sdk.workflow.chatbot.chatbot_state import Message
+from omnia_sdk.workflow.chatbot.constants import ASSISTANT, CONFIGURABLE, TEXT, THREAD_ID, TYPE, USER
+from omnia_sdk.workflow.langgraph.chatbot.chatbot_graph import ChatbotFlow, State
+from omnia_sdk.workflow.tools.channels.omni_channels import CHANNEL, CONSOLE, get_outbound_text_format
+
+m1 = Message(role=USER, content={TYPE: TEXT.upper(), TEXT: "Hello from John Doe"})
+m2 = Message(role=USER, content={TYPE: TEXT.upper(), TEXT: "Bye!"})
+a1 = Message(role=ASSISTANT, content=get_outbound_text_format(text="Hello back at you"))
+foo, bar = ("foo", "bar")
+"""
+This module tests that coroutine and synchronous node functions can be mixed when graph is executed with arun method.
+State should be checkpointed correctly over interrupt and resume without explicit returns in node functions.
+"""
+
+
+class TinyAsyncChatbot(ChatbotFlow):
+
+    async def start(self, state: State, config: dict):
+        assert m1 == self.get_user_message(state=state)
+        await self.asend_response(content=a1.content, state=state, config=config)
+        await asyncio.sleep(0)
+
+    def ask(self, state: State, config: dict):
+        self.save_variable(name=foo, value=bar, state=state)
+
+    async def answer(self, state: State, config: dict):
+        text = await self.await_user_input(state=state, config=config, variable_name="answer")
+        assert text == m2.get_text()
+        assert bar == self.get_variable(state=state, name=foo)
+
+    def _nodes(self):
+        self.add_node("start", self.start)
+        self.add_node("ask", self.ask)
+        self.add_node("answer", self.answer)
+        self.create_entry_point(start_node="start")
+
+    def _transitions(self):
+        self.add_edge("start", "ask")
+        self.add_edge("ask", "answer")
+        self.add_edge("answer", END)
+
+
+def test_state_should_be_propagated_with_async_nodes():
+    chatbot = TinyAsyncChatbot(configuration=ChatbotConfiguration(default_language="en"))
+    cfg = {CONFIGURABLE: {THREAD_ID: "async", CHANNEL: CONSOLE}}
+
+    async def conversation():
+        await chatbot.arun(message=m1, config=cfg)
+        await chatbot.arun(message=m2, config=cfg)
+
+    asyncio.run(conversation())
+    state = chatbot.get_state(config=cfg)
+    conversation_cycles = state["chatbot_state"]["conversation_cycles"]
+
+    assert len(conversation_cycles) == 1
+    assert conversation_cycles[0].messages == [m1, a1, m2]
+    assert chatbot.get_variables(state) == {foo: bar, "answer": m2.get_text()}
@@ -0,0 +1,57 @@
+import datetime
+
+import pytest
+
+from omnia_sdk.workflow.chatbot.chatbot_state import ConversationCycle, Message
+from omnia_sdk.workflow.chatbot.constants import ASSISTANT, BUTTON_REPLY, PAYLOAD, TEXT, TYPE, USER
+from omnia_sdk.workflow.langgraph.chatbot.chatbot_serializer import OMNIA_TYPE, OMNIA_ZSTD_TYPE, ChatbotStateSerializer
+from omnia_sdk.workflow.langgraph.chatbot.state_channels import Overwrite
+from omnia_sdk.workflow.tools.channels.omni_channels import ButtonDefinition, get_outbound_buttons_format
+
+text = Message.get_message(role=USER, text="Hello")
+button = Message(role=USER, content={TYPE: BUTTON_REPLY, PAYLOAD: "yes", TEXT: "Yes"})
+buttons = Message(role=ASSISTANT, content=get_outbound_buttons_format(text="Sure?", buttons=[ButtonDefinition("REPLY", "Yes", "yes")]))
+custom = Message(role="critic", content={TYPE: "CUSTOM", "body": {"nested": [1, 2.5, None, {"deep": True}]}})
+messages = [text, button, buttons, custom]
+
+"""
+This module tests that chatbot state values are serialized and deserialized without loss.
+"""
+
+
+@pytest.mark.parametrize("value", [
+    text,
+    messages,
+    ConversationCycle(messages=messages, intent="greeting"),
+    [ConversationCycle(messages=messages), ConversationCycle(messages=[text], intent="bye")],
+    Overwrite(messages),
+])
+def test_chatbot_state_values_should_round_trip(value):
+    serializer = ChatbotStateSerializer(compression_threshold=None)
+    type_, data = serializer.dumps_typed(value)
+
+    assert type_ == OMNIA_TYPE
+    assert serializer.loads_typed((type_, data)) == value
+
+
+def test_large_values_should_be_compressed():
+    serializer = ChatbotStateSerializer(compression_threshold=64)
+    value = messages * 50
+    type_, data = serializer.dumps_typed(value)
+
+    assert type_ == OMNIA_ZSTD_TYPE
+    assert serializer.loads_typed((type_, data)) == value
+
+
+@pytest.mark.parametrize("value", [
+    {"foo": "bar"},
+    [],
+    [Message(role=USER, content={TYPE: 1, TEXT: "ambiguous content type"})],
+    [Message(role=USER, content={TYPE: TEXT.upper(), TEXT: "Hi", "sent_at": datetime.datetime(2025, 1, 1)})],
+])
+def test_other_values_should_fall_back_to_default_serializer(value):
+    serializer = ChatbotStateSerializer()
+    type_, data = serializer.dumps_typed(value)
+
+    assert type_ not in (OMNIA_TYPE, OMNIA_ZSTD_TYPE)
+    assert serializer.loads_typed((type_, data)) == value
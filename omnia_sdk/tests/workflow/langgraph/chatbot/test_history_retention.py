@@ -0,0 +1,79 @@
+from langgraph.constants import END
+
+from omnia_sdk.workflow.chatbot.chatbot_configuration import ChatbotConfiguration, HistoryRetentionConfig
+from omnia_sdk.workflow.chatbot.chatbot_state import ConversationCycle, Message
+from omnia_sdk.workflow.chatbot.constants import ASSISTANT, CONFIGURABLE, THREAD_ID, USER
+from omnia_sdk.workflow.chatbot.history_archive import InMemoryHistoryArchive, compact_cycles
+from omnia_sdk.workflow.langgraph.chatbot.chatbot_graph import ChatbotFlow, State
+
+"""
+This module tests that conversation cycles exceeding history retention limits are compacted out of the checkpointed state,
+while all cycles are still available via get_all_cycles accessor.
+"""
+
+
+class SummarizingChatbot(ChatbotFlow):
+
+    def start(self, state: State):
+        self.save_message(state=state, message=Message.get_message(role=ASSISTANT, text="ok"))
+
+    def summarize_history(self, cycles: list[ConversationCycle], summary: str | None, config: dict) -> str | None:
+        texts = [cycle.messages[0].get_text() for cycle in cycles]
+        return ", ".join([summary] + texts if summary else texts)
+
+    def _nodes(self):
+        self.add_node("start", self.start)
+        self.create_entry_point(start_node="start")
+
+    def _transitions(self):
+        self.add_edge("start", END)
+
+
+def _run_cycles(archive: str | None) -> tuple[ChatbotFlow, dict]:
+    retention = HistoryRetentionConfig(max_cycles=2, archive=archive)
+    chatbot = SummarizingChatbot(configuration=ChatbotConfiguration(default_language="en", history_retention=retention))
+    cfg = {CONFIGURABLE: {THREAD_ID: f"retention-{archive}"}}
+    for i in range(4):
+        chatbot.run(message=Message.get_message(role=USER, text=f"m{i}"), config=cfg)
+    return chatbot, cfg
+
+
+def test_compacted_cycles_should_be_loaded_from_archive():
+    chatbot, cfg = _run_cycles(archive="default")
+    state = chatbot.get_state(config=cfg)
+
+    assert [cycle.messages[0].get_text() for cycle in state["chatbot_state"]["conversation_cycles"]] == ["m2", "m3"]
+    assert [cycle.messages[0].get_text() for cycle in chatbot.get_all_cycles(state=state)] == ["m0", "m1", "m2", "m3"]
+    assert chatbot.get_history_summary(state=state) == "m0, m1"
+    assert chatbot.get_user_message(state=state).get_text() == "m3"
+
+
+def test_compacted_cycles_should_be_discarded_without_archive():
+    chatbot, cfg = _run_cycles(archive=None)
+    state = chatbot.get_state(config=cfg)
+
+    assert [cycle.messages[0].get_text() for cycle in chatbot.get_all_cycles(state=state)] == ["m2", "m3"]
+    assert chatbot.get_history_summary(state=state) == "m0, m1"
+
+
+def test_current_cycle_should_never_be_compacted():
+    cycles = [ConversationCycle(messages=[Message.get_message(role=USER, text=str(i))] * 3) for i in range(3)]
+    kept, compacted = compact_cycles(cycles=cycles, retention=HistoryRetentionConfig(max_messages=4))
+
+    assert kept == cycles[2:]
+    assert compacted == cycles[:2]
+
+
+def test_in_memory_archive_should_be_bounded():
+    archive = InMemoryHistoryArchive(max_sessions=2, max_cycles_per_session=2)
+    cycles = [ConversationCycle(messages=[Message.get_message(role=USER, text=f"m{i}")]) for i in range(3)]
+    archive.append(session_id="a", cycles=cycles[:2], start=0)
+    # rolled back turn archives the same cycle again
+    archive.append(session_id="a", cycles=cycles[1:], start=1)
+    archive.append(session_id="b", cycles=cycles[:1], start=0)
+    archive.load(session_id="a")
+    archive.append(session_id="c", cycles=cycles[:1], start=0)
+
+    assert [cycle.messages[0].get_text() for cycle in archive.load(session_id="a")] == ["m1", "m2"]
+    assert archive.load(session_id="b") == []
+    assert len(archive.load(session_id="c")) == 1
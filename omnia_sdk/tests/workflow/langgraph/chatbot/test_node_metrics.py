@@ -0,0 +1,80 @@
+import time
+
+from langgraph.constants import END
+
+from omnia_sdk.workflow.chatbot.chatbot_configuration import ChatbotConfiguration
+from omnia_sdk.workflow.chatbot.chatbot_state import Message
+from omnia_sdk.workflow.chatbot.constants import ASSISTANT, CONFIGURABLE, THREAD_ID, USER
+from omnia_sdk.workflow.langgraph.chatbot.chatbot_graph import ChatbotFlow, State
+from omnia_sdk.workflow.langgraph.chatbot.node_metrics import NodeMetricsAggregator
+
+"""
+This module tests that node functions receive only declared arguments and node metrics are reported per node.
+"""
+
+
+class MeasuredChatbot(ChatbotFlow):
+
+    def __init__(self, node_metrics=None):
+        super().__init__(configuration=ChatbotConfiguration(default_language="en"), node_metrics=node_metrics)
+        self.calls = []
+
+    def greet(self, state: State):
+        self.calls.append("greet")
+        self.save_message(state=state, message=Message.get_message(role=ASSISTANT, text="Hello " * 50))
+
+    def wait(self):
+        self.calls.append("wait")
+        time.sleep(0.01)
+
+    def answer(self, state: State, config: dict):
+        self.calls.append("answer")
+        self.wait_user_input(state=state, config=config, variable_name="name")
+
+    def _nodes(self):
+        self.add_node("greet", self.greet)
+        self.add_node("wait", self.wait)
+        self.add_node("answer", self.answer)
+        self.create_entry_point(start_node="greet")
+
+    def _transitions(self):
+        self.add_edge("greet", "wait")
+        self.add_edge("wait", "answer")
+        self.add_edge("answer", END)
+
+
+def test_nodes_should_be_executed_without_metrics():
+    chatbot = MeasuredChatbot()
+    config = {CONFIGURABLE: {THREAD_ID: "1"}}
+    chatbot.run(message=Message.get_message(role=USER, text="Hi"), config=config)
+    chatbot.run(message=Message.get_message(role=USER, text="John"), config=config)
+
+    assert chatbot.calls == ["greet", "wait", "answer", "answer"]
+    assert chatbot.get_variable(state=chatbot.get_state(config=config), name="name") == "John"
+
+
+def test_node_metrics_should_be_aggregated_per_node():
+    metrics = NodeMetricsAggregator()
+    chatbot = MeasuredChatbot(node_metrics=metrics)
+    config = {CONFIGURABLE: {THREAD_ID: "1"}}
+    chatbot.run(message=Message.get_message(role=USER, text="Hi"), config=config)
+    chatbot.run(message=Message.get_message(role=USER, text="John"), config=config)
+
+    summary = metrics.summary()
+    assert list(summary)[0] == "wait"
+    assert summary["wait"]["wall_seconds"] >= 0.01
+    assert summary["wait"]["state_size_delta"] == 0
+    assert summary["greet"]["state_size_delta"] > 250
+    # answer node is executed twice, interrupted on the first execution and resumed with user input
+    assert summary["answer"]["executions"] == 2
+    assert summary["answer"]["state_size_delta"] > 0
+
+
+def test_failing_metrics_hook_should_not_fail_the_turn():
+    def hook(_):
+        raise ValueError("broken hook")
+
+    chatbot = MeasuredChatbot(node_metrics=hook)
+    chatbot.run(message=Message.get_message(role=USER, text="Hi"), config={CONFIGURABLE: {THREAD_ID: "1"}})
+
+    assert chatbot.calls == ["greet", "wait", "answer"]
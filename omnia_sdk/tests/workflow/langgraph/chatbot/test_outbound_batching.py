@@ -0,0 +1,80 @@
+import asyncio
+
+from langgraph.constants import END
+
+from omnia_sdk.workflow.chatbot.chatbot_configuration import ChatbotConfiguration
+from omnia_sdk.workflow.chatbot.chatbot_state import Message
+from omnia_sdk.workflow.chatbot.constants import BATCH_OUTBOUND, CONFIGURABLE, TEXT, THREAD_ID, TYPE, USER
+from omnia_sdk.workflow.langgraph.chatbot.chatbot_graph import ChatbotFlow, State
+from omnia_sdk.workflow.tools.channels import omni_channels
+from omnia_sdk.workflow.tools.channels.omni_channels import BODY, BUSINESS_NUMBER, CHANNEL, END_USER_NUMBER
+
+"""
+This module tests that messages sent during the turn are delivered with one Messages API request when outbound batching is on.
+"""
+
+m1 = Message(role=USER, content={TYPE: TEXT.upper(), TEXT: "Hi"})
+m2 = Message(role=USER, content={TYPE: TEXT.upper(), TEXT: "Bye"})
+
+
+class BatchingChatbot(ChatbotFlow):
+
+    def greet(self, state: State, config: dict):
+        self.send_text_response(text="Hello", state=state, config=config)
+        self.send_image_response(image_url="https://example.com/logo.png", state=state, config=config)
+        self.flush(config=config)
+        self.send_text_response(text="How can I help?", state=state, config=config)
+
+    async def answer(self, state: State, config: dict):
+        await self.await_user_input(state=state, config=config)
+        await self.asend_response(content={BODY: {TYPE: TEXT.upper(), TEXT: "Goodbye"}}, state=state, config=config)
+
+    def _nodes(self):
+        self.add_node("greet", self.greet)
+        self.add_node("answer", self.answer)
+        self.create_entry_point(start_node="greet")
+
+    def _transitions(self):
+        self.add_edge("greet", "answer")
+        self.add_edge("answer", END)
+
+
+def _capture(monkeypatch) -> list[list[str]]:
+    requests = []
+
+    def record(config, x, bound_by_deadline, **kwargs):
+        requests.append([message["content"][BODY].get(TEXT, message["content"][BODY].get("url")) for message in kwargs["json"]["messages"]])
+
+    async def record_async(config, x, bound_by_deadline, **kwargs):
+        record(config, x, bound_by_deadline, **kwargs)
+
+    monkeypatch.setattr(omni_channels, "retryable_request", record)
+    monkeypatch.setattr(omni_channels, "retryable_request_async", record_async)
+    return requests
+
+
+def _config(thread_id: str, **configurable) -> dict:
+    return {CONFIGURABLE: {THREAD_ID: thread_id, CHANNEL: "WHATSAPP", BUSINESS_NUMBER: "385", END_USER_NUMBER: "386", **configurable}}
+
+
+def test_messages_should_be_batched_until_flush_and_interrupt(monkeypatch):
+    requests = _capture(monkeypatch)
+    chatbot = BatchingChatbot(configuration=ChatbotConfiguration(default_language="en", batch_outbound=True))
+    cfg = _config("batched")
+
+    async def conversation():
+        await chatbot.arun(message=m1, config=cfg)
+        await chatbot.arun(message=m2, config=cfg)
+
+    asyncio.run(conversation())
+
+    assert requests == [["Hello", "https://example.com/logo.png"], ["How can I help?"], ["Goodbye"]]
+
+
+def test_messages_should_not_be_batched_when_disabled_in_request(monkeypatch):
+    requests = _capture(monkeypatch)
+    chatbot = BatchingChatbot(configuration=ChatbotConfiguration(default_language="en", batch_outbound=True))
+
+    asyncio.run(chatbot.arun(message=m1, config=_config("unbatched", **{BATCH_OUTBOUND: False})))
+
+    assert requests == [["Hello"], ["https://example.com/logo.png"], ["How can I help?"]]
@@ -0,0 +1,258 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.constants import END
+
+from omnia_sdk.workflow.chatbot.chatbot_configuration import ChatbotConfiguration, HistoryRetentionConfig
+from omnia_sdk.workflow.chatbot.chatbot_state import Message
+from omnia_sdk.workflow.chatbot.constants import CONFIGURABLE, TEXT, THREAD_ID, USER
+from omnia_sdk.workflow.chatbot.history_archive import InMemoryHistoryArchive, register_history_archive
+from omnia_sdk.workflow.langgraph.chatbot.chatbot_graph import ChatbotFlow, State
+from omnia_sdk.workflow.langgraph.chatbot.session_dispatcher import AsyncSessionDispatcher, SessionDispatcher
+from omnia_sdk.workflow.langgraph.chatbot.sqlite_checkpointer import SQLiteCheckpointer
+from omnia_sdk.workflow.tools.channels import omni_channels
+from omnia_sdk.workflow.tools.channels.omni_channels import BODY, CHANNEL, HTTP, get_outbound_text_format
+
+"""
+This module tests that dispatchers execute different sessions in parallel and messages of one session in submission order.
+With rollback strategy consecutive messages should be merged and turns which did not reply yet superseded.
+"""
+
+
+class RecordingChatbot(ChatbotFlow):
+
+    def __init__(self, concurrent_session: str = "enqueue", coalescing_window_ms: int = 500):
+        super().__init__(configuration=ChatbotConfiguration(default_language="en", concurrent_session=concurrent_session,
+                                                            coalescing_window_ms=coalescing_window_ms))
+        self._lock = threading.Lock()
+        self.running = {}
+        self.max_running = 0
+        self.overlaps = 0
+        self.executed = []
+
+    def _enter(self, session_id: str):
+        with self._lock:
+            self.overlaps += int(self.running.get(session_id, 0) > 0)
+            self.running[session_id] = self.running.get(session_id, 0) + 1
+            self.max_running = max(self.max_running, sum(self.running.values()))
+
+    def _exit(self, session_id: str, text: str):
+        with self._lock:
+            self.running[session_id] -= 1
+            self.executed.append((session_id, text))
+
+    def record(self, state: State, config: dict):
+        session_id = self.get_session_id(config)
+        self._enter(session_id)
+        time.sleep(0.02)
+        self._exit(session_id, self.get_user_message(state=state).get_text())
+
+    async def arecord(self, state: State, config: dict):
+        session_id = self.get_session_id(config)
+        self._enter(session_id)
+        await asyncio.sleep(0.02)
+        self._exit(session_id, self.get_user_message(state=state).get_text())
+
+    def _nodes(self):
+        self.add_node("record", self.record)
+        self.create_entry_point(start_node="record")
+
+    def _transitions(self):
+        self.add_edge("record", END)
+
+
+class AsyncRecordingChatbot(RecordingChatbot):
+
+    def _nodes(self):
+        self.add_node("record", self.arecord)
+        self.create_entry_point(start_node="record")
+
+
+def _messages(sessions: int, messages: int):
+    for i in range(messages):
+        for session in range(sessions):
+            yield Message.get_message(role=USER, text=str(i)), {CONFIGURABLE: {THREAD_ID: f"session-{session}"}}
+
+
+def _assert_executed_in_order(chatbot: RecordingChatbot, sessions: int, messages: int):
+    assert chatbot.overlaps == 0
+    assert chatbot.max_running > 1
+    for session in range(sessions):
+        texts = [text for session_id, text in chatbot.executed if session_id == f"session-{session}"]
+        assert texts == [str(i) for i in range(messages)]
+
+
+def test_sessions_should_be_executed_in_parallel_and_messages_in_order():
+    chatbot = RecordingChatbot()
+    with SessionDispatcher(chatbot=chatbot, max_workers=4) as dispatcher:
+        futures = [dispatcher.submit(message=message, config=config) for message, config in _messages(sessions=3, messages=4)]
+        assert dispatcher.queue_depth("session-0") > 1
+    for future in futures:
+        future.result()
+
+    _assert_executed_in_order(chatbot, sessions=3, messages=4)
+    metrics = dispatcher.metrics()
+    assert metrics["processed"] == 12 and metrics["failed"] == 0 and metrics["active_sessions"] == 0
+    assert metrics["max_queue_depth"] > 1 and metrics["wait_seconds_max"] > 0
+
+
+def test_async_sessions_should_be_executed_concurrently_and_messages_in_order():
+    chatbot = AsyncRecordingChatbot()
+
+    async def dispatch():
+        dispatcher = AsyncSessionDispatcher(chatbot=chatbot, max_concurrency=4)
+        futures = [dispatcher.submit(message=message, config=config) for message, config in _messages(sessions=3, messages=4)]
+        await asyncio.gather(*futures)
+        await dispatcher.join()
+        return dispatcher.metrics()
+
+    metrics = asyncio.run(dispatch())
+
+    _assert_executed_in_order(chatbot, sessions=3, messages=4)
+    assert metrics["processed"] == 12 and metrics["active_sessions"] == 0
+
+
+def test_unknown_strategies_should_be_rejected():
+    with pytest.raises(ValueError):
+        RecordingChatbot(concurrent_session="interrupt")
+
+
+def test_messages_within_coalescing_window_should_be_merged():
+    chatbot = RecordingChatbot(concurrent_session="rollback", coalescing_window_ms=100)
+    config = {CONFIGURABLE: {THREAD_ID: "1"}}
+    with SessionDispatcher(chatbot=chatbot) as dispatcher:
+        for text in ("Hi", "my order", "did not arrive"):
+            dispatcher.submit(message=Message.get_message(role=USER, text=text), config=config)
+
+    assert chatbot.executed == [("1", "Hi\nmy order\ndid not arrive")]
+    assert dispatcher.metrics()["coalesced"] == 2
+
+
+class Interrupted(BaseException):
+    pass
+
+
+class InterruptedChatbot(RecordingChatbot):
+    """
+    Is interrupted during the first execution, e.g. by KeyboardInterrupt.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.interrupted = False
+
+    def run(self, message: Message, config: dict) -> None:
+        if not self.interrupted:
+            self.interrupted = True
+            raise Interrupted()
+        super().run(message=message, config=config)
+
+
+def test_session_should_be_released_when_run_raises_base_exception():
+    chatbot = InterruptedChatbot()
+    config = {CONFIGURABLE: {THREAD_ID: "1"}}
+    with SessionDispatcher(chatbot=chatbot) as dispatcher:
+        interrupted = dispatcher.submit(message=Message.get_message(role=USER, text="interrupt"), config=config)
+        executed = dispatcher.submit(message=Message.get_message(role=USER, text="Hi"), config=config)
+        executed.result(timeout=5)
+
+    assert isinstance(interrupted.exception(), Interrupted)
+    assert chatbot.executed == [("1", "Hi")]
+    assert dispatcher.metrics()["active_sessions"] == 0 and dispatcher.metrics()["failed"] == 1
+
+
+class ReplyingChatbot(ChatbotFlow):
+    """
+    Thinks for a while and replies with the user's message, or replies first and then thinks if reply_first is set.
+    """
+
+    def __init__(self, reply_first: bool = False, history_retention: HistoryRetentionConfig | None = None,
+                 checkpointer: BaseCheckpointSaver | None = None):
+        super().__init__(checkpointer=checkpointer, configuration=ChatbotConfiguration(
+            default_language="en", concurrent_session="rollback", coalescing_window_ms=0, history_retention=history_retention))
+        self.reply_first = reply_first
+        self.executed = []
+
+    async def reply(self, state: State, config: dict):
+        text = self.get_user_message(state=state).get_text()
+        self.executed.append(text)
+        if self.reply_first:
+            await self.asend_response(content=get_outbound_text_format(text=text), state=state, config=config)
+        await asyncio.sleep(0.05)
+        if not self.reply_first:
+            await self.asend_response(content=get_outbound_text_format(text=text), state=state, config=config)
+
+    def _nodes(self):
+        self.add_node("reply", self.reply)
+        self.create_entry_point(start_node="reply")
+
+    def _transitions(self):
+        self.add_edge("reply", END)
+
+
+def _converse(chatbot: ReplyingChatbot, monkeypatch) -> tuple[list, dict]:
+    delivered = []
+    monkeypatch.setattr(omni_channels, "add_response", lambda response: delivered.append(response[BODY][TEXT]))
+    config = {CONFIGURABLE: {THREAD_ID: "1", CHANNEL: HTTP}}
+
+    async def converse():
+        dispatcher = AsyncSessionDispatcher(chatbot=chatbot)
+        first = dispatcher.submit(message=Message.get_message(role=USER, text="Hi"), config=config)
+        await asyncio.sleep(0.02)
+        second = dispatcher.submit(message=Message.get_message(role=USER, text="where is my order?"), config=config)
+        await asyncio.gather(first, second)
+        return dispatcher.metrics()
+
+    return delivered, asyncio.run(converse())
+
+
+def test_turn_without_delivered_messages_should_be_superseded(monkeypatch):
+    chatbot = ReplyingChatbot()
+    delivered, metrics = _converse(chatbot, monkeypatch)
+
+    assert chatbot.executed == ["Hi", "Hi\nwhere is my order?"]
+    assert delivered == ["Hi\nwhere is my order?"]
+    assert metrics["superseded"] == 1 and metrics["coalesced"] == 1
+    messages = chatbot.get_current_cycle(state=chatbot.get_state(config={CONFIGURABLE: {THREAD_ID: "1"}})).messages
+    assert [message.get_text() for message in messages] == ["Hi\nwhere is my order?", "Hi\nwhere is my order?"]
+
+
+def test_turn_with_delivered_messages_should_not_be_superseded(monkeypatch):
+    chatbot = ReplyingChatbot(reply_first=True)
+    delivered, metrics = _converse(chatbot, monkeypatch)
+
+    assert chatbot.executed == ["Hi", "where is my order?"]
+    assert delivered == ["Hi", "where is my order?"]
+    assert metrics["superseded"] == 0
+    assert len(chatbot.get_all_cycles(state=chatbot.get_state(config={CONFIGURABLE: {THREAD_ID: "1"}}))) == 2
+
+
+def test_superseded_turn_should_not_archive_cycles_twice(monkeypatch):
+    archive = InMemoryHistoryArchive()
+    register_history_archive(name="dispatcher", archive=archive)
+    chatbot = ReplyingChatbot(history_retention=HistoryRetentionConfig(max_cycles=1, archive="dispatcher"))
+    monkeypatch.setattr(omni_channels, "add_response", lambda response: None)
+    asyncio.run(chatbot.arun(message=Message.get_message(role=USER, text="first"), config={CONFIGURABLE: {THREAD_ID: "1", CHANNEL: HTTP}}))
+    _, metrics = _converse(chatbot, monkeypatch)
+
+    assert metrics["superseded"] == 1
+    assert [[message.get_text() for message in cycle.messages] for cycle in archive.load(session_id="1")] == [["first", "first"]]
+
+
+def test_session_should_be_rolled_back_after_its_checkpoint_was_pruned(monkeypatch, tmp_path):
+    # superseded turn writes more checkpoints than are kept, the checkpoint before the turn is pruned
+    with SQLiteCheckpointer(path=str(tmp_path / "checkpoints.db"), max_checkpoints=1) as checkpointer:
+        chatbot = ReplyingChatbot(checkpointer=checkpointer)
+        monkeypatch.setattr(omni_channels, "add_response", lambda response: None)
+        config = {CONFIGURABLE: {THREAD_ID: "1", CHANNEL: HTTP}}
+        asyncio.run(chatbot.arun(message=Message.get_message(role=USER, text="first"), config=config))
+        _, metrics = _converse(chatbot, monkeypatch)
+        cycles = chatbot.get_all_cycles(state=chatbot.get_state(config={CONFIGURABLE: {THREAD_ID: "1"}}))
+
+    assert metrics["superseded"] == 1
+    assert [[message.get_text() for message in cycle.messages] for cycle in cycles] == [
+        ["first", "first"], ["Hi\nwhere is my order?", "Hi\nwhere is my order?"]
+    ]
@@ -0,0 +1,105 @@
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from langgraph.constants import END
+
+from omnia_sdk.workflow.chatbot.chatbot_configuration import ChatbotConfiguration
+from omnia_sdk.workflow.chatbot.chatbot_state import Message
+from omnia_sdk.workflow.chatbot.constants import ASSISTANT, CONFIGURABLE, THREAD_ID, USER
+from omnia_sdk.workflow.langgraph.chatbot.chatbot_graph import ChatbotFlow, State
+from omnia_sdk.workflow.langgraph.chatbot.sqlite_checkpointer import SQLiteCheckpointer
+
+a1 = Message.get_message(role=ASSISTANT, text="What is your name?")
+"""
+This module tests that chatbot state is persisted in SQLite over interrupts and cycles, only the latest checkpoints are kept
+and idle sessions are evicted with session end callback.
+"""
+
+
+class NameChatbot(ChatbotFlow):
+
+    def __init__(self, checkpointer: SQLiteCheckpointer):
+        super().__init__(checkpointer=checkpointer, configuration=ChatbotConfiguration(default_language="en"))
+        self.ended_sessions = {}
+
+    def ask(self, state: State):
+        self.save_message(state=state, message=a1)
+
+    def answer(self, state: State, config: dict):
+        self.wait_user_input(state=state, config=config, variable_name="name")
+
+    def on_session_end(self, state: State, session_id: str):
+        self.ended_sessions[session_id] = self.get_variable(state=state, name="name")
+
+    def _nodes(self):
+        self.add_node("ask", self.ask)
+        self.add_node("answer", self.answer)
+        self.create_entry_point(start_node="ask")
+
+    def _transitions(self):
+        self.add_edge("ask", "answer")
+        self.add_edge("answer", END)
+
+
+def _converse(chatbot: ChatbotFlow, session_id: str, cycles: int = 1) -> dict:
+    cfg = {CONFIGURABLE: {THREAD_ID: session_id}}
+    for i in range(cycles):
+        chatbot.run(message=Message.get_message(role=USER, text="Hi"), config=cfg)
+        chatbot.run(message=Message.get_message(role=USER, text=f"{session_id}-{i}"), config=cfg)
+    return cfg
+
+
+def test_state_should_be_persisted_with_latest_checkpoints_only(tmp_path):
+    path = str(tmp_path / "checkpoints.db")
+    cfg = _converse(NameChatbot(checkpointer=SQLiteCheckpointer(path=path, max_checkpoints=3)), session_id="john", cycles=3)
+    # new process should see the same state
+    chatbot = NameChatbot(checkpointer=SQLiteCheckpointer(path=path, max_checkpoints=3))
+    state = chatbot.get_state(config=cfg)
+
+    assert len(chatbot.get_all_cycles(state=state)) == 3
+    assert chatbot.get_current_cycle(state=state).messages[1:] == [a1, Message.get_message(role=USER, text="john-2")]
+    assert chatbot.get_variable(state=state, name="name") == "john-2"
+    with sqlite3.connect(path) as connection:
+        assert connection.execute("SELECT COUNT(*) FROM checkpoints").fetchone()[0] == 3
+        # only channel values referenced by the retained checkpoints are kept
+        assert connection.execute(
+            "SELECT COUNT(*) FROM blobs WHERE version < (SELECT MIN(version) FROM checkpoint_versions WHERE channel = blobs.channel)"
+        ).fetchone()[0] == 0
+        assert connection.execute("SELECT COUNT(DISTINCT checkpoint_id) FROM checkpoint_versions").fetchone()[0] == 3
+
+
+def test_idle_sessions_should_be_evicted_with_callback(tmp_path):
+    chatbot = NameChatbot(checkpointer=SQLiteCheckpointer(path=str(tmp_path / "checkpoints.db"), ttl_seconds=0))
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        configs = list(executor.map(lambda session_id: _converse(chatbot, session_id=session_id), ["a", "b", "c", "d"]))
+
+    assert sorted(chatbot.workflow.checkpointer.evict_idle_sessions()) == ["a", "b", "c", "d"]
+    assert chatbot.ended_sessions == {"a": "a-0", "b": "b-0", "c": "c-0", "d": "d-0"}
+    assert all(chatbot.get_state(config=cfg) == {} for cfg in configs)
+
+
+def test_idle_sessions_should_be_evicted_once_in_background(tmp_path):
+    ended = []
+    callback_done = threading.Event()
+
+    def on_session_end(session_id: str, _: dict):
+        ended.append((session_id, threading.current_thread().name))
+        callback_done.set()
+
+    checkpointer = SQLiteCheckpointer(path=str(tmp_path / "checkpoints.db"), ttl_seconds=0.2, eviction_interval_seconds=0.01,
+                                      on_session_end=on_session_end)
+    with checkpointer:
+        chatbot = NameChatbot(checkpointer=checkpointer)
+        cfg = {CONFIGURABLE: {THREAD_ID: "a"}}
+        chatbot.run(message=Message.get_message(role=USER, text="Hi"), config=cfg)
+        assert callback_done.wait(timeout=5)
+        # explicit eviction waits for the background one and does not end the session again
+        assert checkpointer.evict_idle_sessions() == []
+
+    # callbacks are executed by the eviction thread, not by the thread writing checkpoints of the turn
+    assert ended == [("a", "omnia-checkpoint-eviction")]
+    with pytest.raises(sqlite3.ProgrammingError):
+        chatbot.get_state(config=cfg)
@@ -0,0 +1,85 @@
+from langgraph.constants import END
+
+from omnia_sdk.workflow.chatbot.chatbot_configuration import ChatbotConfiguration
+from omnia_sdk.workflow.chatbot.chatbot_state import ChatbotState, ConversationCycle, Message
+from omnia_sdk.workflow.chatbot.constants import ASSISTANT, CONFIGURABLE, THREAD_ID, USER
+from omnia_sdk.workflow.langgraph.chatbot.chatbot_graph import ChatbotFlow, State
+from omnia_sdk.workflow.langgraph.chatbot.state_channels import Overwrite, StateTracker
+
+m1 = Message.get_message(role=USER, text="Hi")
+a1 = Message.get_message(role=ASSISTANT, text="Hello")
+"""
+This module tests that node changes of the state view are converted to minimal channel updates.
+"""
+
+
+def _values() -> dict:
+    return {
+        "conversation_cycles": [ConversationCycle(messages=[m1, a1])],
+        "messages": [m1],
+        "intent": None,
+        "variables": {"foo": "bar", "items": [1]},
+        "user_language": "en",
+    }
+
+
+def test_appended_message_should_be_the_only_update():
+    tracker = StateTracker(values=_values())
+    ChatbotFlow.save_message(state=tracker.state, message=a1)
+
+    assert tracker.delta() == {"messages": [a1]}
+
+
+def test_changed_and_deleted_variables_should_be_updated():
+    tracker = StateTracker(values=_values())
+    ChatbotFlow.get_variable(state=tracker.state, name="items").append(2)
+    assert tracker.delta() == {"variables": {"items": [1, 2]}}
+
+    del ChatbotFlow.get_variables(state=tracker.state)["foo"]
+    assert tracker.delta() == {"variables": Overwrite({"items": [1, 2]})}
+
+
+def test_legacy_state_should_be_migrated_to_channels():
+    legacy_state = ChatbotState(conversation_cycles=[ConversationCycle(messages=[m1])], user_language="en", variables={"foo": "bar"})
+    tracker = StateTracker(values={"chatbot_state": legacy_state})
+    ChatbotFlow.save_message(state=tracker.state, message=a1)
+
+    assert tracker.delta() == {
+        "conversation_cycles": [],
+        "messages": Overwrite([m1, a1]),
+        "intent": None,
+        "user_language": "en",
+        "archived_history": None,
+        "variables": Overwrite({"foo": "bar"}),
+        "chatbot_state": None,
+    }
+
+
+class RoutingChatbot(ChatbotFlow):
+
+    def start(self, state: State):
+        self.save_intent(state=state, intent="greeting")
+
+    def route(self, state: State) -> str:
+        return "greet" if self.get_intent(state=state) == "greeting" else END
+
+    def greet(self, state: State):
+        self.save_message(state=state, message=a1)
+
+    def _nodes(self):
+        self.add_node("start", self.start)
+        self.add_node("greet", self.greet)
+        self.create_entry_point(start_node="start")
+
+    def _transitions(self):
+        self.add_conditional_edge("start", self.route)
+        self.add_edge("greet", END)
+
+
+def test_conditional_edge_should_receive_state_view():
+    chatbot = RoutingChatbot(configuration=ChatbotConfiguration(default_language="en"))
+    cfg = {CONFIGURABLE: {THREAD_ID: "routing"}}
+    chatbot.run(message=m1, config=cfg)
+    state = chatbot.get_state(config=cfg)
+
+    assert chatbot.get_current_cycle(state=state) == ConversationCycle(messages=[m1, a1], intent="greeting")
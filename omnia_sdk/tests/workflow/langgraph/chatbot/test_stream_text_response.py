@@ -0,0 +1,61 @@
+import pytest
+from langgraph.constants import END
+
+from omnia_sdk.workflow.chatbot.chatbot_configuration import ChatbotConfiguration
+from omnia_sdk.workflow.chatbot.chatbot_state import Message
+from omnia_sdk.workflow.chatbot.constants import ASSISTANT, CONFIGURABLE, TEXT, THREAD_ID, TYPE, USER
+from omnia_sdk.workflow.langgraph.chatbot.chatbot_graph import ChatbotFlow, State
+from omnia_sdk.workflow.tools.channels._context import ResponseCollector, reset_response_collector, set_response_collector
+from omnia_sdk.workflow.tools.channels.omni_channels import BODY, CHANNEL, HTTP, get_outbound_text_format
+
+"""
+This module tests that streamed text is sent in chunks and saved in the state as a single message.
+"""
+
+tokens = ["Your order", " has shipped.", " It arrives", " tomorrow."]
+
+
+def _stream(fail: bool):
+    yield from tokens[:3]
+    if fail:
+        raise ConnectionError("stream interrupted")
+    yield from tokens[3:]
+
+
+class StreamingChatbot(ChatbotFlow):
+
+    def reply(self, state: State, config: dict):
+        try:
+            self.stream_text_response(tokens=_stream(fail=config[CONFIGURABLE]["fail"]), state=state, config=config, min_chunk_chars=5)
+        except ConnectionError:
+            pass
+
+    def _nodes(self):
+        self.add_node("reply", self.reply)
+        self.create_entry_point(start_node="reply")
+
+    def _transitions(self):
+        self.add_edge("reply", END)
+
+
+@pytest.fixture
+def collector():
+    collector = ResponseCollector()
+    token = set_response_collector(collector)
+    try:
+        yield collector
+    finally:
+        reset_response_collector(token)
+
+
+@pytest.mark.parametrize("fail, saved", [(False, "Your order has shipped. It arrives tomorrow."), (True, "Your order has shipped.")])
+def test_streamed_text_should_be_sent_in_chunks_and_saved_once(collector: ResponseCollector, fail: bool, saved: str):
+    chatbot = StreamingChatbot(configuration=ChatbotConfiguration(default_language="en"))
+    cfg = {CONFIGURABLE: {THREAD_ID: f"stream-{fail}", CHANNEL: HTTP, "fail": fail}}
+
+    chatbot.run(message=Message(role=USER, content={TYPE: TEXT.upper(), TEXT: "Where is my order?"}), config=cfg)
+
+    sent = [response[BODY][TEXT] for response in collector.responses]
+    assert sent == ["Your order has shipped.", "It arrives tomorrow."][:1 if fail else 2]
+    messages = chatbot.get_current_cycle(chatbot.get_state(config=cfg)).messages
+    assert messages[1:] == [Message(role=ASSISTANT, content=get_outbound_text_format(text=saved))]
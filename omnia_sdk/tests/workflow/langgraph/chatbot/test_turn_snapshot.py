@@ -0,0 +1,12 @@
+from omnia_sdk.benchmarks.checkpoint_reads import count_reads
+
+"""
+This module tests that checkpoint is read only once per inbound message by ChatbotFlow.
+The other read is done by LangGraph itself when graph execution starts or resumes.
+"""
+
+
+def test_checkpoint_should_be_read_once_per_turn():
+    # messages alternate between new conversation cycle and resuming interrupted graph
+    reads = count_reads(messages=4)
+    assert reads == [2, 2, 2, 2]
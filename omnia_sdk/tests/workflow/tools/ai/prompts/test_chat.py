@@ -0,0 +1,310 @@
+import asyncio
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from google.genai.types import (
+    Candidate,
+    Content,
+    FunctionDeclaration,
+    GenerateContentConfig,
+    GenerateContentResponse,
+    HttpOptions,
+    Part,
+    Tool,
+)
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+from openai.types.chat.chat_completion_chunk import Choice, ChoiceDelta
+
+from omnia_sdk.workflow.chatbot.constants import CONFIGURABLE, THREAD_ID
+from omnia_sdk.workflow.tools.ai.llm_models import ChatSessionRequest, ChatSessionResponse, IntentInstruction
+from omnia_sdk.workflow.tools.ai.prompts import chat
+from omnia_sdk.workflow.tools.ai.prompts.completion_cache import (
+    CHAT_COMPLETIONS,
+    GOOGLE_GENERATE_CONTENT,
+    InMemoryCompletionCache,
+    get_completion_cache_stats,
+    set_completion_cache,
+)
+from omnia_sdk.workflow.tools.ai.prompts.intent_classifier import LocalIntentClassifier
+from omnia_sdk.workflow.tools.channels.text_chunker import TextChunker
+from omnia_sdk.workflow.tools.rest.deadline import reset_turn_deadline, set_turn_deadline
+from omnia_sdk.workflow.tools.rest.exceptions import ApplicationError, DeadlineExceededError
+from omnia_sdk.workflow.tools.rest.http_metrics import set_http_metrics_hook
+from omnia_sdk.workflow.tools.rest.rate_limiter import GPT_CREATOR, ApiLimits, configure_api_limits, get_api_limiter_by_family
+
+"""
+This module tests LLM wrappers in chat.py with stubbed OpenAI and Gemini clients.
+"""
+
+config = {CONFIGURABLE: {THREAD_ID: "chat"}}
+
+
+def _google_response(text: str) -> GenerateContentResponse:
+    return GenerateContentResponse(candidates=[Candidate(content=Content(role="model", parts=[Part(text=text)]))])
+
+
+def _openai_chunk(text: str | None) -> ChatCompletionChunk:
+    choices = [Choice(index=0, delta=ChoiceDelta(content=text))] if text is not None else []
+    return ChatCompletionChunk(id="chunk", choices=choices, created=0, model="gpt", object="chat.completion.chunk")
+
+
+def _openai_completion(text: str) -> ChatCompletion:
+    return ChatCompletion.model_validate({
+        "id": "completion", "created": 0, "model": "gpt", "object": "chat.completion",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": text}}],
+    })
+
+
+class ServiceUnavailable(Exception):
+    status_code = 503
+
+
+@pytest.fixture
+def limiter():
+    previous = get_api_limiter_by_family(GPT_CREATOR).limits
+    configure_api_limits(GPT_CREATOR, ApiLimits(max_concurrency=8, initial_concurrency=4))
+    yield get_api_limiter_by_family(GPT_CREATOR).concurrency
+    configure_api_limits(GPT_CREATOR, previous)
+
+
+@pytest.fixture
+def cache():
+    cache = InMemoryCompletionCache()
+    set_completion_cache(cache)
+    get_completion_cache_stats().reset()
+    yield cache
+    set_completion_cache(None)
+    get_completion_cache_stats().reset()
+
+
+# OpenAI client whose chat completions stream yields the tokens, with_options returns the same client
+def _openai_client(tokens: list[str | None], error: Exception | None = None) -> Mock:
+    def stream(**_):
+        yield from (_openai_chunk(token) for token in tokens)
+        if error:
+            raise error
+
+    client = Mock()
+    client.with_options.return_value = client
+    client.chat.completions.create.side_effect = stream
+    return client
+
+
+def test_turn_deadline_should_not_leak_into_reused_google_config():
+    google_config = GenerateContentConfig(http_options=HttpOptions(timeout=5000))
+    generate_content = Mock(return_value=_google_response("Hi"))
+    timeouts = []
+    with patch.object(chat.client.models, "generate_content", generate_content):
+        for budget_seconds in (0.5, 10):
+            token = set_turn_deadline(budget_seconds)
+            try:
+                chat.google_generate_content(model="gemini", contents="Hi", config=config, google_config=google_config)
+            finally:
+                reset_turn_deadline(token)
+            timeouts.append(generate_content.call_args.kwargs["config"].http_options.timeout)
+
+    assert 0 < timeouts[0] <= 500
+    # user's timeout bounds later turns with enough budget
+    assert timeouts[1] == 5000
+    assert google_config.http_options.timeout == 5000
+
+
+def test_failed_batch_request_should_be_recorded_with_its_status():
+    completion, error = Mock(), ApplicationError(code=503, message="overloaded")
+    requests = [{"messages": [{"role": "user", "content": f"Tell me joke about {animal}"}]} for animal in ("cats", "dogs")]
+    recorded = []
+    set_http_metrics_hook(recorded.append)
+    try:
+        with patch.object(chat, "chat_completions_async", AsyncMock(side_effect=[completion, error])):
+            results = asyncio.run(chat.batch_chat_completions(chat_completion_requests=requests, config=config))
+    finally:
+        set_http_metrics_hook(None)
+
+    assert results == [completion, error]
+    batch = next(metrics for metrics in recorded if metrics.method == "batch")
+    assert batch.attempts == 2 and batch.status_code == 503
+
+
+def test_openai_stream_should_yield_text_for_chunking_and_release_permit(limiter):
+    tokens = ["Your order", " has shipped.", " It arrives", " tomorrow.", None]
+    client = _openai_client(tokens)
+    chunker = TextChunker(min_chars=5)
+    with patch.object(chat, "openai_client", client):
+        chunks = [chunk for delta in chat.chat_completions_stream(messages=[], config=config) for chunk in chunker.feed(delta)]
+
+    assert chunks + [chunker.flush()] == ["Your order has shipped.", "It arrives tomorrow."]
+    assert client.chat.completions.create.call_args.kwargs["stream"] is True
+    assert limiter.in_flight == 0
+    assert limiter.limit > 4
+
+
+def test_failed_openai_stream_should_release_permit_as_overloaded(limiter):
+    client = _openai_client(["Your order"], error=ServiceUnavailable("overloaded"))
+    received = []
+    with patch.object(chat, "openai_client", client), pytest.raises(ApplicationError):
+        for delta in chat.chat_completions_stream(messages=[], config=config):
+            received.append(delta)
+
+    assert received == ["Your order"]
+    assert limiter.in_flight == 0
+    assert limiter.limit < 4
+
+
+def test_closed_openai_stream_should_release_permit_without_load_signal(limiter):
+    client = _openai_client(["Your order", " has shipped."])
+    with patch.object(chat, "openai_client", client):
+        stream = chat.chat_completions_stream(messages=[], config=config)
+        assert next(stream) == "Your order"
+        assert limiter.in_flight == 1
+        stream.close()
+
+    assert limiter.in_flight == 0
+    assert limiter.limit == 4
+
+
+def test_openai_stream_should_be_bound_by_turn_deadline(limiter):
+    client = _openai_client(["Hi"])
+    with patch.object(chat, "openai_client", client):
+        token = set_turn_deadline(2.0)
+        try:
+            assert list(chat.chat_completions_stream(messages=[], config=config)) == ["Hi"]
+        finally:
+            reset_turn_deadline(token)
+        token = set_turn_deadline(0)
+        try:
+            with pytest.raises(DeadlineExceededError):
+                list(chat.chat_completions_stream(messages=[], config=config))
+        finally:
+            reset_turn_deadline(token)
+
+    options = client.with_options.call_args_list[0].kwargs
+    assert 1.5 < options["timeout"] <= 2.0 and options["max_retries"] == 0
+    assert client.chat.completions.create.call_count == 1
+    assert limiter.in_flight == 0
+
+
+def test_google_stream_async_should_yield_text_bound_by_deadline(limiter):
+    async def stream():
+        for text in ("Hello", " there"):
+            yield _google_response(text)
+
+    generate_content_stream = AsyncMock(side_effect=lambda **_: stream())
+
+    async def consume() -> list[str]:
+        token = set_turn_deadline(2.0)
+        try:
+            return [delta async for delta in chat.google_generate_content_stream_async(model="gemini", contents="Hi", config=config)]
+        finally:
+            reset_turn_deadline(token)
+
+    with patch.object(chat.client.aio.models, "generate_content_stream", generate_content_stream):
+        assert asyncio.run(consume()) == ["Hello", " there"]
+
+    assert 1500 < generate_content_stream.call_args.kwargs["config"].http_options.timeout <= 2000
+    assert limiter.in_flight == 0
+
+
+def test_chat_completions_should_be_cached_only_if_deterministic(cache):
+    client = Mock()
+    client.chat.completions.create.return_value = _openai_completion("order_status")
+    messages = [{"role": "user", "content": "Classify: where is my parcel?"}]
+    tools = [{"type": "function", "function": {"name": "track_parcel"}}]
+    with patch.object(chat, "openai_client", client):
+        first = chat.chat_completions(messages=messages, config=config, model="gpt", temperature=0)
+        cached = chat.chat_completions(messages=messages, config=config, model="gpt", temperature=0)
+        assert client.chat.completions.create.call_count == 1
+        chat.chat_completions(messages=messages, config=config, model="gpt", temperature=0.7)
+        chat.chat_completions(messages=messages, config=config, model="gpt", temperature=0, tools=tools)
+        chat.chat_completions(messages=messages, config=config, model="gpt", temperature=0, use_cache=False)
+
+    assert cached == first
+    assert client.chat.completions.create.call_count == 4
+    assert len(cache) == 1
+    assert get_completion_cache_stats().summary()[CHAT_COMPLETIONS] == {"hits": 1, "misses": 1, "bypassed": 3, "hit_rate": 0.5}
+
+
+def test_google_generate_content_should_be_cached_only_if_deterministic(cache):
+    generate_content = Mock(return_value=_google_response("order_status"))
+    deterministic = GenerateContentConfig(temperature=0)
+    with_tools = GenerateContentConfig(temperature=0, tools=[Tool(function_declarations=[FunctionDeclaration(name="track_parcel")])])
+    with patch.object(chat.client.models, "generate_content", generate_content):
+        first = chat.google_generate_content(model="gemini", contents="Hi", config=config, google_config=deterministic)
+        token = set_turn_deadline(10)
+        try:
+            # turn deadline only changes http options, which are not part of the key
+            cached = chat.google_generate_content(model="gemini", contents="Hi", config=config, google_config=deterministic)
+        finally:
+            reset_turn_deadline(token)
+        assert generate_content.call_count == 1
+        chat.google_generate_content(model="gemini", contents="Hi", config=config, google_config=GenerateContentConfig(temperature=0.5))
+        chat.google_generate_content(model="gemini", contents="Hi", config=config, google_config=with_tools)
+        chat.google_generate_content(model="gemini", contents="Hi", config=config)
+        chat.google_generate_content(model="gemini", contents="Hi", config=config, google_config=deterministic, use_cache=False)
+
+    assert cached.text == first.text == "order_status"
+    assert generate_content.call_count == 5
+    assert get_completion_cache_stats().summary()[GOOGLE_GENERATE_CONTENT] == {"hits": 1, "misses": 1, "bypassed": 4, "hit_rate": 0.5}
+
+
+def test_chat_session_should_not_be_cached(cache):
+    response = {"response": "Your order is confirmed.", "tool_calls": None, "parsed_params": None, "model_usages": []}
+    # user repeats the same message in the session, endpoint must answer and record every exchange
+    request = ChatSessionRequest(user_message="yes", chat_completions_params={"temperature": 0})
+
+    async def ask() -> ChatSessionResponse:
+        return await chat.chat_session_async(request, config=config)
+
+    retryable_request, retryable_request_async = Mock(return_value=response), AsyncMock(return_value=response)
+    with patch.object(chat, "retryable_request", retryable_request), patch.object(chat, "retryable_request_async", retryable_request_async):
+        chat.chat_session(request, config=config)
+        chat.chat_session(request, config=config)
+        asyncio.run(ask())
+
+    assert retryable_request.call_count == 2
+    assert retryable_request_async.await_count == 1
+    assert len(cache) == 0
+    assert get_completion_cache_stats().summary() == {}
+
+
+def _intent_classifier() -> LocalIntentClassifier:
+    examples = {"confirm": ["yes", "sure"], "order_status": ["where is my order"]}
+    return LocalIntentClassifier(intents=["confirm", "order_status"], examples=examples)
+
+
+def test_detect_intent_should_call_llm_only_if_classifier_is_not_confident():
+    classifier = _intent_classifier()
+    with patch.object(chat, "retryable_request", return_value={"response": "order_status"}) as retryable_request:
+        trivial = IntentInstruction(prompt="Classify", intents=classifier.intents, user_message="Yes!")
+        local = chat.detect_intent(trivial, config, classifier)
+        assert retryable_request.call_count == 0
+        instruction = IntentInstruction(prompt="Classify", intents=classifier.intents, user_message="My parcel did not arrive, what now?")
+        fallback = chat.detect_intent(instruction, config, classifier)
+
+    assert (local, fallback) == ("confirm", "order_status")
+    assert retryable_request.call_args.kwargs["json"] == instruction.model_dump()
+    summary = classifier.stats.summary()
+    assert (summary["local"], summary["llm"]) == (1, 1)
+    assert summary["average_llm_seconds"] > 0
+
+
+def test_detect_intent_async_should_call_llm_only_if_classifier_is_not_confident():
+    classifier = _intent_classifier()
+    instructions = [IntentInstruction(prompt="Classify", intents=classifier.intents, user_message=message)
+                    for message in ("sure", "My parcel did not arrive, what now?")]
+
+    async def detect() -> list[str]:
+        return [await chat.detect_intent_async(instruction, config, classifier) for instruction in instructions]
+
+    retryable_request_async = AsyncMock(return_value={"response": "order_status"})
+    with patch.object(chat, "retryable_request_async", retryable_request_async):
+        assert asyncio.run(detect()) == ["confirm", "order_status"]
+
+    assert retryable_request_async.await_count == 1
+    assert (classifier.stats.local, classifier.stats.llm) == (1, 1)
+
+
+def test_detect_intent_without_classifier_should_always_call_llm():
+    with patch.object(chat, "retryable_request", return_value={"response": "confirm"}) as retryable_request:
+        assert chat.detect_intent(IntentInstruction(prompt="Classify", intents=["confirm"], user_message="yes"), config) == "confirm"
+
+    assert retryable_request.call_count == 1
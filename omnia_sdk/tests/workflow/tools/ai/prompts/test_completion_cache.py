@@ -0,0 +1,76 @@
+import sqlite3
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from omnia_sdk.workflow.tools.ai.llm_models import ChatSessionRequest
+from omnia_sdk.workflow.tools.ai.prompts.completion_cache import (
+    CHAT_COMPLETIONS,
+    CompletionCacheStats,
+    InMemoryCompletionCache,
+    SQLiteCompletionCache,
+    completion_key,
+)
+
+messages = [{"role": "user", "content": "Classify: where is my parcel?"}]
+
+
+def test_completion_key_should_be_canonical():
+    first = completion_key(CHAT_COMPLETIONS, model="gpt", messages=messages, params={"temperature": 0, "max_tokens": 10})
+    reordered = completion_key(CHAT_COMPLETIONS, params={"max_tokens": 10, "temperature": 0}, messages=messages, model="gpt")
+    other_model = completion_key(CHAT_COMPLETIONS, model="gemini", messages=messages, params={"temperature": 0, "max_tokens": 10})
+
+    assert first == reordered
+    assert first != other_model
+    assert completion_key(CHAT_COMPLETIONS, request=ChatSessionRequest(prompt="Hi")) != completion_key(
+        CHAT_COMPLETIONS, request=ChatSessionRequest(prompt="Hi", memory_key="faq")
+    )
+
+
+def test_in_memory_cache_should_evict_least_recently_used_and_expired_entries():
+    cache = InMemoryCompletionCache(max_entries=2, ttl_seconds=60)
+    with patch("time.monotonic", return_value=0):
+        cache.set("a", "1")
+        cache.set("b", "2")
+        cache.get("a")
+        cache.set("c", "3")
+        assert (cache.get("a"), cache.get("b"), cache.get("c")) == ("1", None, "3")
+    with patch("time.monotonic", return_value=61):
+        assert cache.get("a") is None
+    assert len(cache) == 1
+
+
+def test_sqlite_cache_should_persist_entries_until_they_expire(tmp_path):
+    path = str(tmp_path / "completions.db")
+    SQLiteCompletionCache(path=path, ttl_seconds=60).set("a", '{"response": "shipping"}')
+    cache = SQLiteCompletionCache(path=path, ttl_seconds=60)
+
+    assert cache.get("a") == '{"response": "shipping"}'
+    with patch("time.time", return_value=10 ** 12):
+        assert cache.get("a") is None
+        assert cache.evict_expired() == 1
+
+
+def test_sqlite_cache_should_close_connections_of_all_threads(tmp_path):
+    with SQLiteCompletionCache(path=str(tmp_path / "completions.db")) as cache:
+        cache.set("a", "1")
+        other = threading.Thread(target=cache.get, args=("a",))
+        other.start()
+        other.join()
+        connections = list(cache._connections.values())
+        assert len(connections) == 2
+
+    for connection in connections:
+        with pytest.raises(sqlite3.ProgrammingError):
+            connection.execute("SELECT 1")
+    with pytest.raises(sqlite3.ProgrammingError):
+        cache.get("a")
+
+
+def test_stats_should_report_hit_rate_of_cacheable_requests():
+    stats = CompletionCacheStats()
+    for outcome in ("hits", "hits", "hits", "misses", "bypassed"):
+        stats.record(CHAT_COMPLETIONS, outcome)
+
+    assert stats.summary() == {CHAT_COMPLETIONS: {"hits": 3, "misses": 1, "bypassed": 1, "hit_rate": 0.75}}
@@ -0,0 +1,54 @@
+import pytest
+
+from omnia_sdk.workflow.tools.ai.llm_models import IntentInstruction
+from omnia_sdk.workflow.tools.ai.prompts.intent_classifier import LocalIntentClassifier
+
+intents = ["confirm", "main_menu", "order_status", "other"]
+examples = {
+    "confirm": ["yes", "yes please", "sure", "ok"],
+    "main_menu": ["menu", "show me the options"],
+    "order_status": ["where is my order", "track my parcel"],
+}
+
+
+@pytest.fixture
+def classifier() -> LocalIntentClassifier:
+    return LocalIntentClassifier(intents=intents, examples=examples)
+
+
+def test_should_classify_trivial_messages_and_postbacks(classifier):
+    assert classifier.classify("Yes!") == "confirm"
+    assert classifier.classify("MENU") == "main_menu"
+    assert classifier.classify("main_menu") == "main_menu"
+    assert classifier.classify("where is my order?") == "order_status"
+
+
+def test_should_leave_uncertain_messages_to_llm(classifier):
+    assert classifier.classify("I would like to cancel my subscription and get a refund") is None
+    assert classifier.classify("qqq") is None
+    assert classifier.classify("") is None
+    assert classifier.match("where is my parcel").intent == "order_status"
+
+
+def test_should_only_return_intents_of_the_instruction(classifier):
+    assert classifier.classify("yes", intents=["order_status"]) is None
+    assert classifier.detect(IntentInstruction(prompt="Classify", intents=["confirm"], user_message="yes")) == "confirm"
+    assert classifier.detect(IntentInstruction(prompt="Classify", intents=["other"], user_message="yes")) is None
+    assert classifier.detect(IntentInstruction(prompt="Classify: yes", intents=["confirm"])) is None
+
+
+def test_should_report_skipped_llm_calls_and_saved_latency(classifier):
+    classifier.detect(IntentInstruction(prompt="Classify", intents=intents, user_message="ok"))
+    classifier.detect(IntentInstruction(prompt="Classify", intents=intents, user_message="sure"))
+    classifier.record_llm(0.8)
+
+    summary = classifier.stats.summary()
+    assert summary["local"] == 2
+    assert summary["llm"] == 1
+    assert summary["skipped_ratio"] == pytest.approx(2 / 3)
+    assert 1.5 < summary["saved_seconds"] <= 1.6
+
+
+def test_should_reject_examples_of_unknown_intents():
+    with pytest.raises(ValueError):
+        LocalIntentClassifier(intents=["confirm"], examples={"cancel": ["stop"]})
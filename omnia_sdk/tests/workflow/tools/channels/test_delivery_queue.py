@@ -0,0 +1,88 @@
+import threading
+import time
+
+from langgraph.constants import END
+
+from omnia_sdk.workflow.chatbot.chatbot_configuration import ChatbotConfiguration
+from omnia_sdk.workflow.chatbot.chatbot_state import Message
+from omnia_sdk.workflow.chatbot.constants import CONFIGURABLE, TEXT, THREAD_ID, TYPE, USER
+from omnia_sdk.workflow.langgraph.chatbot.chatbot_graph import ChatbotFlow, State
+from omnia_sdk.workflow.tools.channels import omni_channels
+from omnia_sdk.workflow.tools.channels.delivery_queue import DeliveryFailure, DeliveryHandle, DeliveryQueue
+from omnia_sdk.workflow.tools.channels.omni_channels import BODY, BUSINESS_NUMBER, CHANNEL, END_USER_NUMBER
+
+
+def test_deliveries_should_keep_order_within_session_and_run_sessions_in_parallel():
+    queue = DeliveryQueue(workers=2)
+    handle = DeliveryHandle(queue)
+    delivered = {"a": [], "b": []}
+    both_sessions_started = threading.Barrier(2, timeout=5)
+
+    def deliver(session_id: str, index: int):
+        if index == 0:
+            # fails unless the other session is delivered at the same time
+            both_sessions_started.wait()
+        time.sleep(0.001)
+        delivered[session_id].append(index)
+
+    for index in range(5):
+        for session_id in ("a", "b"):
+            handle.submit(session_id=session_id, deliver=lambda s=session_id, i=index: deliver(s, i), request={})
+
+    assert handle.join(timeout=5)
+    assert delivered == {"a": [0, 1, 2, 3, 4], "b": [0, 1, 2, 3, 4]}
+    queue.close()
+
+
+def test_failed_delivery_should_be_reported_and_not_block_next_messages():
+    failures: list[DeliveryFailure] = []
+    queue = DeliveryQueue(workers=1, on_delivery_failure=failures.append)
+    handle = DeliveryHandle(queue)
+    delivered = []
+
+    def fail():
+        raise ConnectionError("unreachable")
+
+    handle.submit(session_id="a", deliver=fail, request={"url": "https://example.com"})
+    handle.submit(session_id="a", deliver=lambda: delivered.append("second"), request={})
+
+    assert handle.join(timeout=5)
+    assert delivered == ["second"]
+    assert [(failure.session_id, failure.request["url"], type(failure.error)) for failure in failures] == [
+        ("a", "https://example.com", ConnectionError)
+    ]
+    queue.close()
+
+
+delivered = []
+
+
+class SlowChannelChatbot(ChatbotFlow):
+
+    def start(self, state: State, config: dict):
+        self.send_text_response(text="Hello", state=state, config=config)
+        self.save_variable(name="sent_before_delivery", value=not delivered, state=state)
+
+    def _nodes(self):
+        self.add_node("start", self.start)
+        self.create_entry_point(start_node="start")
+
+    def _transitions(self):
+        self.add_edge("start", END)
+
+
+def test_run_should_wait_for_background_deliveries_at_the_end_of_turn(monkeypatch):
+    def slow_request(config, x, bound_by_deadline, **kwargs):
+        time.sleep(0.05)
+        delivered.append(kwargs["json"]["messages"][0]["content"][BODY][TEXT])
+
+    monkeypatch.setattr(omni_channels, "retryable_request", slow_request)
+    queue = DeliveryQueue(workers=1)
+    chatbot = SlowChannelChatbot(configuration=ChatbotConfiguration(default_language="en"), delivery_queue=queue)
+    cfg = {CONFIGURABLE: {THREAD_ID: "background", CHANNEL: "WHATSAPP", BUSINESS_NUMBER: "385", END_USER_NUMBER: "386"}}
+
+    chatbot.run(message=Message(role=USER, content={TYPE: TEXT.upper(), TEXT: "Hi"}), config=cfg)
+
+    assert delivered == ["Hello"]
+    assert chatbot.get_variable(state=chatbot.get_state(config=cfg), name="sent_before_delivery")
+    queue.close()
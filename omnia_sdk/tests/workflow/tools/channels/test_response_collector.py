@@ -0,0 +1,117 @@
+import asyncio
+import threading
+from contextvars import copy_context
+
+import pytest
+from langgraph.constants import END
+
+from omnia_sdk.workflow.chatbot.chatbot_configuration import ChatbotConfiguration
+from omnia_sdk.workflow.chatbot.chatbot_state import Message
+from omnia_sdk.workflow.chatbot.constants import CONFIGURABLE, TEXT, THREAD_ID, TYPE, USER
+from omnia_sdk.workflow.langgraph.chatbot.chatbot_graph import ChatbotFlow, State
+from omnia_sdk.workflow.tools.channels._context import (
+    ResponseCollector,
+    add_response,
+    get_response_collector,
+    get_responses,
+    reset_response_collector,
+    reset_responses,
+    set_response_collector,
+)
+from omnia_sdk.workflow.tools.channels.omni_channels import BODY, CHANNEL, HTTP
+
+
+def test_collector_should_be_bounded_and_yield_responses_until_closed():
+    collector = ResponseCollector(max_responses=2)
+
+    assert collector.add({"n": 1}) and collector.add({"n": 2})
+    assert not collector.add({"n": 3})
+    threading.Timer(0.01, collector.close).start()
+
+    assert list(collector) == [{"n": 1}, {"n": 2}]
+    assert collector.dropped == 1
+
+
+def test_responses_should_not_be_shared_between_contexts():
+    token = set_response_collector(ResponseCollector())
+    try:
+        other = threading.Thread(target=add_response, args=({TEXT: "other request"},))
+        other.start()
+        other.join()
+
+        assert get_responses() == []
+        reset_responses()
+        add_response({TEXT: "mine"})
+        assert get_responses() == [{TEXT: "mine"}]
+    finally:
+        reset_response_collector(token)
+
+
+class GreetingChatbot(ChatbotFlow):
+
+    def greet(self, state: State, config: dict):
+        self.send_response(content={BODY: {TYPE: TEXT.upper(), TEXT: "Hello"}}, state=state, config=config)
+
+    def _nodes(self):
+        self.add_node("greet", self.greet)
+        self.create_entry_point(start_node="greet")
+
+    def _transitions(self):
+        self.add_edge("greet", END)
+
+
+def test_run_should_collect_responses_of_each_turn_for_the_caller():
+    chatbot = GreetingChatbot(configuration=ChatbotConfiguration(default_language="en"))
+    cfg = {CONFIGURABLE: {THREAD_ID: "collect", CHANNEL: HTTP}}
+    message = Message(role=USER, content={TYPE: TEXT.upper(), TEXT: "Hi"})
+
+    def run_turns() -> list[list[dict]]:
+        # runtime reads responses after every turn, without setting a collector
+        responses = []
+        for _ in range(2):
+            chatbot.run(message=message, config=cfg)
+            responses.append(get_responses())
+        return responses
+
+    hello = {BODY: {TYPE: TEXT.upper(), TEXT: "Hello"}}
+    collector = get_response_collector()
+    assert copy_context().run(run_turns) == [[hello], [hello]]
+    assert get_response_collector() is collector
+
+
+class StreamingChatbot(ChatbotFlow):
+    slow_node_started: asyncio.Event
+
+    async def greet(self, state: State, config: dict):
+        await self.asend_response(content={BODY: {TYPE: TEXT.upper(), TEXT: "Hello"}}, state=state, config=config)
+
+    async def slow(self, state: State, config: dict):
+        self.slow_node_started.set()
+        await asyncio.sleep(0.01)
+        if config[CONFIGURABLE].get("fail"):
+            raise RuntimeError("slow node failed")
+        await self.asend_response(content={BODY: {TYPE: TEXT.upper(), TEXT: "Done"}}, state=state, config=config)
+
+    def _nodes(self):
+        self.add_node("greet", self.greet)
+        self.add_node("slow", self.slow)
+        self.create_entry_point(start_node="greet")
+
+    def _transitions(self):
+        self.add_edge("greet", "slow")
+        self.add_edge("slow", END)
+
+
+def test_responses_should_be_streamed_before_the_graph_finishes():
+    chatbot = StreamingChatbot(configuration=ChatbotConfiguration(default_language="en"))
+    message = Message(role=USER, content={TYPE: TEXT.upper(), TEXT: "Hi"})
+
+    async def stream(thread_id: str, **configurable) -> list[tuple[str, bool]]:
+        chatbot.slow_node_started = asyncio.Event()
+        cfg = {CONFIGURABLE: {THREAD_ID: thread_id, CHANNEL: HTTP, **configurable}}
+        return [(response[BODY][TEXT], chatbot.slow_node_started.is_set())
+                async for response in chatbot.astream_responses(message=message, config=cfg)]
+
+    assert asyncio.run(stream("stream")) == [("Hello", False), ("Done", True)]
+    with pytest.raises(RuntimeError):
+        asyncio.run(stream("failed", fail=True))
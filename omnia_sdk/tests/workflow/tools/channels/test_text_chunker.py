@@ -0,0 +1,21 @@
+from omnia_sdk.workflow.tools.channels.text_chunker import TextChunker
+
+
+def _chunks(tokens: list[str], chunker: TextChunker) -> list[str]:
+    chunks = [chunk for token in tokens for chunk in chunker.feed(token)]
+    rest = chunker.flush()
+    return chunks + [rest] if rest else chunks
+
+
+def test_chunks_should_end_at_sentence_boundaries_after_min_chars():
+    tokens = ["Hi", " there.", " Your order", " has shipped!", " It arrives", " tomorrow", " at noon."]
+    chunker = TextChunker(min_chars=10, max_chars=100)
+
+    assert _chunks(tokens, chunker) == ["Hi there. Your order has shipped!", "It arrives tomorrow at noon."]
+    assert chunker.text == "".join(tokens)
+
+
+def test_chunks_without_sentence_boundary_should_be_split_at_whitespace():
+    chunker = TextChunker(min_chars=5, max_chars=12)
+
+    assert _chunks(["aaaa bbbb cccc dddd", " eeee"], chunker) == ["aaaa bbbb", "cccc dddd", "eeee"]
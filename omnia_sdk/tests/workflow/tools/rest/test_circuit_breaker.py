@@ -0,0 +1,89 @@
+import asyncio
+from unittest.mock import Mock, patch
+
+import pytest
+from requests import Response
+
+from omnia_sdk.workflow.tools.rest.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreakerConfig,
+    configure_circuit_breakers,
+    get_circuit_breaker,
+    get_circuit_states,
+)
+from omnia_sdk.workflow.tools.rest.exceptions import ApplicationError, CircuitOpenError, UserRequestError
+from omnia_sdk.workflow.tools.rest.retry_policy import RetryPolicy
+from omnia_sdk.workflow.tools.rest.retryable_http_client import retryable_request, retryable_request_async
+
+url = "https://api.example.com/2/query"
+
+
+def _response(status_code: int):
+    mock = Mock(spec=Response)
+    mock.status_code = status_code
+    mock.headers = {}
+    mock.text = str(status_code)
+    mock.json.return_value = {"status": status_code}
+    return mock
+
+
+@pytest.fixture(autouse=True)
+def breakers():
+    configure_circuit_breakers(CircuitBreakerConfig(failure_threshold=3, reset_timeout_seconds=30))
+    yield
+    configure_circuit_breakers(CircuitBreakerConfig())
+
+
+@patch("time.sleep", return_value=None)
+def test_open_circuit_should_fail_fast_without_calling_endpoint(_):
+    mock_post = Mock(side_effect=[Exception("timeout"), _response(503), _response(500)])
+
+    with pytest.raises(ApplicationError):
+        retryable_request(config={}, x=mock_post, url=url)
+    assert get_circuit_states()[url] == OPEN
+
+    with pytest.raises(CircuitOpenError) as exception:
+        retryable_request(config={}, x=mock_post, url=f"{url}?page=2")
+    assert exception.value.code == 503
+    assert mock_post.call_count == 3
+    # other paths of the same host are not affected
+    assert get_circuit_breaker("https://api.example.com/people/2/persons").allow()
+
+
+@patch("time.sleep", return_value=None)
+def test_half_open_circuit_should_close_after_successful_trial(_):
+    breaker = get_circuit_breaker(url)
+    for _ in range(3):
+        breaker.record_failure()
+
+    with patch("time.monotonic", return_value=breaker._opened_at + 31):
+        assert breaker.allow()
+        assert breaker.state == HALF_OPEN
+        # single trial request is in flight, others keep failing fast
+        assert not breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == OPEN
+
+    with patch("time.monotonic", return_value=breaker._opened_at + 31):
+        # client errors mean that endpoint is up again
+        with pytest.raises(UserRequestError):
+            retryable_request(config={}, x=Mock(return_value=_response(404)), url=url, retry_policy=RetryPolicy(max_attempts=1))
+    assert breaker.state == CLOSED
+
+
+def test_cancelled_requests_should_not_open_circuit():
+    async def hanging_post(**_):
+        await asyncio.sleep(10)
+
+    async def cancel_requests():
+        for _ in range(5):
+            request = asyncio.create_task(retryable_request_async(config={}, x=hanging_post, url=url))
+            await asyncio.sleep(0)
+            request.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await request
+
+    asyncio.run(cancel_requests())
+    assert get_circuit_states()[url] == CLOSED
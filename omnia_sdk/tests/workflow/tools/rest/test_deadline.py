@@ -0,0 +1,108 @@
+from unittest.mock import Mock, patch
+
+import pytest
+from langgraph.constants import END
+from requests import Response
+
+from omnia_sdk.workflow.chatbot.chatbot_configuration import ChatbotConfiguration
+from omnia_sdk.workflow.chatbot.chatbot_state import Message
+from omnia_sdk.workflow.chatbot.constants import CONFIGURABLE, THREAD_ID, TURN_BUDGET_MS, USER
+from omnia_sdk.workflow.langgraph.chatbot.chatbot_graph import ChatbotFlow
+from omnia_sdk.workflow.tools.rest.deadline import get_remaining_seconds, reset_turn_deadline, set_turn_deadline
+from omnia_sdk.workflow.tools.rest.exceptions import ApplicationError, DeadlineExceededError
+from omnia_sdk.workflow.tools.rest.retry_policy import RetryPolicy
+from omnia_sdk.workflow.tools.rest.retryable_http_client import retryable_request
+
+"""
+This module tests that outbound requests are bound by the latency budget of the conversation turn.
+"""
+
+
+def _response(status_code: int):
+    mock = Mock(spec=Response)
+    mock.status_code = status_code
+    mock.headers = {}
+    mock.text = str(status_code)
+    mock.json.return_value = {"status": status_code}
+    return mock
+
+
+def test_request_timeout_should_be_shrunk_to_remaining_budget():
+    mock_get = Mock(return_value=_response(200))
+    token = set_turn_deadline(2.0)
+    try:
+        retryable_request(config={}, x=mock_get, timeout=(1, 30))
+    finally:
+        reset_turn_deadline(token)
+
+    connect_timeout, read_timeout = mock_get.call_args.kwargs["timeout"]
+    assert connect_timeout == 1
+    assert 1.5 < read_timeout <= 2.0
+
+
+@patch("random.uniform", return_value=5.0)
+@patch("time.sleep", return_value=None)
+def test_retry_which_can_not_finish_in_time_should_be_skipped(mock_sleep, _):
+    mock_get = Mock(return_value=_response(503))
+    token = set_turn_deadline(0.5)
+    try:
+        with pytest.raises(DeadlineExceededError) as exception:
+            retryable_request(config={}, x=mock_get, retry_policy=RetryPolicy(base_delay=5.0, max_delay=5.0))
+    finally:
+        reset_turn_deadline(token)
+
+    assert isinstance(exception.value, ApplicationError)
+    assert exception.value.code == 504
+    assert len(exception.value.trace) == 1
+    mock_sleep.assert_not_called()
+
+
+def test_exhausted_budget_should_fail_before_request_unless_request_is_unbound():
+    mock_post = Mock(return_value=_response(200))
+    token = set_turn_deadline(0)
+    try:
+        with pytest.raises(DeadlineExceededError):
+            retryable_request(config={}, x=mock_post)
+        assert retryable_request(config={}, x=mock_post, bound_by_deadline=False, timeout=5) == {"status": 200}
+    finally:
+        reset_turn_deadline(token)
+
+    assert mock_post.call_args.kwargs["timeout"] == 5
+
+
+def test_later_deadline_should_not_extend_earlier_one():
+    outer = set_turn_deadline(1.0)
+    inner = set_turn_deadline(60.0)
+    assert get_remaining_seconds() <= 1.0
+    reset_turn_deadline(inner)
+    reset_turn_deadline(outer)
+    assert get_remaining_seconds() is None
+
+
+class BudgetChatbot(ChatbotFlow):
+
+    def __init__(self, turn_budget_ms: int | None):
+        super().__init__(configuration=ChatbotConfiguration(default_language="en", turn_budget_ms=turn_budget_ms))
+        self.remaining = []
+
+    def record(self):
+        self.remaining.append(get_remaining_seconds())
+
+    def _nodes(self):
+        self.add_node("record", self.record)
+        self.create_entry_point(start_node="record")
+
+    def _transitions(self):
+        self.add_edge("record", END)
+
+
+def test_turn_budget_should_be_visible_to_nodes_and_overridable_by_config():
+    chatbot = BudgetChatbot(turn_budget_ms=2000)
+    chatbot.run(message=Message.get_message(role=USER, text="Hi"), config={CONFIGURABLE: {THREAD_ID: "1"}})
+    chatbot.run(message=Message.get_message(role=USER, text="Hi"), config={CONFIGURABLE: {THREAD_ID: "2", TURN_BUDGET_MS: 500}})
+
+    assert 1.5 < chatbot.remaining[0] <= 2.0
+    assert 0 < chatbot.remaining[1] <= 0.5
+    assert get_remaining_seconds() is None
+    with pytest.raises(ValueError):
+        ChatbotConfiguration(default_language="en", turn_budget_ms=0)
@@ -0,0 +1,62 @@
+from unittest.mock import Mock, patch
+
+import pytest
+from requests import Response
+
+from omnia_sdk.workflow.tools.rest.exceptions import UserRequestError
+from omnia_sdk.workflow.tools.rest.http_metrics import HttpCallMetrics, HttpMetricsAggregator, set_http_metrics_hook
+from omnia_sdk.workflow.tools.rest.retryable_http_client import retryable_request
+
+url = "https://api.example.com/2/query"
+
+
+def _response(status_code: int, content: bytes = b'{"message": "Hi"}'):
+    mock = Mock(spec=Response)
+    mock.status_code = status_code
+    mock.headers = {}
+    mock.text = content.decode()
+    mock.content = content
+    mock.json.return_value = {"message": "Hi"}
+    return mock
+
+
+@pytest.fixture
+def metrics():
+    aggregator = HttpMetricsAggregator()
+    set_http_metrics_hook(aggregator)
+    yield aggregator
+    set_http_metrics_hook(None)
+
+
+@patch("random.uniform", return_value=0.5)
+@patch("time.sleep", return_value=None)
+def test_retried_request_should_be_recorded_once_with_attempts_and_backoff(_, __, metrics):
+    post = Mock(side_effect=[_response(502, b"bad gateway"), _response(200)], __name__="post")
+    retryable_request(config={}, x=post, url=f"{url}?lang=en", json={"message": "Hi"})
+    with pytest.raises(UserRequestError):
+        retryable_request(config={}, x=Mock(return_value=_response(404, b"{}"), __name__="post"), url=url)
+
+    summary = metrics.summary()[url]
+    assert summary["calls"] == 2
+    assert summary["errors"] == 1
+    assert summary["attempts"] == 3
+    assert summary["backoff_seconds"] == 0.5
+    assert summary["status_codes"] == {"200": 1, "404": 1}
+    assert summary["request_bytes"] == len(b'{"message":"Hi"}')
+    assert summary["response_bytes"] == len(b"bad gateway") + len(b'{"message": "Hi"}') + 2
+
+
+def test_percentiles_and_prometheus_export_should_use_latency_histogram():
+    metrics = HttpMetricsAggregator(buckets=(0.1, 1.0))
+    for latency in (0.05, 0.05, 0.5, 2.0):
+        metrics(HttpCallMetrics(endpoint='a"b', method="POST", latency_seconds=latency, attempts=1, status_code=200,
+                                request_bytes=1, response_bytes=2, backoff_seconds=0.0))
+
+    summary = metrics.summary()['a"b']
+    assert summary["p50_seconds"] == pytest.approx(0.1)
+    assert summary["p99_seconds"] <= 2.0
+    exported = metrics.to_prometheus()
+    assert 'omnia_http_call_duration_seconds_bucket{endpoint="a\\"b",le="1.0"} 3' in exported
+    assert 'omnia_http_call_duration_seconds_bucket{endpoint="a\\"b",le="+Inf"} 4' in exported
+    assert 'omnia_http_calls_total{endpoint="a\\"b",status="200"} 4' in exported
+    assert 'omnia_http_response_bytes_total{endpoint="a\\"b"} 8' in exported
@@ -0,0 +1,74 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from omnia_sdk.workflow.tools.rest import http_sessions
+from omnia_sdk.workflow.tools.rest.http_sessions import HttpPoolConfig, configure_http_pools, get_session
+from omnia_sdk.workflow.tools.rest.retryable_http_client import retryable_request, retryable_request_async
+
+"""
+This module tests that shared HTTP sessions reuse connections per host and do not store cookies.
+"""
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = f'{{"client_port": {self.client_address[1]}, "cookie": "{self.headers.get("Cookie", "")}"}}'.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Set-Cookie", "session=secret")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    http_sessions.close_http_sessions()
+
+
+def test_requests_to_the_same_host_should_reuse_connection(server_url):
+    responses = [retryable_request(config={}, x=http_sessions.post, url=f"{server_url}/messages", json={}) for _ in range(3)]
+
+    assert len({response["client_port"] for response in responses}) == 1
+    assert all(response["cookie"] == "" for response in responses)
+    assert get_session(f"{server_url}/other") is get_session(server_url)
+
+
+def test_async_requests_in_the_same_event_loop_should_reuse_connection(server_url):
+    async def send_requests():
+        responses = [
+            await retryable_request_async(config={}, x=http_sessions.post_async, url=f"{server_url}/messages", json={}) for _ in range(3)
+        ]
+        client = http_sessions.get_async_client()
+        await http_sessions.close_async_client()
+        return responses, client
+
+    responses, client = asyncio.run(send_requests())
+
+    assert len({response["client_port"] for response in responses}) == 1
+    assert all(response["cookie"] == "" for response in responses)
+    assert client.is_closed
+
+
+def test_configure_http_pools_should_recreate_sessions(server_url):
+    session = get_session(server_url)
+    configure_http_pools(HttpPoolConfig(pool_connections=1, pool_maxsize=2))
+
+    assert get_session(server_url) is not session
+    with pytest.raises(ValueError):
+        HttpPoolConfig(pool_maxsize=0)
+    configure_http_pools(HttpPoolConfig())
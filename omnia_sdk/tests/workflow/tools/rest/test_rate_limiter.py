@@ -0,0 +1,114 @@
+import asyncio
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from omnia_sdk.workflow.tools.channels.config import INFOBIP_BASE_URL
+from omnia_sdk.workflow.tools.rest.deadline import reset_turn_deadline, set_turn_deadline
+from omnia_sdk.workflow.tools.rest.exceptions import DeadlineExceededError
+from omnia_sdk.workflow.tools.rest.rate_limiter import (
+    PEOPLE,
+    AdaptiveConcurrencyLimiter,
+    ApiLimiter,
+    ApiLimits,
+    TokenBucket,
+    configure_api_limits,
+    get_api_limiter,
+    get_api_limiter_by_family,
+    is_overloaded,
+)
+from omnia_sdk.workflow.tools.rest.retryable_http_client import retryable_request_async
+
+
+def test_token_bucket_should_allow_burst_then_refill_at_rate():
+    with patch("time.monotonic", return_value=100.0):
+        bucket = TokenBucket(rate_per_second=10, burst=2)
+        waits = [bucket.reserve() for _ in range(4)]
+
+    assert waits == [0.0, 0.0, pytest.approx(0.1), pytest.approx(0.2)]
+    with patch("time.monotonic", return_value=101.0):
+        assert bucket.reserve() == 0.0
+
+
+def test_concurrency_limit_should_increase_additively_and_decrease_multiplicatively():
+    limiter = AdaptiveConcurrencyLimiter(ApiLimits(max_concurrency=8, initial_concurrency=4, decrease_interval_seconds=60))
+    for _ in range(8):
+        assert limiter.acquire(timeout=0)
+        limiter.release(overloaded=False)
+    assert 5 < limiter.limit < 6
+
+    for _ in range(3):
+        assert limiter.acquire(timeout=0)
+        limiter.release(overloaded=True)
+    # requests failing together decrease the limit once
+    assert 2.5 < limiter.limit < 3
+    assert [is_overloaded(status) for status in (200, 404, 429, 503, None)] == [False, None, True, True, True]
+
+
+def test_released_permit_should_be_handed_over_to_waiting_thread_and_coroutine():
+    limiter = AdaptiveConcurrencyLimiter(ApiLimits(max_concurrency=1))
+    assert limiter.acquire(timeout=0)
+    assert not limiter.acquire(timeout=0.01)
+
+    acquired = []
+    thread = threading.Thread(target=lambda: acquired.append(limiter.acquire(timeout=5)))
+    thread.start()
+    for _ in range(5000):
+        if limiter._waiters:
+            break
+        threading.Event().wait(0.001)
+    limiter.release(overloaded=None)
+    thread.join()
+    assert acquired == [True]
+    assert limiter.in_flight == 1
+
+    async def wait_for_permit():
+        task = asyncio.create_task(limiter.acquire_async(timeout=5))
+        await asyncio.sleep(0.01)
+        threading.Thread(target=limiter.release, kwargs={"overloaded": None}).start()
+        return await task
+
+    assert asyncio.run(wait_for_permit())
+    assert limiter.in_flight == 1
+
+
+def test_rate_limit_wait_beyond_deadline_should_raise():
+    limiter = ApiLimiter(PEOPLE, ApiLimits(rate_per_second=1, burst=1))
+    limiter.acquire()
+    token = set_turn_deadline(0.5)
+    try:
+        with pytest.raises(DeadlineExceededError):
+            limiter.acquire()
+    finally:
+        reset_turn_deadline(token)
+    assert limiter.bucket.reserve() > 0.5
+
+
+def test_api_family_should_be_resolved_from_url():
+    assert get_api_limiter(f"{INFOBIP_BASE_URL}/people/2/persons").family == PEOPLE
+    assert get_api_limiter("https://example.com/callback") is None
+
+
+def test_cancelled_request_should_not_decrease_concurrency_limit():
+    previous = get_api_limiter_by_family(PEOPLE).limits
+    configure_api_limits(PEOPLE, ApiLimits(max_concurrency=8, initial_concurrency=4))
+
+    async def hanging_post(**_):
+        await asyncio.sleep(10)
+
+    async def cancel_request():
+        request = asyncio.create_task(retryable_request_async(config={}, x=hanging_post, url=f"{INFOBIP_BASE_URL}/people/2/persons"))
+        # request is cancelled while waiting for the response
+        await asyncio.sleep(0.01)
+        request.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await request
+
+    try:
+        asyncio.run(cancel_request())
+        concurrency = get_api_limiter_by_family(PEOPLE).concurrency
+        assert concurrency.limit == 4
+        assert concurrency.in_flight == 0
+    finally:
+        configure_api_limits(PEOPLE, previous)
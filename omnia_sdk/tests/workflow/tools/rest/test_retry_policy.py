@@ -0,0 +1,68 @@
+from unittest.mock import Mock, patch
+
+import pytest
+from requests import Response
+
+from omnia_sdk.workflow.tools.rest.exceptions import ApplicationError, UserRequestError
+from omnia_sdk.workflow.tools.rest.retry_policy import RetryPolicy, get_retry_policy, set_retry_policy
+from omnia_sdk.workflow.tools.rest.retryable_http_client import retryable_request
+
+
+def _response(status_code: int, headers: dict = None):
+    mock = Mock(spec=Response)
+    mock.status_code = status_code
+    mock.headers = headers or {}
+    mock.text = str(status_code)
+    mock.json.return_value = {"status": status_code}
+    return mock
+
+
+def test_backoff_should_be_jittered_and_capped():
+    policy = RetryPolicy(base_delay=1.0, max_delay=5.0)
+
+    with patch("random.uniform", side_effect=lambda low, high: high) as uniform:
+        assert [policy.backoff(attempt) for attempt in range(1, 6)] == [1.0, 2.0, 4.0, 5.0, 5.0]
+    assert all(call.args[0] == 0 for call in uniform.call_args_list)
+
+
+def test_retry_after_should_define_delay():
+    policy = RetryPolicy(max_retry_after=10)
+
+    assert policy.delay(attempt=1, response=_response(429, {"Retry-After": "3"})) == 3.0
+    assert policy.delay(attempt=1, response=_response(503, {"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})) == 0.0
+    assert policy.delay(attempt=1, response=_response(429, {"Retry-After": "120"})) is None
+
+
+@patch("time.sleep", return_value=None)
+def test_throttled_request_should_be_retried_after_retry_after(mock_sleep):
+    mock_post = Mock(side_effect=[_response(429, {"Retry-After": "2"}), _response(200)])
+
+    assert retryable_request(config={}, x=mock_post) == {"status": 200}
+    mock_sleep.assert_called_once_with(2.0)
+
+
+@patch("time.sleep", return_value=None)
+def test_statuses_outside_policy_should_not_be_retried(mock_sleep):
+    fast_fail = RetryPolicy(retry_statuses=frozenset({503}))
+
+    with pytest.raises(UserRequestError):
+        retryable_request(config={}, x=Mock(return_value=_response(429)), retry_policy=fast_fail)
+    with pytest.raises(ApplicationError) as exception:
+        retryable_request(config={}, x=Mock(return_value=_response(500)), retry_policy=fast_fail)
+    assert exception.value.code == 500
+    mock_sleep.assert_not_called()
+
+
+@patch("time.sleep", return_value=None)
+def test_endpoint_policy_should_override_default(mock_sleep):
+    set_retry_policy(url_prefix="https://example.com/slow", policy=RetryPolicy(max_attempts=5))
+    try:
+        assert get_retry_policy("https://example.com/slow/endpoint").max_attempts == 5
+        mock_post = Mock(return_value=_response(502))
+        with pytest.raises(ApplicationError) as exception:
+            retryable_request(config={}, x=mock_post, url="https://example.com/slow/endpoint")
+        assert mock_post.call_count == 5
+        assert len(exception.value.trace) == 5
+    finally:
+        set_retry_policy(url_prefix="https://example.com/slow", policy=None)
+    assert get_retry_policy("https://example.com/slow/endpoint") == get_retry_policy(None)
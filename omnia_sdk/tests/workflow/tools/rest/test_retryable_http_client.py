@@ -1,10 +1,11 @@
-from unittest.mock import Mock, patch
+import asyncio
+from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
 from requests import Response
 
 from omnia_sdk.workflow.tools.rest.exceptions import ApplicationError, UserRequestError
-from omnia_sdk.workflow.tools.rest.retryable_http_client import retryable_request
+from omnia_sdk.workflow.tools.rest.retryable_http_client import retryable_request, retryable_request_async
 
 test_config = {}
 body = b"hello world"
@@ -74,4 +75,24 @@ def test_raises_application_error_after_all_retries(mock_sleep):
 
     assert exception.value.code == 500
     assert len(exception.value.trace) == 3
-    assert mock_sleep.call_count == 3
+    assert exception.value.trace[-1]["status_code"] == 500
+    # there is no backoff after the last attempt
+    assert mock_sleep.call_count == 2
+
+
+@patch("asyncio.sleep", new_callable=AsyncMock)
+def test_async_request_retries_without_blocking_then_succeeds(mock_sleep):
+    mock_post = AsyncMock(side_effect=[Exception("timeout"), mock_post_500(), mock_post_success()])
+
+    result = asyncio.run(retryable_request_async(config=test_config, x=mock_post))
+
+    assert result == {"response": string_body}
+    assert mock_post.call_count == 3
+    assert mock_sleep.await_count == 2
+
+
+def test_async_request_raises_user_request_error_on_404():
+    with pytest.raises(UserRequestError) as exception:
+        asyncio.run(retryable_request_async(config=test_config, x=AsyncMock(return_value=mock_post_404())))
+
+    assert exception.value.code == 404
@@ -0,0 +1,109 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock
+
+import pytest
+from requests import Response
+
+from omnia_sdk.workflow.tools.rest.exceptions import UserRequestError
+from omnia_sdk.workflow.tools.rest.single_flight import (
+    get_single_flight_stats,
+    request_key,
+    single_flight_request,
+    single_flight_request_async,
+)
+
+url = "https://api.example.com/people/2/custom/persons/find"
+
+
+def _response(status_code: int = 200):
+    mock = Mock(spec=Response)
+    mock.status_code = status_code
+    mock.headers = {}
+    mock.text = str(status_code)
+    mock.json.return_value = {"profile": {"name": "John"}}
+    return mock
+
+
+def test_request_key_should_ignore_session_headers_and_body_order():
+    first = request_key(Mock(__name__="post"), {"url": url, "json": {"a": 1, "b": 2}, "headers": {"X-Ib-Omnia-Session-Id": "1"}})
+    second = request_key(Mock(__name__="post"), {"url": url, "json": {"b": 2, "a": 1}, "headers": {"x-ib-omnia-session-id": "2"}})
+    other = request_key(Mock(__name__="post"), {"url": url, "json": {"a": 1, "b": 3}})
+
+    assert first == second
+    assert first != other
+
+
+def test_concurrent_identical_requests_should_share_one_call():
+    release = threading.Event()
+    calls = []
+
+    def post(**kwargs):
+        calls.append(kwargs)
+        release.wait(timeout=5)
+        return _response()
+
+    stats = get_single_flight_stats()
+    deduplicated = stats.deduplicated
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(single_flight_request, {}, post, url=url, json={"identifier": "1"}) for _ in range(4)]
+        for _ in range(500):
+            if stats.deduplicated - deduplicated == 3:
+                break
+            threading.Event().wait(0.01)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert len(calls) == 1
+    assert all(result == {"profile": {"name": "John"}} for result in results)
+    # waiters receive copies, modifying one result does not affect others
+    results[1]["profile"]["name"] = "Jane"
+    assert results[2]["profile"]["name"] == "John"
+
+
+def test_concurrent_identical_coroutines_should_share_one_call_and_error():
+    calls = []
+
+    async def post(**kwargs):
+        calls.append(kwargs)
+        await asyncio.sleep(0.01)
+        return _response(404)
+
+    async def run():
+        return await asyncio.gather(
+            *[single_flight_request_async({}, post, url=url, json={"identifier": "1"}) for _ in range(3)], return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+
+    assert len(calls) == 1
+    assert all(isinstance(result, UserRequestError) for result in results)
+    with pytest.raises(UserRequestError):
+        asyncio.run(single_flight_request_async({}, post, url=url))
+    assert len(calls) == 2
+
+
+def test_waiters_should_take_over_request_of_cancelled_coroutine():
+    calls = []
+
+    async def post(**kwargs):
+        calls.append(kwargs)
+        await asyncio.sleep(0.05)
+        return _response()
+
+    async def run():
+        leader = asyncio.create_task(single_flight_request_async({}, post, url=url, json={"identifier": "2"}))
+        await asyncio.sleep(0)
+        waiters = [asyncio.create_task(single_flight_request_async({}, post, url=url, json={"identifier": "2"})) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await asyncio.gather(*waiters)
+
+    results = asyncio.run(run())
+
+    assert results == [{"profile": {"name": "John"}}] * 2
+    # one of the waiters executed the request again for both of them
+    assert len(calls) == 2
@@ -0,0 +1,75 @@
+import random
+from unittest.mock import patch
+
+import pytest
+from starlette.testclient import TestClient
+
+from omnia_sdk.workflow.tools.rest.exceptions import ApplicationError
+from omnia_sdk.workflow.tools.rest.retry_policy import RetryPolicy, set_retry_policy
+from omnia_sdk.workflow.tools.rest.retryable_http_client import retryable_request
+from omnia_sdk.workflow.tools.testing.fake_infobip import (
+    INTENT,
+    MESSAGES,
+    EndpointBehavior,
+    FakeInfobip,
+    FakeInfobipConfig,
+    LatencyProfile,
+)
+
+config = {"configurable": {"thread_id": "1"}}
+
+
+def test_latency_profile_should_sample_within_bounds():
+    rng = random.Random(1)
+    lognormal = LatencyProfile(distribution="lognormal", median_ms=100, sigma=1.0, max_ms=500)
+
+    samples = [lognormal.sample(rng) for _ in range(1000)]
+
+    assert all(0 <= sample <= 0.5 for sample in samples)
+    assert 0.05 < sorted(samples)[500] < 0.2
+    assert LatencyProfile(median_ms=20).sample(rng) == 0.02
+    with pytest.raises(ValueError):
+        LatencyProfile(distribution="pareto")
+
+
+def test_fake_infobip_should_serve_messages_and_llm_endpoints():
+    fake = FakeInfobip(FakeInfobipConfig(llm_response="Hello!"))
+    client = TestClient(fake.app(), base_url="http://fake")
+
+    messages = client.post("/messages-api/1/messages", json={"messages": [{"channel": "SMS", "destinations": [{"to": "385"}]}]})
+    intent = client.post("/gpt-creator/omnia/2/intent", json={"prompt": "", "intents": ["greeting", "goodbye"]})
+    completion = client.post("/gpt-creator/omnia/openai/v1/chat/completions", json={"model": "gpt", "messages": [{"content": "Hi"}]})
+    gemini = client.post("/gpt-creator/omnia/google/v1/models/gemini:generateContent", json={"contents": []})
+
+    assert len(messages.json()["messages"]) == 1
+    assert intent.json() == {"response": "greeting"}
+    assert completion.json()["choices"][0]["message"]["content"] == "Hello!"
+    assert gemini.json()["candidates"][0]["content"]["parts"][0]["text"] == "Hello!"
+    assert fake.request_count(MESSAGES) == 1 and fake.request_count(INTENT) == 1
+
+
+def test_fake_infobip_should_store_people_profiles():
+    client = TestClient(FakeInfobip().app(), base_url="http://fake")
+
+    client.post("/people/2/persons", json={"contactInformation": {"phone": [{"number": "385"}]}, "customAttributes": {"tier": "gold"}})
+    found = client.post("/people/2/custom/persons/find", json={"type": "PHONE", "identifier": "385"})
+    client.delete("/people/2/persons/", params={"type": "PHONE", "identifier": "385"})
+    deleted = client.post("/people/2/custom/persons/find", json={"type": "PHONE", "identifier": "385"})
+
+    assert found.json()["customAttributes"] == {"tier": "gold"}
+    assert deleted.json()["customAttributes"] == {}
+
+
+@patch("time.sleep", return_value=None)
+def test_retryable_request_should_retry_injected_errors(_):
+    behavior = EndpointBehavior(error_rate=1.0, error_status=503)
+    fake = FakeInfobip(FakeInfobipConfig(endpoints={MESSAGES: behavior}))
+    client = TestClient(fake.app(), base_url="http://fake")
+    set_retry_policy(url_prefix="http://fake", policy=RetryPolicy(max_attempts=3))
+    try:
+        with pytest.raises(ApplicationError):
+            retryable_request(config, client.post, url="http://fake/messages-api/1/messages", json={"messages": []})
+    finally:
+        set_retry_policy(url_prefix="http://fake", policy=None)
+
+    assert fake.requests[MESSAGES] == {503: 3}
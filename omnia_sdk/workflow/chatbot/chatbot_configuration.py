@@ -1,7 +1,17 @@
 import dataclasses
 
 import yaml
-from omnia_sdk.workflow.chatbot.constants import LLM_DETECTOR, RECURSION_LIMIT
+from omnia_sdk.workflow.chatbot.constants import (
+    BATCH_OUTBOUND,
+    COALESCING_WINDOW_MS,
+    DEFAULT_HISTORY_ARCHIVE,
+    ENQUEUE,
+    HISTORY_RETENTION,
+    LLM_DETECTOR,
+    RECURSION_LIMIT,
+    ROLLBACK,
+    TURN_BUDGET_MS,
+)
 """
 This configuration lets user control automatic runtime environment features:
  - language detection and localisation (optional)
@@ -31,8 +41,41 @@ Available model list will be made public at a later date.
 Parameter:
  - concurrent_session
 is used to resolve situations when a user sends second message while the first one is still being processed.
-Currently supported strategy is to wait for the first message to finish before executing the second one.
-We will add platform support for "rollback" strategy soon which will merge two messages and execute them together.
+Supported strategies are:
+ - "enqueue": wait for the first message to finish before executing the second one
+ - "rollback": messages sent within coalescing_window_ms are merged and executed together. If user sends another message
+   while the graph is executing and no response was delivered yet, the execution is cancelled, state is rolled back and
+   the messages are executed together.
+Platform runtime enforces "enqueue" strategy, for local and self-hosted runs use dispatchers in session_dispatcher.py.
+We will add platform support for "rollback" strategy soon.
+###
+
+###
+Parameter:
+ - history_retention
+bounds conversation history kept in the checkpointed state. Every message is checkpointed after every node, so without limits
+checkpoint size and serialization time grow for the whole life of a long session.
+When any limit is exceeded, the oldest conversation cycles are moved to the history archive (see history_archive.py) and
+ChatbotFlow.summarize_history hook may compact them into a summary. Current conversation cycle is never compacted.
+Default archive keeps a bounded number of cycles in memory and does not persist them, register persistent archive for
+production runs.
+###
+
+###
+Parameter:
+ - turn_budget_ms
+bounds latency of a conversation turn. Outbound calls (retryable_request, LLM wrappers) shrink their timeouts to the remaining
+budget and skip retries which can not finish in time. When the budget is exhausted DeadlineExceededError is raised, which flow
+may catch to send a fallback message. Budget may be overridden per request with config["configurable"]["turn_budget_ms"].
+###
+
+###
+Parameter:
+ - batch_outbound
+buffers messages sent to Messages API channels during the turn and sends them in order with one multi-message request when
+the graph waits for user input or reaches the END node. Node which sends a greeting, an image and buttons makes one round trip
+instead of three. Long-running nodes may deliver buffered messages earlier with ChatbotFlow.flush.
+May be overridden per request with config["configurable"]["batch_outbound"].
 ###
 
 """
@@ -49,6 +92,21 @@ class LanguageDetectorConfig:
             raise ValueError("At least two languages must be provided")
 
 
+@dataclasses.dataclass
+class HistoryRetentionConfig:
+    max_cycles: int | None = None
+    max_messages: int | None = None
+    max_bytes: int | None = None
+    # name of the registered history archive, compacted cycles are discarded if None
+    archive: str | None = DEFAULT_HISTORY_ARCHIVE
+
+    def __post_init__(self):
+        if self.max_cycles is None and self.max_messages is None and self.max_bytes is None:
+            raise ValueError("At least one history retention limit must be provided")
+        if self.max_cycles is not None and self.max_cycles < 1:
+            raise ValueError("At least one conversation cycle must be retained")
+
+
 # TODO not yet supported, leaving as an idea for future
 @dataclasses.dataclass
 class SessionHooks:
@@ -60,8 +118,21 @@ class SessionHooks:
 class ChatbotConfiguration:
     default_language: str
     language_detector: LanguageDetectorConfig | None = None
-    concurrent_session: str = "enqueue"  # this is the only strategy supported for now, see the module docstring for details
+    concurrent_session: str = ENQUEUE  # see the module docstring for details
+    # used only with rollback strategy
+    coalescing_window_ms: int = 500
     recursion_limit: int | None = None
+    history_retention: HistoryRetentionConfig | None = None
+    turn_budget_ms: int | None = None
+    batch_outbound: bool = False
+
+    def __post_init__(self):
+        if self.concurrent_session not in (ENQUEUE, ROLLBACK):
+            raise ValueError(f"Unknown concurrent session strategy: {self.concurrent_session}")
+        if self.coalescing_window_ms < 0:
+            raise ValueError("Coalescing window can not be negative")
+        if self.turn_budget_ms is not None and self.turn_budget_ms <= 0:
+            raise ValueError("Turn budget must be positive")
 
     @staticmethod
     def from_yaml(path: str) -> "ChatbotConfiguration":
@@ -74,8 +145,12 @@ class ChatbotConfiguration:
         with open(path, encoding='utf-8') as f:
             data = yaml.safe_load(f)
         language_detector = ChatbotConfiguration._read_language_detector(data.get("language_detector"))
+        history_retention = ChatbotConfiguration._read_history_retention(data.get(HISTORY_RETENTION))
         return ChatbotConfiguration(default_language=data["default_language"], language_detector=language_detector,
-                                    concurrent_session=data.get("concurrent_session", "enqueue"), recursion_limit=data.get(RECURSION_LIMIT))
+                                    concurrent_session=data.get("concurrent_session", ENQUEUE), recursion_limit=data.get(RECURSION_LIMIT),
+                                    history_retention=history_retention,
+                                    coalescing_window_ms=data.get(COALESCING_WINDOW_MS, 500), turn_budget_ms=data.get(TURN_BUDGET_MS),
+                                    batch_outbound=data.get(BATCH_OUTBOUND, False))
 
     @staticmethod
     def _read_language_detector(lang_detector_data) -> LanguageDetectorConfig | None:
@@ -83,3 +158,9 @@ class ChatbotConfiguration:
             return None
         return LanguageDetectorConfig(expected_languages=set(lang_detector_data["expected_languages"]),
                                       model=lang_detector_data.get("model", LLM_DETECTOR))
+
+    @staticmethod
+    def _read_history_retention(history_retention_data) -> HistoryRetentionConfig | None:
+        if not history_retention_data:
+            return None
+        return HistoryRetentionConfig(**history_retention_data)
@@ -1,6 +1,6 @@
 import dataclasses
 
-from typing_extensions import TypedDict
+from typing_extensions import NotRequired, TypedDict
 
 from omnia_sdk.workflow.chatbot.constants import TYPE, TEXT, PAYLOAD, BUTTON_REPLY, LIST_REPLY
 """
@@ -8,33 +8,60 @@ This module contains dataclasses for chatbot state management.
 """
 
 
+# content value which could not be resolved at construction, text is then extracted on every get_text call
+_UNRESOLVED = object()
+
+
 @dataclasses.dataclass
 class Message:
     """
     Represents inbound or outbound message.
     Role should be one of: user, assistant, tool.
     Content corresponds to channel message format e.g. {"type": "TEXT", "text": "Hi"} TODO: add link to docs
+
+    Text is extracted once per assigned content, so content dict should not be modified in place.
+    Assign a new content dict instead, e.g. message.content = {**message.content, "text": "Hello"}.
     """
+    # _text and _text_source are not dataclass fields, they are not compared, printed or serialized
+    __slots__ = ("role", "content", "_text", "_text_source")
     role: str
     content: dict
 
+    def __post_init__(self):
+        self._resolve_text()
+
+    def _resolve_text(self):
+        self._text_source = self.content
+        try:
+            self._text = _extract_text(self.content)
+        # malformed content fails when get_text is called, not when message is created
+        except Exception:
+            self._text = _UNRESOLVED
+
     def get_text(self):
-        content = self.content
-        if "body" in content:
-            content = content["body"]
-        if content[TYPE] == TEXT.upper():
-            return content[TEXT]
-        if content[TYPE] == BUTTON_REPLY:
-            return content[PAYLOAD]
-        if content[TYPE] == LIST_REPLY:
-            return content[TEXT]
-        return None
+        if self._text_source is not self.content:
+            self._resolve_text()
+        if self._text is _UNRESOLVED:
+            return _extract_text(self.content)
+        return self._text
 
     @staticmethod
     def get_message(role: str, text: str) -> 'Message':
         return Message(role=role, content={TYPE: TEXT.upper(), TEXT: text})
 
 
+def _extract_text(content: dict):
+    if "body" in content:
+        content = content["body"]
+    if content[TYPE] == TEXT.upper():
+        return content[TEXT]
+    if content[TYPE] == BUTTON_REPLY:
+        return content[PAYLOAD]
+    if content[TYPE] == LIST_REPLY:
+        return content[TEXT]
+    return None
+
+
 # every time users completes a flow and comes back to <start> node, we create a new conversation cycle
 @dataclasses.dataclass
 class ConversationCycle:
@@ -42,8 +69,18 @@ class ConversationCycle:
     intent: str = None
 
 
+# reference to the oldest conversation cycles which were compacted out of the state, see history_archive.py
+@dataclasses.dataclass
+class ArchivedHistory:
+    session_id: str
+    archive: str | None = None
+    cycles: int = 0
+    summary: str | None = None
+
+
 # this is the main data model for chatbot state
 class ChatbotState(TypedDict):
     conversation_cycles: list[ConversationCycle]
     user_language: str
     variables: dict
+    archived_history: NotRequired[ArchivedHistory]
@@ -16,3 +16,10 @@ METADATA = "metadata"
 WORKFLOW_ID = "workflow_id"
 WORKFLOW_VERSION = "workflow_version"
 RECURSION_LIMIT = "recursion_limit"
+HISTORY_RETENTION = "history_retention"
+DEFAULT_HISTORY_ARCHIVE = "default"
+ENQUEUE = "enqueue"
+ROLLBACK = "rollback"
+COALESCING_WINDOW_MS = "coalescing_window_ms"
+TURN_BUDGET_MS = "turn_budget_ms"
+BATCH_OUTBOUND = "batch_outbound"
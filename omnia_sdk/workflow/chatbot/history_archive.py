@@ -0,0 +1,165 @@
+import json
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+from omnia_sdk.workflow.chatbot.chatbot_configuration import HistoryRetentionConfig
+from omnia_sdk.workflow.chatbot.chatbot_state import ArchivedHistory, ConversationCycle, Message
+from omnia_sdk.workflow.chatbot.constants import DEFAULT_HISTORY_ARCHIVE
+"""
+This module keeps conversation cycles compacted out of the checkpointed chatbot state.
+Checkpoint only holds ArchivedHistory reference, archived cycles are loaded lazily when all cycles are requested.
+
+Archives are registered by name so they can be referenced from chatbot_configuration.yaml, e.g.:
+    history_retention:
+      max_cycles: 20
+      archive: default
+User may register own archive (e.g. backed by database) with register_history_archive method.
+Default archive is InMemoryHistoryArchive, which is bounded and does not persist: archived cycles are lost on restart and
+the oldest cycles or least recently used sessions are dropped once its limits are reached. Register persistent archive under
+the "default" name for production runs.
+"""
+
+
+class HistoryArchive(ABC):
+    """
+    Side store for conversation cycles which were compacted out of the chatbot state.
+    """
+
+    @abstractmethod
+    def append(self, session_id: str, cycles: list[ConversationCycle], start: int) -> None:
+        """
+        Appends cycles to the archived history of the session, order of cycles must be preserved.
+        Archived cycles from the start position onwards are replaced. Turn which was rolled back (see "rollback" concurrent
+        session strategy) and executed again archives the same cycles at the same position, which must not duplicate them.
+
+        :param session_id: unique session identifier
+        :param cycles: oldest cycles removed from the state
+        :param start: position of the first cycle in the archived history of the session, i.e. number of cycles archived before
+        """
+        pass
+
+    @abstractmethod
+    def load(self, session_id: str) -> list[ConversationCycle]:
+        """
+        Returns all archived cycles of the session from the oldest to the newest.
+        :param session_id: unique session identifier
+        :return: archived cycles
+        """
+        pass
+
+    @abstractmethod
+    def delete(self, session_id: str) -> None:
+        """
+        Deletes archived history of the session.
+        :param session_id: unique session identifier
+        """
+        pass
+
+
+class InMemoryHistoryArchive(HistoryArchive):
+    """
+    Process local archive, suitable for local runs and tests. Archive is not persisted and it is bounded, so memory of
+    long-lived sessions does not grow without limit: only the newest max_cycles_per_session cycles of a session are kept and
+    archives of least recently used sessions are dropped when there are more than max_sessions.
+    """
+
+    def __init__(self, max_sessions: int = 10_000, max_cycles_per_session: int = 100):
+        """
+        :param max_sessions: number of sessions with archived cycles
+        :param max_cycles_per_session: number of archived cycles kept per session, the oldest are dropped first
+        """
+        if max_sessions < 1 or max_cycles_per_session < 1:
+            raise ValueError("Archive limits must be positive")
+        self.max_sessions = max_sessions
+        self.max_cycles_per_session = max_cycles_per_session
+        self._lock = threading.Lock()
+        # archived cycles per session with the position of the oldest kept cycle
+        self._cycles: OrderedDict[str, tuple[int, list[ConversationCycle]]] = OrderedDict()
+
+    def append(self, session_id: str, cycles: list[ConversationCycle], start: int) -> None:
+        with self._lock:
+            offset, archived = self._cycles.get(session_id, (start, []))
+            del archived[max(start - offset, 0):]
+            archived.extend(cycles[max(offset - start, 0):])
+            dropped = max(len(archived) - self.max_cycles_per_session, 0)
+            self._cycles[session_id] = (offset + dropped, archived[dropped:])
+            self._cycles.move_to_end(session_id)
+            while len(self._cycles) > self.max_sessions:
+                self._cycles.popitem(last=False)
+
+    def load(self, session_id: str) -> list[ConversationCycle]:
+        with self._lock:
+            if session_id not in self._cycles:
+                return []
+            self._cycles.move_to_end(session_id)
+            return list(self._cycles[session_id][1])
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._cycles.pop(session_id, None)
+
+
+_archives: dict[str, HistoryArchive] = {DEFAULT_HISTORY_ARCHIVE: InMemoryHistoryArchive()}
+
+
+def register_history_archive(name: str, archive: HistoryArchive) -> None:
+    """
+    Registers archive under the name which can be used in HistoryRetentionConfig.
+    :param name: of the archive
+    :param archive: to store compacted conversation cycles
+    """
+    _archives[name] = archive
+
+
+def get_history_archive(name: str) -> HistoryArchive:
+    if name not in _archives:
+        raise ValueError(f"History archive '{name}' is not registered")
+    return _archives[name]
+
+
+def load_archived_cycles(archived_history: ArchivedHistory) -> list[ConversationCycle]:
+    """
+    Returns cycles referenced by the archived history, or empty list if compacted cycles were discarded.
+    :param archived_history: reference saved in the chatbot state
+    :return: archived cycles from the oldest to the newest
+    """
+    if not archived_history.archive:
+        return []
+    return get_history_archive(archived_history.archive).load(archived_history.session_id)
+
+
+def compact_cycles(cycles: list[ConversationCycle],
+                   retention: HistoryRetentionConfig) -> tuple[list[ConversationCycle], list[ConversationCycle]]:
+    """
+    Splits cycles into those kept in the state and the oldest ones which exceed retention limits.
+    Current (last) conversation cycle is always kept.
+
+    :param cycles: all cycles in the state
+    :param retention: limits for the cycles kept in the state
+    :return: kept cycles and compacted cycles
+    """
+    sizes = [_cycle_size(cycle) for cycle in cycles] if retention.max_bytes else [0] * len(cycles)
+    messages = sum(len(cycle.messages) for cycle in cycles)
+    total_bytes = sum(sizes)
+    start = 0
+    while start < len(cycles) - 1 and _exceeds(retention, len(cycles) - start, messages, total_bytes):
+        messages -= len(cycles[start].messages)
+        total_bytes -= sizes[start]
+        start += 1
+    return cycles[start:], cycles[:start]
+
+
+def _exceeds(retention: HistoryRetentionConfig, cycles: int, messages: int, total_bytes: int) -> bool:
+    return ((retention.max_cycles is not None and cycles > retention.max_cycles)
+            or (retention.max_messages is not None and messages > retention.max_messages)
+            or (retention.max_bytes is not None and total_bytes > retention.max_bytes))
+
+
+# approximate size of the cycle as JSON, good enough to bound checkpoint size
+def _cycle_size(cycle: ConversationCycle) -> int:
+    return sum(_message_size(message) for message in cycle.messages)
+
+
+def _message_size(message: Message) -> int:
+    return len(json.dumps(message.content, ensure_ascii=False, default=str).encode("utf-8"))
@@ -0,0 +1,32 @@
+from contextvars import ContextVar, Token
+
+from langgraph.types import StateSnapshot
+
+"""
+This variable holds checkpoint snapshot loaded once at the beginning of a conversation turn.
+Snapshot is shared by all methods preparing the graph execution, so checkpoint is deserialized only once per inbound message.
+These methods are used by ChatbotFlow, user should never call these directly.
+"""
+
+_turn_snapshot = ContextVar("turn_snapshot", default=None)
+
+
+def set_turn_snapshot(session_id: str, snapshot: StateSnapshot) -> Token:
+    return _turn_snapshot.set((session_id, snapshot))
+
+
+# returns snapshot only if it was loaded for the same session in this turn
+def get_turn_snapshot(session_id: str) -> StateSnapshot | None:
+    cached = _turn_snapshot.get()
+    if cached and cached[0] == session_id:
+        return cached[1]
+    return None
+
+
+# snapshot is stale as soon as graph starts executing, nodes should read the checkpointer
+def invalidate_turn_snapshot() -> None:
+    _turn_snapshot.set(None)
+
+
+def reset_turn_snapshot(token: Token) -> None:
+    _turn_snapshot.reset(token)
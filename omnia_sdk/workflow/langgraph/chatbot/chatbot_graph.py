@@ -1,31 +1,76 @@
+import asyncio
+import inspect
+import logging as log
+import threading
 from abc import ABC, abstractmethod
-from collections.abc import Callable
-from typing import Annotated, Any, TypedDict
+from collections.abc import AsyncIterable, AsyncIterator, Callable, Iterable, Iterator
+from contextvars import copy_context
+from typing import Any
 
 from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.checkpoint.memory import MemorySaver
 from langgraph.graph import StateGraph
-from langgraph.types import Command, interrupt
+from langgraph.types import Command, StateSnapshot, interrupt
 
 from omnia_sdk.workflow.chatbot.chatbot_configuration import ChatbotConfiguration
 from omnia_sdk.workflow.chatbot.chatbot_state import (
+    ArchivedHistory,
     ChatbotState,
     ConversationCycle,
     Message,
 )
 from omnia_sdk.workflow.chatbot.constants import (
     ASSISTANT,
+    BATCH_OUTBOUND,
     CONFIGURABLE,
     LANGUAGE,
     METADATA,
     USER,
     THREAD_ID,
     RECURSION_LIMIT,
+    TURN_BUDGET_MS,
+)
+from omnia_sdk.workflow.chatbot.history_archive import compact_cycles, get_history_archive, load_archived_cycles
+from omnia_sdk.workflow.langgraph.chatbot._context import (
+    get_turn_snapshot,
+    invalidate_turn_snapshot,
+    reset_turn_snapshot,
+    set_turn_snapshot,
+)
+from omnia_sdk.workflow.langgraph.chatbot.chatbot_serializer import ChatbotStateSerializer
+from omnia_sdk.workflow.langgraph.chatbot.sqlite_checkpointer import SQLiteCheckpointer
+from omnia_sdk.workflow.langgraph.chatbot.node_checkpointer import AsyncNodeCheckpointer, ConditionalTransition, NodeCheckpointer
+from omnia_sdk.workflow.langgraph.chatbot.node_metrics import NodeMetrics
+from omnia_sdk.workflow.langgraph.chatbot.state_channels import (
+    ARCHIVED_HISTORY,
+    CHATBOT_STATE,
+    CONVERSATION_CYCLES,
+    VARIABLES,
+    ChatbotChannels,
+    State,
+    _user_language,
+    to_channels,
+    to_state,
 )
-from omnia_sdk.workflow.langgraph.chatbot.node_checkpointer import NodeCheckpointer
 from omnia_sdk.workflow.tools.answers._context import set_workflow_state
+from omnia_sdk.workflow.tools.channels._context import (
+    OutboundBatch,
+    ResponseCollector,
+    get_response_collector,
+    reset_delivery_handle,
+    reset_outbound_batch,
+    reset_response_collector,
+    set_delivery_handle,
+    set_outbound_batch,
+    set_response_collector,
+)
+from omnia_sdk.workflow.tools.channels.delivery_queue import DeliveryHandle, DeliveryQueue
+from omnia_sdk.workflow.tools.channels.text_chunker import TextChunker
 from omnia_sdk.workflow.tools.channels.omni_channels import (
     ButtonDefinition,
+    aflush_messages,
+    asend_message,
+    flush_messages,
     get_outbound_buttons_format,
     get_outbound_text_format,
     send_message,
@@ -36,6 +81,7 @@ from omnia_sdk.workflow.tools.channels.omni_channels import (
 from omnia_sdk.workflow.tools.localization.cpaas_translation_table import (
     CPaaSTranslationTable,)
 from omnia_sdk.workflow.tools.localization.translation_table import TranslationTable
+from omnia_sdk.workflow.tools.rest.deadline import reset_turn_deadline, set_turn_deadline
 """
 This class should enable easy access to Infobip's SaaS, CPaaS and AI services while simplifying LangGraph state management.
 Built graph is **channel agnostic** and can be multilingual with the help of language detector and translation table.
@@ -58,48 +104,36 @@ Simply modify state in-place using accessor methods in ChatbotGraph class and SD
 
 Please remember to set the entry point and transitions to END node as shown in examples and pydoc bellow.
 
+ASYNCIO
+Node functions may be coroutine functions. Such graph must be executed with arun method instead of run.
+Use asend_response and await_user_input accessor methods inside coroutine node functions.
+
 IMPORTANT:
 - To ensure backwards compatibility it is highly recommended that user does NOT access chatbot_state directly.
 Instead, use accessor methods in ChatbotGraph class to interact with the chatbot state.
 """
 
-CHATBOT_STATE = "chatbot_state"
-VARIABLES = "variables"
-CONVERSATION_CYCLES = "conversation_cycles"
-_user_language = "user_language"
-
-
-def reduce_state(cs1: ChatbotState, cs2: ChatbotState) -> ChatbotState:
-    if not cs2:
-        return cs1
-    return cs2
-
-
-"""
-It is highly recommended to use TypedDict for top level state objects in LangGraph.
-In theory dataclasses and Pydantic models are supported but reductions via Annotated do not work with those.
-This makes it inconvenient to observe state outside of graph and in turn resume execution with merge reduction.
-"""
-
-
-class State(TypedDict):
-    chatbot_state: Annotated[ChatbotState, reduce_state]
-
-
 MAX_RECURSION_LIMIT = 100
 
 
 class ChatbotFlow(ABC):
     # This constructor will be invoked by runtime environment with user submitted files
     def __init__(self, checkpointer: BaseCheckpointSaver = None, configuration: ChatbotConfiguration | None = None,
-                 translation_table: TranslationTable | None = None, environment: dict | None = None):
-        self.__graph = StateGraph(State)
+                 translation_table: TranslationTable | None = None, environment: dict | None = None,
+                 node_metrics: Callable[[NodeMetrics], None] | None = None, delivery_queue: DeliveryQueue | None = None):
+        self.__graph = StateGraph(ChatbotChannels)
+        # executed after every node execution with its timings, see node_metrics.py
+        self.node_metrics = node_metrics
+        # outbound messages are delivered in background if set, see delivery_queue.py
+        self.delivery_queue = delivery_queue
         self.configuration = configuration
         self.translation_table = translation_table if translation_table else CPaaSTranslationTable(
             translation_table_cpaas={}, translation_table_constants={})
         self._nodes()
         self._transitions()
-        checkpointer = checkpointer if checkpointer else MemorySaver()
+        checkpointer = checkpointer if checkpointer else MemorySaver(serde=ChatbotStateSerializer())
+        if isinstance(checkpointer, SQLiteCheckpointer) and not checkpointer.on_session_end:
+            checkpointer.on_session_end = self._end_session
         self.workflow = self.__graph.compile(checkpointer=checkpointer)
         self.__environment = environment
 
@@ -162,10 +196,39 @@ class ChatbotFlow(ABC):
         _ = (self, message, config)
         return True
 
-    # Not yet supported
     def on_session_end(self, state: State, session_id: str):
+        """
+        This method is executed once session is evicted by the checkpointer, e.g. SQLiteCheckpointer evicts sessions idle for
+        longer than its TTL. Session state is deleted afterward, this can be used to persist the conversation elsewhere.
+        Not yet supported by the runtime environment.
+
+        :param state: the latest state of the session
+        :param session_id: unique session identifier
+        """
         pass
 
+    # executed by checkpointer with channel values of evicted session
+    def _end_session(self, session_id: str, values: dict) -> None:
+        state = to_state(values)
+        self.on_session_end(state=state, session_id=session_id)
+        archived_history = state[CHATBOT_STATE].get(ARCHIVED_HISTORY) if state else None
+        if archived_history and archived_history.archive:
+            get_history_archive(archived_history.archive).delete(session_id=archived_history.session_id)
+
+    def summarize_history(self, cycles: list[ConversationCycle], summary: str | None, config: dict) -> str | None:
+        """
+        This method is executed when the oldest conversation cycles are compacted out of the state due to history retention
+        limits in ChatbotConfiguration. User may override it to keep a short summary of compacted cycles, e.g. with LLM.
+        Summary is available in nodes via get_history_summary method.
+
+        :param cycles: compacted conversation cycles, from the oldest to the newest
+        :param summary: summary of previously compacted cycles, None if there is no summary yet
+        :param config: channel and session details
+        :return: new summary of all compacted cycles
+        """
+        _ = (self, cycles, config)
+        return summary
+
     def run(self, message: Message, config: dict) -> None:
         """
         This method is invoked by runtime environment to start the chatbot graph execution.
@@ -180,20 +243,181 @@ class ChatbotFlow(ABC):
         """
         # end node does not have any nodes to which it loops back
         self._set_recursion_limit(config=config)
-        if self.workflow.get_state(config).next:
-            self._resume(message=message, config=config)
-            return
-        self._invoke(message=message, config=config)
+        deadline_token = set_turn_deadline(self._get_turn_budget(config=config))
+        batch_token = set_outbound_batch(OutboundBatch()) if self._should_batch_outbound(config=config) else None
+        delivery = DeliveryHandle(self.delivery_queue) if self.delivery_queue else None
+        delivery_token = set_delivery_handle(delivery) if delivery else None
+        collector = _collect_turn_responses()
+        try:
+            # checkpoint is read once per turn and shared until the graph starts executing
+            token = set_turn_snapshot(session_id=self.get_session_id(config), snapshot=self.workflow.get_state(config))
+            try:
+                if self._get_snapshot(config=config).next:
+                    self._resume(message=message, config=config)
+                else:
+                    self._invoke(message=message, config=config)
+            finally:
+                reset_turn_snapshot(token)
+        except BaseException:
+            # messages sent before the failure are delivered, same as without batching
+            if batch_token:
+                _flush_after_failure(config=config)
+            raise
+        else:
+            # graph is waiting for user input or reached the END node
+            if batch_token:
+                flush_messages(config=config)
+        finally:
+            # turn ends once its messages are delivered, failed deliveries are reported by the queue
+            if delivery:
+                delivery.join()
+                reset_delivery_handle(delivery_token)
+            if batch_token:
+                reset_outbound_batch(batch_token)
+            reset_turn_deadline(deadline_token)
+            if collector:
+                collector.close()
+
+    async def arun(self, message: Message, config: dict) -> None:
+        """
+        Asynchronous version of run method, graph is executed in the caller's event loop.
+        Single worker process can serve many I/O bound sessions concurrently with this method instead of thread per session.
+        Coroutine node functions are awaited, synchronous node functions are executed in LangGraph's thread pool.
+
+        :param message: user message
+        :param config: channel and session parameters
+        """
+        self._set_recursion_limit(config=config)
+        deadline_token = set_turn_deadline(self._get_turn_budget(config=config))
+        batch_token = set_outbound_batch(OutboundBatch()) if self._should_batch_outbound(config=config) else None
+        delivery = DeliveryHandle(self.delivery_queue) if self.delivery_queue else None
+        delivery_token = set_delivery_handle(delivery) if delivery else None
+        collector = _collect_turn_responses()
+        try:
+            token = set_turn_snapshot(session_id=self.get_session_id(config), snapshot=await self.workflow.aget_state(config))
+            try:
+                if self._get_snapshot(config=config).next:
+                    await self._aresume(message=message, config=config)
+                else:
+                    await self._ainvoke(message=message, config=config)
+            finally:
+                reset_turn_snapshot(token)
+        except BaseException:
+            if batch_token:
+                await _aflush_after_failure(config=config)
+            raise
+        else:
+            if batch_token:
+                await aflush_messages(config=config)
+        finally:
+            if delivery:
+                await delivery.wait()
+                reset_delivery_handle(delivery_token)
+            if batch_token:
+                reset_outbound_batch(batch_token)
+            reset_turn_deadline(deadline_token)
+            if collector:
+                collector.close()
+
+    def stream_responses(self, message: Message, config: dict) -> Iterator[dict]:
+        """
+        Executes run method in a new thread and yields responses of the HTTP channel as soon as they are sent, while the graph
+        is still executing. Inbound endpoint may stream them to the client, e.g. chunked or as server-sent events, so the first
+        reply does not wait for the slowest node. Error of the run is raised after all sent responses were yielded.
+
+        :param message: user message
+        :param config: channel and session parameters
+        :return: iterator of sent responses
+        """
+        collector = ResponseCollector()
+        context = copy_context()
+        context.run(set_response_collector, collector)
+
+        def execute():
+            try:
+                context.run(self.run, message, config)
+            except BaseException as error:
+                collector.close(error=error)
+            else:
+                collector.close()
+
+        threading.Thread(target=execute, name=f"omnia-stream-{self.get_session_id(config)}", daemon=True).start()
+        yield from collector
+
+    async def astream_responses(self, message: Message, config: dict) -> AsyncIterator[dict]:
+        """
+        Asynchronous version of stream_responses method, graph is executed with arun method as a task of the caller's event loop.
+        Turn is completed even if consumer stops iterating early.
+
+        :param message: user message
+        :param config: channel and session parameters
+        :return: asynchronous iterator of sent responses
+        """
+        collector = ResponseCollector()
+        token = set_response_collector(collector)
+        try:
+            # task runs in a copy of the current context, with the collector
+            task = asyncio.create_task(self._arun_collecting(message=message, config=config, collector=collector))
+        finally:
+            reset_response_collector(token)
+        try:
+            async for response in collector:
+                yield response
+        finally:
+            await task
+
+    async def _arun_collecting(self, message: Message, config: dict, collector: ResponseCollector) -> None:
+        error = None
+        try:
+            await self.arun(message=message, config=config)
+        except Exception as e:
+            # raised to the consumer by the collector
+            error = e
+        finally:
+            collector.close(error=error)
 
     # continue with human input
     def _resume(self, message: Message, config: dict) -> None:
+        invalidate_turn_snapshot()
         self.workflow.invoke(input=Command(resume=message), config=config)
 
     # this method is executed every time user starts a new conversation cycle in chatbot graph (from the start node)
     def _invoke(self, message: Message, config: dict) -> None:
         current_state = self._prepare_state(message=message, config=config)
+        channels = to_channels(chatbot_state=current_state, values=self._get_snapshot(config=config).values)
+        if self._should_start(config=config, message=message):
+            invalidate_turn_snapshot()
+            self.workflow.invoke(channels, config=config)
+
+    async def _aresume(self, message: Message, config: dict) -> None:
+        invalidate_turn_snapshot()
+        await self.workflow.ainvoke(input=Command(resume=message), config=config)
+
+    async def _ainvoke(self, message: Message, config: dict) -> None:
+        current_state = self._prepare_state(message=message, config=config)
+        channels = to_channels(chatbot_state=current_state, values=self._get_snapshot(config=config).values)
         if self._should_start(config=config, message=message):
-            self.workflow.invoke({CHATBOT_STATE: current_state}, config=config)
+            invalidate_turn_snapshot()
+            await self.workflow.ainvoke(channels, config=config)
+
+    # returns checkpoint snapshot loaded for this turn, checkpointer is read only if snapshot is not available
+    def _get_snapshot(self, config: dict) -> StateSnapshot:
+        snapshot = get_turn_snapshot(session_id=self.get_session_id(config))
+        return snapshot if snapshot else self.workflow.get_state(config=config)
+
+    # returns latency budget of the turn in seconds, None if turn is not bound, see turn_budget_ms in chatbot_configuration.py
+    def _get_turn_budget(self, config: dict) -> float | None:
+        budget_ms = config.get(CONFIGURABLE, {}).get(TURN_BUDGET_MS)
+        if budget_ms is None and self.configuration:
+            budget_ms = self.configuration.turn_budget_ms
+        return budget_ms / 1000 if budget_ms else None
+
+    # returns true if outbound messages of the turn should be batched, see batch_outbound in chatbot_configuration.py
+    def _should_batch_outbound(self, config: dict) -> bool:
+        batch_outbound = config.get(CONFIGURABLE, {}).get(BATCH_OUTBOUND)
+        if batch_outbound is None and self.configuration:
+            batch_outbound = self.configuration.batch_outbound
+        return bool(batch_outbound)
 
     def _set_recursion_limit(self, config: dict):
         if self.configuration and self.configuration.recursion_limit:
@@ -206,11 +430,13 @@ class ChatbotFlow(ABC):
         Adds a node to the graph with the name and node function.
         This method will ensure that LangGraph state is always correctly checkpointed after the node execution.
         User should not need to write return state deltas in every node function.
+        Function may be a coroutine function, in which case graph must be executed with arun method.
 
         :param name: node name
         :param function: to be executed in the node
         """
-        self.__graph.add_node(name, NodeCheckpointer(function))
+        node_checkpointer = AsyncNodeCheckpointer if inspect.iscoroutinefunction(function) else NodeCheckpointer
+        self.__graph.add_node(name, node_checkpointer(function, name=name, metrics=self.node_metrics))
 
     def add_edge(self, from_node: str, to_node: str) -> None:
         """
@@ -226,8 +452,7 @@ class ChatbotFlow(ABC):
         :param from_node: from which to go into the next node
         :param function: to determine the next node
         """
-        function.__annotations__.clear()
-        self.__graph.add_conditional_edges(from_node, function)
+        self.__graph.add_conditional_edges(from_node, ConditionalTransition(function))
 
     def send_predefined_response(self, key: str, state: State, config: dict, **kwargs) -> None:
         """
@@ -257,7 +482,7 @@ class ChatbotFlow(ABC):
 
     # returns true if this is the first user's message in the session, false otherwise
     def _is_new_session(self, config: dict) -> bool:
-        snapshot = self.workflow.get_state(config=config).values
+        snapshot = self._get_snapshot(config=config).values
         return len(snapshot) == 0
 
     # returns true if graph should be executed for this context (e.g. successful authorization), false otherwise
@@ -273,7 +498,7 @@ class ChatbotFlow(ABC):
         :param config: with session and channel details
         :return: current state of the chatbot
         """
-        return self.workflow.get_state(config=config).values
+        return to_state(self._get_snapshot(config=config).values)
 
     def _prepare_state(self, message: Message, config: dict) -> ChatbotState:
         """
@@ -281,7 +506,7 @@ class ChatbotFlow(ABC):
         If this is a new conversation cycle, user message will initiative new conversation cycle in the state.
         """
         language = config[CONFIGURABLE][LANGUAGE] if LANGUAGE in config[CONFIGURABLE] else self.configuration.default_language
-        snapshot = self.workflow.get_state(config=config).values
+        snapshot = to_state(self._get_snapshot(config=config).values)
         if not snapshot:
             return ChatbotState(conversation_cycles=[ConversationCycle(messages=[message])], user_language=language, variables={})
 
@@ -289,7 +514,31 @@ class ChatbotFlow(ABC):
         intent = cycles[-1].intent
         variables = dict(snapshot.get(CHATBOT_STATE).get(VARIABLES))
         cycles.append(ConversationCycle(messages=[message], intent=intent))
-        return ChatbotState(conversation_cycles=cycles, user_language=language, variables=variables)
+        current_state = ChatbotState(conversation_cycles=cycles, user_language=language, variables=variables)
+        archived_history = snapshot.get(CHATBOT_STATE).get(ARCHIVED_HISTORY)
+        if archived_history:
+            current_state[ARCHIVED_HISTORY] = archived_history
+        self._retain_history(chatbot_state=current_state, config=config)
+        return current_state
+
+    # moves the oldest cycles exceeding retention limits from the state to the history archive
+    def _retain_history(self, chatbot_state: ChatbotState, config: dict) -> None:
+        retention = self.configuration.history_retention if self.configuration else None
+        if not retention:
+            return
+        cycles, compacted = compact_cycles(cycles=chatbot_state[CONVERSATION_CYCLES], retention=retention)
+        if not compacted:
+            return
+        archived_history = chatbot_state.get(ARCHIVED_HISTORY) or ArchivedHistory(session_id=self.get_session_id(config),
+                                                                                  archive=retention.archive)
+        if archived_history.archive:
+            # position of the cycles comes from the state, so replayed turn does not archive them twice
+            get_history_archive(archived_history.archive).append(session_id=archived_history.session_id, cycles=compacted,
+                                                                 start=archived_history.cycles)
+        summary = self.summarize_history(cycles=compacted, summary=archived_history.summary, config=config)
+        chatbot_state[CONVERSATION_CYCLES] = cycles
+        chatbot_state[ARCHIVED_HISTORY] = ArchivedHistory(session_id=archived_history.session_id, archive=archived_history.archive,
+                                                          cycles=archived_history.cycles + len(compacted), summary=summary)
 
     def get_environment_variable(self, variable_name: str, default: Any | None = None) -> Any | None:
         if not self.__environment:
@@ -356,17 +605,33 @@ class ChatbotFlow(ABC):
         :param state: of conversation
         :return: current conversation cycle with most recent actions by the user and chatbot.
         """
-        return ChatbotFlow.get_all_cycles(state=state)[-1]
+        return state[CHATBOT_STATE][CONVERSATION_CYCLES][-1]
 
     @staticmethod
     def get_all_cycles(state: State) -> list[ConversationCycle]:
         """
         Returns all conversation cycles from the start of conversation.
+        Cycles compacted out of the state due to history retention limits are loaded from the history archive.
 
         :param state: of conversation
         :return: all conversation cycles from the start of conversation
         """
-        return state[CHATBOT_STATE][CONVERSATION_CYCLES]
+        cycles = state[CHATBOT_STATE][CONVERSATION_CYCLES]
+        archived_history = state[CHATBOT_STATE].get(ARCHIVED_HISTORY)
+        if not archived_history or not archived_history.cycles:
+            return cycles
+        return load_archived_cycles(archived_history=archived_history) + cycles
+
+    @staticmethod
+    def get_history_summary(state: State) -> str | None:
+        """
+        Returns summary of conversation cycles compacted out of the state, see ChatbotFlow.summarize_history.
+
+        :param state: of conversation
+        :return: summary of compacted cycles, None if there is no summary
+        """
+        archived_history = state[CHATBOT_STATE].get(ARCHIVED_HISTORY)
+        return archived_history.summary if archived_history else None
 
     @staticmethod
     def get_variable(state: State, name: str) -> Any:
@@ -450,6 +715,77 @@ class ChatbotFlow(ABC):
         content = get_outbound_image_format(image_url=image_url)
         ChatbotFlow.send_response(content=content, state=state, config=config)
 
+    @staticmethod
+    def stream_text_response(tokens: Iterable[str], state: State, config: dict, min_chunk_chars: int = 40,
+                             max_chunk_chars: int = 400) -> str:
+        """
+        Sends streamed text, e.g. from chat_completions_stream, to the user in chunks while it is being generated, so the user
+        sees the beginning of the reply without waiting for the complete LLM response. Chunks end at sentence boundaries, see
+        text_chunker.py. Every chunk is delivered right away, even if outbound messages are batched.
+        Complete text is saved in the state once, as a single message. If the stream fails, chunks sent so far are saved.
+
+        :param tokens: streamed text
+        :param state: conversation state
+        :param config: channel and session details
+        :param min_chunk_chars: minimum length of a chunk ending at a sentence boundary
+        :param max_chunk_chars: maximum length of a chunk
+        :return: complete text
+        """
+        chunker = TextChunker(min_chars=min_chunk_chars, max_chars=max_chunk_chars)
+        sent = []
+        completed = False
+        try:
+            for token in tokens:
+                for chunk in chunker.feed(token):
+                    ChatbotFlow._send_chunk(chunk=chunk, config=config)
+                    sent.append(chunk)
+            chunk = chunker.flush()
+            if chunk:
+                ChatbotFlow._send_chunk(chunk=chunk, config=config)
+            completed = True
+            return chunker.text
+        finally:
+            ChatbotFlow._save_streamed_text(text=chunker.text if completed else " ".join(sent), state=state)
+
+    @staticmethod
+    async def astream_text_response(tokens: AsyncIterable[str], state: State, config: dict, min_chunk_chars: int = 40,
+                                    max_chunk_chars: int = 400) -> str:
+        """
+        Asynchronous version of stream_text_response method, to be awaited in coroutine node functions with asynchronous
+        stream, e.g. from chat_completions_stream_async.
+        """
+        chunker = TextChunker(min_chars=min_chunk_chars, max_chars=max_chunk_chars)
+        sent = []
+        completed = False
+        try:
+            async for token in tokens:
+                for chunk in chunker.feed(token):
+                    await ChatbotFlow._asend_chunk(chunk=chunk, config=config)
+                    sent.append(chunk)
+            chunk = chunker.flush()
+            if chunk:
+                await ChatbotFlow._asend_chunk(chunk=chunk, config=config)
+            completed = True
+            return chunker.text
+        finally:
+            ChatbotFlow._save_streamed_text(text=chunker.text if completed else " ".join(sent), state=state)
+
+    # chunk is not saved in the state, streamed text is saved once as a whole
+    @staticmethod
+    def _send_chunk(chunk: str, config: dict) -> None:
+        send_message(message=Message(role=ASSISTANT, content=get_outbound_text_format(text=chunk)), config=config)
+        flush_messages(config=config)
+
+    @staticmethod
+    async def _asend_chunk(chunk: str, config: dict) -> None:
+        await asend_message(message=Message(role=ASSISTANT, content=get_outbound_text_format(text=chunk)), config=config)
+        await aflush_messages(config=config)
+
+    @staticmethod
+    def _save_streamed_text(text: str, state: State) -> None:
+        if text.strip():
+            ChatbotFlow.save_message(state=state, message=Message(role=ASSISTANT, content=get_outbound_text_format(text=text.strip())))
+
     @staticmethod
     def send_response(content: dict, state: State, config: dict = None) -> None:
         """
@@ -462,6 +798,37 @@ class ChatbotFlow(ABC):
         send_message(message=message, config=config)
         ChatbotFlow.save_message(state=state, message=message)
 
+    @staticmethod
+    async def asend_response(content: dict, state: State, config: dict = None) -> None:
+        """
+        Asynchronous version of send_response method, to be awaited in coroutine node functions.
+        :param content: channel payload to send to user
+        :param state: conversation state
+        :param config: channel and session details
+        """
+        message = Message(role=ASSISTANT, content=content)
+        await asend_message(message=message, config=config)
+        ChatbotFlow.save_message(state=state, message=message)
+
+    @staticmethod
+    def flush(config: dict) -> None:
+        """
+        Sends messages buffered during the turn right away, instead of waiting for user input or the END node.
+        Useful in long-running nodes, e.g. to deliver "please wait" message before calling slow API.
+        Does nothing if outbound batching is not enabled, see batch_outbound in chatbot_configuration.py.
+
+        :param config: channel and session details
+        """
+        flush_messages(config=config)
+
+    @staticmethod
+    async def aflush(config: dict) -> None:
+        """
+        Asynchronous version of flush method, to be awaited in coroutine node functions.
+        :param config: channel and session details
+        """
+        await aflush_messages(config=config)
+
     @staticmethod
     def wait_user_input(state: State, config: dict, variable_name: str = None, extractor: Callable = lambda x: x) -> Any | None:
         """
@@ -492,6 +859,20 @@ class ChatbotFlow(ABC):
             ChatbotFlow.save_variable(name=variable_name, value=extractor(message.get_text()), state=state)
         return extractor(message.get_text())
 
+    @staticmethod
+    async def await_user_input(state: State, config: dict, variable_name: str = None, extractor: Callable = lambda x: x) -> Any | None:
+        """
+        Asynchronous version of wait_user_input method, to be awaited in coroutine node functions.
+        Same rules apply, node will be executed from the beginning once user's input is received.
+
+        :param state: of conversation with latest user input
+        :param config: session and channel details
+        :param variable_name: in which user's input should be saved
+        :param extractor: function that maps user's message to desired type
+        :return: extracted text content from user message
+        """
+        return ChatbotFlow.wait_user_input(state=state, config=config, variable_name=variable_name, extractor=extractor)
+
     @staticmethod
     def save_variable(name: str, value: Any, state: State) -> None:
         """
@@ -519,3 +900,29 @@ class ChatbotFlow(ABC):
         :param state: state that will be returned to Answers chatbot
         """
         set_workflow_state(state)
+
+
+# collects responses of the turn unless the caller set a collector, e.g. stream_responses. Collector of the previous turn is
+# replaced, it was closed when that turn ended. Responses remain readable with get_responses after the turn.
+def _collect_turn_responses() -> ResponseCollector | None:
+    collector = get_response_collector()
+    if collector is not None and not collector.closed:
+        return None
+    collector = ResponseCollector()
+    set_response_collector(collector)
+    return collector
+
+
+# delivery error must not hide the error which failed the turn
+def _flush_after_failure(config: dict) -> None:
+    try:
+        flush_messages(config=config)
+    except Exception as e:
+        log.error(f"Buffered messages were not delivered after the turn failed, session: {config[CONFIGURABLE][THREAD_ID]}, error: {e}")
+
+
+async def _aflush_after_failure(config: dict) -> None:
+    try:
+        await aflush_messages(config=config)
+    except Exception as e:
+        log.error(f"Buffered messages were not delivered after the turn failed, session: {config[CONFIGURABLE][THREAD_ID]}, error: {e}")
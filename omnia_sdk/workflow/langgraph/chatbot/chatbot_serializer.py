@@ -0,0 +1,167 @@
+import ormsgpack
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from omnia_sdk.workflow.chatbot.chatbot_state import ConversationCycle, Message
+from omnia_sdk.workflow.chatbot.constants import ASSISTANT, BUTTON_REPLY, LIST_REPLY, PAYLOAD, TEXT, TYPE, USER
+from omnia_sdk.workflow.langgraph.chatbot.state_channels import Overwrite
+
+try:
+    import zstandard
+except ImportError:  # compression is optional
+    zstandard = None
+"""
+This module provides checkpoint serializer specialised for chatbot state, see state_channels.py for the channel layout.
+
+Messages and conversation cycles are encoded with schema-aware msgpack instead of generic dataclass encoding:
+ - dataclass module and class names are not repeated for every message
+ - roles, content types and common content keys (type, text, body, ...) are interned as small integers
+ - payloads above compression_threshold bytes are compressed with zstd, if zstandard package is installed
+All other values (checkpoints, metadata, variables) are serialized with LangGraph's default JsonPlusSerializer.
+
+Example:
+    checkpointer = MemorySaver(serde=ChatbotStateSerializer(compression_threshold=2048))
+"""
+
+OMNIA_TYPE = "omnia"
+OMNIA_ZSTD_TYPE = "omnia+zstd"
+
+_ROLES = [USER, ASSISTANT, "tool", "system"]
+_CONTENT_TYPES = [TEXT.upper(), BUTTON_REPLY, LIST_REPLY, "IMAGE", "LIST", "VIDEO", "DOCUMENT", "AUDIO", "LOCATION", "FILE"]
+_CONTENT_KEYS = [TYPE, TEXT, "body", PAYLOAD, "buttons", "postbackData", "url", "subtext", "sections", "sectionTitle", "items",
+                 "title", "description", "caption"]
+_ROLE_CODES = {role: code for code, role in enumerate(_ROLES)}
+_CONTENT_TYPE_CODES = {content_type: code for code, content_type in enumerate(_CONTENT_TYPES)}
+_CONTENT_KEY_CODES = {key: code for code, key in enumerate(_CONTENT_KEYS)}
+
+# encoded value kinds
+_MESSAGE, _MESSAGES, _CYCLE, _CYCLES, _OVERWRITE_MESSAGES = range(5)
+
+# values which msgpack can not encode exactly are rejected and serialized by the default serializer
+_PACK_OPTIONS = (ormsgpack.OPT_NON_STR_KEYS | ormsgpack.OPT_PASSTHROUGH_DATACLASS | ormsgpack.OPT_PASSTHROUGH_DATETIME
+                 | ormsgpack.OPT_PASSTHROUGH_UUID | ormsgpack.OPT_PASSTHROUGH_ENUM | ormsgpack.OPT_PASSTHROUGH_SUBCLASS
+                 | ormsgpack.OPT_PASSTHROUGH_TUPLE)
+
+
+class _Unsupported(Exception):
+    pass
+
+
+class ChatbotStateSerializer(JsonPlusSerializer):
+
+    def __init__(self, compression_threshold: int | None = 4096, compression_level: int = 3, **kwargs):
+        """
+        :param compression_threshold: payloads larger than this many bytes are compressed, never compressed if None
+        :param compression_level: zstd compression level
+        :param kwargs: passed to JsonPlusSerializer
+        """
+        super().__init__(**kwargs)
+        self.compression_threshold = compression_threshold if zstandard else None
+        self._compressor = zstandard.ZstdCompressor(level=compression_level) if zstandard else None
+        self._decompressor = zstandard.ZstdDecompressor() if zstandard else None
+
+    def dumps_typed(self, obj) -> tuple[str, bytes]:
+        try:
+            data = ormsgpack.packb(_encode(obj), option=_PACK_OPTIONS)
+        except (_Unsupported, TypeError, ormsgpack.MsgpackEncodeError):
+            return super().dumps_typed(obj)
+        if self.compression_threshold is not None and len(data) > self.compression_threshold:
+            return OMNIA_ZSTD_TYPE, self._compressor.compress(data)
+        return OMNIA_TYPE, data
+
+    def loads_typed(self, data: tuple[str, bytes]):
+        type_, data_ = data
+        if type_ == OMNIA_ZSTD_TYPE:
+            if not self._decompressor:
+                raise NotImplementedError("zstandard package is required to load compressed checkpoints")
+            return _decode(ormsgpack.unpackb(self._decompressor.decompress(data_), option=ormsgpack.OPT_NON_STR_KEYS))
+        if type_ == OMNIA_TYPE:
+            return _decode(ormsgpack.unpackb(data_, option=ormsgpack.OPT_NON_STR_KEYS))
+        return super().loads_typed(data)
+
+
+def _encode(obj) -> list:
+    if isinstance(obj, Message):
+        return [_MESSAGE, _encode_message(obj)]
+    if isinstance(obj, ConversationCycle):
+        return [_CYCLE, _encode_cycle(obj)]
+    if isinstance(obj, Overwrite) and _is_list_of(obj.value, Message):
+        return [_OVERWRITE_MESSAGES, [_encode_message(message) for message in obj.value]]
+    # empty lists are left to the default serializer as their type is unknown
+    if _is_list_of(obj, Message):
+        return [_MESSAGES, [_encode_message(message) for message in obj]]
+    if _is_list_of(obj, ConversationCycle):
+        return [_CYCLES, [_encode_cycle(cycle) for cycle in obj]]
+    raise _Unsupported()
+
+
+def _decode(encoded: list):
+    kind, payload = encoded
+    if kind == _MESSAGE:
+        return _decode_message(payload)
+    if kind == _CYCLE:
+        return _decode_cycle(payload)
+    if kind == _MESSAGES:
+        return [_decode_message(message) for message in payload]
+    if kind == _CYCLES:
+        return [_decode_cycle(cycle) for cycle in payload]
+    if kind == _OVERWRITE_MESSAGES:
+        return Overwrite([_decode_message(message) for message in payload])
+    raise ValueError(f"Unknown encoded value kind: {kind}")
+
+
+def _is_list_of(obj, cls) -> bool:
+    return type(obj) is list and len(obj) > 0 and all(type(item) is cls for item in obj)
+
+
+def _encode_cycle(cycle: ConversationCycle) -> list:
+    return [cycle.intent, [_encode_message(message) for message in cycle.messages]]
+
+
+def _decode_cycle(encoded: list) -> ConversationCycle:
+    intent, messages = encoded
+    return ConversationCycle(messages=[_decode_message(message) for message in messages], intent=intent)
+
+
+def _encode_message(message: Message) -> list:
+    return [_ROLE_CODES.get(message.role, message.role), _encode_content(message.content)]
+
+
+def _decode_message(encoded: list) -> Message:
+    role, content = encoded
+    return Message(role=_ROLES[role] if isinstance(role, int) else role, content=_decode_content(content))
+
+
+# known keys and content types are replaced with their codes, original keys are always strings in channel message format
+def _encode_content(value):
+    if type(value) is dict:
+        encoded = {}
+        for key, item in value.items():
+            if type(key) is not str:
+                raise _Unsupported()
+            if key == TYPE and isinstance(item, int):
+                raise _Unsupported()
+            if key == TYPE and item in _CONTENT_TYPE_CODES:
+                item = _CONTENT_TYPE_CODES[item]
+            else:
+                item = _encode_content(item)
+            encoded[_CONTENT_KEY_CODES.get(key, key)] = item
+        return encoded
+    if type(value) is list:
+        return [_encode_content(item) for item in value]
+    return value
+
+
+def _decode_content(value):
+    if type(value) is dict:
+        decoded = {}
+        for key, item in value.items():
+            key = _CONTENT_KEYS[key] if isinstance(key, int) else key
+            if key == TYPE and isinstance(item, int):
+                item = _CONTENT_TYPES[item]
+            else:
+                item = _decode_content(item)
+            decoded[key] = item
+        return decoded
+    if type(value) is list:
+        return [_decode_content(item) for item in value]
+    return value
@@ -1,26 +1,105 @@
+import dataclasses
 import inspect
-from typing import Callable
+from typing import Any, Callable
+
+from langgraph.types import Command
 
 from omnia_sdk.workflow.langgraph.chatbot.langgraph_commands import AbstractCommand
+from omnia_sdk.workflow.langgraph.chatbot.node_metrics import NodeMetrics, NodeTimer, record_node_metrics
+from omnia_sdk.workflow.langgraph.chatbot.state_channels import CHATBOT_STATE, StateTracker, to_state
 
 """
 This decorator ensures that LangGraph will checkpoint state with specified memory saver without requiring user to explicitly
 add return state to every node function.
-We mutate state in-place and perform identity reduction after each node execution automatically.
+We mutate state in-place and return only channel deltas of the changes after each node execution automatically,
+see state_channels.py for details.
 """
 
 
 class NodeCheckpointer:
-    def __init__(self, action: Callable):
-        # node function to execute
+    def __init__(self, action: Callable, name: str | None = None, metrics: Callable[[NodeMetrics], None] | None = None):
+        """
+        :param action: node function to execute
+        :param name: of the node, reported in metrics
+        :param metrics: hook executed with metrics of every node execution, node is not measured if None
+        """
         self.action = action
+        self.name = name if name else getattr(action, "__name__", type(action).__name__)
+        self.metrics = metrics
+        # signature is resolved once, node function is then called directly on every execution
+        self._dispatch = _dispatcher(action)
 
     def __call__(self, state=None, config=None):
-        object_spect = inspect.signature(self.action)
-        # langgraph passes config/state as arguments to node functions only if those functions explicitly declare them
-        arguments = {k: v for k, v in locals().items() if k in object_spect.parameters}
-        result = self.action(**arguments)
+        tracker = StateTracker(values=state)
+        if self.metrics is None:
+            return self._checkpoint(result=self._dispatch(tracker.state, config), tracker=tracker)
+        timer = NodeTimer(state=tracker.state)
+        try:
+            return self._checkpoint(result=self._dispatch(tracker.state, config), tracker=tracker)
+        finally:
+            # recorded also when node is interrupted to wait for user input
+            record_node_metrics(self.metrics, timer.stop(node=self.name, state=tracker.state))
+
+    @staticmethod
+    def _checkpoint(result, tracker: StateTracker):
         if isinstance(result, AbstractCommand):
             # users may use Command feature instead of standard transitions: https://langchain-ai.github.io/langgraph/concepts/low_level/#command
-            return result.to_langgraph_command(state=state)
-        return result if result else state
+            return result.to_langgraph_command(state=tracker.delta())
+        if isinstance(result, Command):
+            return dataclasses.replace(result, update=NodeCheckpointer._to_update(result.update, tracker=tracker))
+        return NodeCheckpointer._to_update(result, tracker=tracker) if result else tracker.delta()
+
+    # state views returned by users are converted to channel deltas, other updates are passed to LangGraph as they are
+    @staticmethod
+    def _to_update(update: Any, tracker: StateTracker) -> Any:
+        if isinstance(update, dict) and CHATBOT_STATE in update:
+            return tracker.delta(state=update)
+        return update
+
+
+class AsyncNodeCheckpointer(NodeCheckpointer):
+    """
+    Checkpointer for coroutine node functions. LangGraph awaits the node only when graph is executed with ainvoke,
+    so graph with coroutine nodes must be executed with ChatbotFlow.arun.
+    """
+
+    async def __call__(self, state=None, config=None):
+        tracker = StateTracker(values=state)
+        if self.metrics is None:
+            return self._checkpoint(result=await self._dispatch(tracker.state, config), tracker=tracker)
+        timer = NodeTimer(state=tracker.state)
+        try:
+            return self._checkpoint(result=await self._dispatch(tracker.state, config), tracker=tracker)
+        finally:
+            record_node_metrics(self.metrics, timer.stop(node=self.name, state=tracker.state))
+
+
+def _dispatcher(action: Callable) -> Callable[[Any, Any], Any]:
+    """
+    Returns function which calls the node function with state and config, LangGraph passes config/state as arguments to
+    node functions only if those functions explicitly declare them.
+    """
+    parameters = inspect.signature(action).parameters
+    if "state" in parameters and "config" in parameters:
+        return lambda state, config: action(state=state, config=config)
+    if "state" in parameters:
+        return lambda state, config: action(state=state)
+    if "config" in parameters:
+        return lambda state, config: action(config=config)
+    return lambda state, config: action()
+
+
+class ConditionalTransition:
+    """
+    Passes the state view to user's transition function, LangGraph would otherwise pass raw channel values.
+    """
+
+    def __init__(self, function: Callable):
+        self.function = function
+        self.__name__ = getattr(function, "__name__", type(function).__name__)
+        self._pass_config = "config" in inspect.signature(function).parameters
+
+    def __call__(self, state=None, config=None):
+        if self._pass_config:
+            return self.function(to_state(state), config=config)
+        return self.function(to_state(state))
@@ -0,0 +1,103 @@
+import dataclasses
+import json
+import logging as log
+import threading
+import time
+from collections.abc import Callable
+
+from omnia_sdk.workflow.langgraph.chatbot.state_channels import CHATBOT_STATE, CONVERSATION_CYCLES, VARIABLES, State
+
+"""
+This module provides per node instrumentation of chatbot graph execution.
+Pass a hook to ChatbotFlow constructor and it will be executed with NodeMetrics after every node execution:
+
+    metrics = NodeMetricsAggregator()
+    chatbot = MyChatbot(node_metrics=metrics)
+    ...
+    print(metrics.summary())
+
+Measuring the state size serializes the current conversation cycle and variables, so it should be enabled only when needed.
+Finished conversation cycles are not measured as nodes should not modify them.
+"""
+
+
+@dataclasses.dataclass
+class NodeMetrics:
+    # name of the executed node
+    node: str
+    wall_seconds: float
+    # CPU time of the thread executing the node, for coroutine nodes it includes other tasks running while node awaits
+    cpu_seconds: float
+    # change in approximate size of the state in bytes, see _state_size
+    state_size_delta: int
+
+
+class NodeTimer:
+    """
+    Measures one node execution, started before node function is executed with the state view it receives.
+    """
+
+    def __init__(self, state: State):
+        self._size = _state_size(state)
+        self._wall = time.perf_counter()
+        self._cpu = time.thread_time()
+
+    def stop(self, node: str, state: State) -> NodeMetrics:
+        wall_seconds = time.perf_counter() - self._wall
+        cpu_seconds = time.thread_time() - self._cpu
+        return NodeMetrics(node=node, wall_seconds=wall_seconds, cpu_seconds=cpu_seconds,
+                           state_size_delta=_state_size(state) - self._size)
+
+
+def record_node_metrics(hook: Callable[[NodeMetrics], None], metrics: NodeMetrics) -> None:
+    # instrumentation must never fail the conversation turn
+    try:
+        hook(metrics)
+    except Exception as e:
+        log.error(f"node metrics hook failed for node: {metrics.node}, error: {e}")
+
+
+class NodeMetricsAggregator:
+    """
+    Node metrics hook which aggregates metrics per node name in memory. It is safe to share between threads.
+    """
+
+    def __init__(self):
+        self._nodes: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, metrics: NodeMetrics) -> None:
+        with self._lock:
+            node = self._nodes.setdefault(metrics.node, {"executions": 0, "wall_seconds": 0.0, "max_wall_seconds": 0.0,
+                                                         "cpu_seconds": 0.0, "state_size_delta": 0})
+            node["executions"] += 1
+            node["wall_seconds"] += metrics.wall_seconds
+            node["max_wall_seconds"] = max(node["max_wall_seconds"], metrics.wall_seconds)
+            node["cpu_seconds"] += metrics.cpu_seconds
+            node["state_size_delta"] += metrics.state_size_delta
+
+    def summary(self) -> dict[str, dict]:
+        """
+        :return: totals per node name, sorted by total wall time descending
+        """
+        with self._lock:
+            nodes = sorted(self._nodes.items(), key=lambda item: item[1]["wall_seconds"], reverse=True)
+            return {name: dict(totals) for name, totals in nodes}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._nodes.clear()
+
+
+# approximate size of the current conversation cycle and variables as JSON
+def _state_size(state: State) -> int:
+    if not state or CHATBOT_STATE not in state:
+        return 0
+    chatbot_state = state[CHATBOT_STATE]
+    messages = chatbot_state[CONVERSATION_CYCLES][-1].messages
+    size = sum(_json_size(message.content) for message in messages)
+    return size + _json_size(chatbot_state[VARIABLES])
+
+
+def _json_size(value) -> int:
+    return len(json.dumps(value, ensure_ascii=False, default=str).encode("utf-8"))
@@ -0,0 +1,424 @@
+import asyncio
+import dataclasses
+import datetime
+import logging as log
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
+
+from langgraph.checkpoint.base import BaseCheckpointSaver, CheckpointTuple, copy_checkpoint
+from langgraph.checkpoint.base.id import uuid6
+
+from omnia_sdk.workflow.chatbot.chatbot_state import Message
+from omnia_sdk.workflow.chatbot.constants import CONFIGURABLE, ROLLBACK, TEXT, THREAD_ID, TYPE, USER
+from omnia_sdk.workflow.langgraph.chatbot.chatbot_graph import ChatbotFlow
+from omnia_sdk.workflow.tools.channels._context import DeliveryGuard, reset_delivery_guard, set_delivery_guard
+
+"""
+This module implements concurrent_session strategies (see chatbot_configuration.py) for local and self-hosted runs.
+Platform runtime enforces the strategy itself, while ChatbotFlow.run does not prevent two messages of the same session from
+being executed at the same time.
+
+Dispatchers accept inbound messages of many sessions:
+ - different sessions are executed in parallel, bounded by max_workers (threads) or max_concurrency (asyncio)
+ - messages of one session are executed one after another in the order they were submitted
+ - a worker executes one message and then yields, so one busy session can not starve the others
+
+With "rollback" strategy consecutive user text messages are merged into one message (texts joined with new lines):
+ - the first message of a session waits coalescing_window_ms for more messages before the graph is executed
+ - AsyncSessionDispatcher also supersedes executing turn if new text message arrives and the turn did not deliver any message
+   to the user yet. Execution is cancelled, session is rolled back to the checkpoint before the turn and the merged
+   message is executed instead. Node functions with side effects other than sending messages should be idempotent.
+SessionDispatcher can not cancel running threads, so it only merges messages which arrived before the execution started.
+
+Example:
+    with SessionDispatcher(chatbot=chatbot, max_workers=16) as dispatcher:
+        future = dispatcher.submit(message=message, config=config)
+        future.result()
+"""
+
+
+@dataclasses.dataclass(slots=True)
+class _Inbound:
+    message: Message
+    config: dict
+    future: Future | asyncio.Future
+    submitted_at: float
+
+
+class DispatcherStats:
+    """
+    Queue depth and wait time metrics of a dispatcher. Wait time is measured from submission until execution starts.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.processed = 0
+        self.failed = 0
+        # messages executed as part of a merged message, superseded turns
+        self.coalesced = 0
+        self.superseded = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.max_queue_depth = 0
+
+    def enqueued(self, queue_depth: int) -> None:
+        with self._lock:
+            self.max_queue_depth = max(self.max_queue_depth, queue_depth)
+
+    def started(self, wait_seconds: float) -> None:
+        with self._lock:
+            self.wait_seconds_total += wait_seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+
+    def finished(self, failed: bool, messages: int = 1) -> None:
+        with self._lock:
+            self.processed += messages
+            self.failed += messages if failed else 0
+            self.coalesced += messages - 1
+
+    def supersede(self) -> None:
+        with self._lock:
+            self.superseded += 1
+
+    def snapshot(self, queues: dict[str, deque]) -> dict:
+        with self._lock:
+            return {
+                "active_sessions": len(queues),
+                "queued_messages": sum(len(queue) for queue in queues.values()),
+                "max_queue_depth": self.max_queue_depth,
+                "processed": self.processed,
+                "failed": self.failed,
+                "coalesced": self.coalesced,
+                "superseded": self.superseded,
+                "wait_seconds_avg": self.wait_seconds_total / self.processed if self.processed else 0.0,
+                "wait_seconds_max": self.wait_seconds_max,
+            }
+
+
+# returns coalescing window in seconds, None if messages should not be merged
+def _coalescing_window(chatbot: ChatbotFlow) -> float | None:
+    configuration = chatbot.configuration
+    if configuration and configuration.concurrent_session == ROLLBACK:
+        return configuration.coalescing_window_ms / 1000
+    return None
+
+
+def _mergeable(message: Message) -> bool:
+    return message.role == USER and message.content.get(TYPE) == TEXT.upper() and isinstance(message.content.get(TEXT), str)
+
+
+# returns number of queued messages executed together, messages are merged only if all of them are text messages
+def _batch_size(queue: deque, coalesce: bool) -> int:
+    if not coalesce or not _mergeable(queue[0].message):
+        return 1
+    size = 1
+    while size < len(queue) and _mergeable(queue[size].message):
+        size += 1
+    return size
+
+
+def merge_messages(messages: list[Message]) -> Message:
+    """
+    Merges user text messages into one text message, texts are joined with new lines.
+    :param messages: in the order user sent them
+    :return: merged message with other content of the last message
+    """
+    if len(messages) == 1:
+        return messages[0]
+    content = {**messages[-1].content, TEXT: "\n".join(message.content[TEXT] for message in messages)}
+    return Message(role=messages[-1].role, content=content)
+
+
+async def _restore(checkpointer: BaseCheckpointSaver, session_id: str, checkpoint_tuple: CheckpointTuple | None) -> None:
+    """
+    Rolls the session back to the checkpoint by saving its copy as the latest checkpoint.
+    Writes of cancelled execution are not copied, so the graph is executed from the checkpoint as if it never happened.
+    Channel values are saved again as new versions, checkpointer may have pruned the stored values of the checkpoint while
+    the cancelled execution was saving newer checkpoints.
+    """
+    if checkpoint_tuple is None:
+        await checkpointer.adelete_thread(session_id)
+        return
+    latest = await checkpointer.aget_tuple({CONFIGURABLE: {THREAD_ID: session_id}})
+    latest_versions = latest.checkpoint["channel_versions"] if latest else {}
+    checkpoint = copy_checkpoint(checkpoint_tuple.checkpoint)
+    # new versions follow versions of the cancelled execution, nodes have seen them if they have seen the old ones
+    renamed = {}
+    for channel, version in checkpoint["channel_versions"].items():
+        current = max(version, latest_versions.get(channel, version))
+        renamed[channel, version] = checkpoint["channel_versions"][channel] = checkpointer.get_next_version(current, None)
+    for seen in checkpoint["versions_seen"].values():
+        for channel, version in seen.items():
+            seen[channel] = renamed.get((channel, version), version)
+    checkpoint["id"] = str(uuid6(clock_seq=checkpoint_tuple.metadata.get("step", -1)))
+    checkpoint["ts"] = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    await checkpointer.aput(checkpoint_tuple.config, checkpoint, {**checkpoint_tuple.metadata, "source": "fork"},
+                            dict(checkpoint["channel_versions"]))
+
+
+class SessionDispatcher:
+    """
+    Executes ChatbotFlow.run on a bounded thread pool, messages of one session are serialized via per-session queue.
+    """
+
+    def __init__(self, chatbot: ChatbotFlow, max_workers: int = 8):
+        """
+        :param chatbot: to execute messages with, its configuration defines concurrent session strategy
+        :param max_workers: maximum number of sessions executed at the same time
+        """
+        self.chatbot = chatbot
+        self.stats = DispatcherStats()
+        self._window = _coalescing_window(chatbot)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="session-dispatcher")
+        # queued messages per session id, session is present only while it has a message queued or executing
+        self._queues: dict[str, deque[_Inbound]] = {}
+        self._lock = threading.Lock()
+        # notified whenever a session has no more messages
+        self._session_done = threading.Condition(self._lock)
+
+    def submit(self, message: Message, config: dict) -> Future:
+        """
+        Queues the message for execution after previously submitted messages of the same session.
+        :param message: user message
+        :param config: channel and session parameters
+        :return: future which completes once the message is executed, with exception if execution failed
+        """
+        session_id = ChatbotFlow.get_session_id(config)
+        future = Future()
+        with self._lock:
+            queue = self._queues.get(session_id)
+            idle = queue is None
+            if idle:
+                queue = self._queues[session_id] = deque()
+            queue.append(_Inbound(message=message, config=config, future=future, submitted_at=time.perf_counter()))
+            self.stats.enqueued(len(queue))
+        if idle:
+            self._schedule(session_id=session_id, submitted_at=time.perf_counter())
+        return future
+
+    def queue_depth(self, session_id: str) -> int:
+        """
+        :return: number of messages of the session which are queued or executing
+        """
+        with self._lock:
+            return len(self._queues.get(session_id, ()))
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return self.stats.snapshot(self._queues)
+
+    # with rollback strategy the oldest message waits for coalescing window to pass, so later messages can be merged with it
+    def _schedule(self, session_id: str, submitted_at: float) -> None:
+        delay = submitted_at + self._window - time.perf_counter() if self._window else 0
+        if delay <= 0:
+            self._executor.submit(self._execute_next, session_id)
+            return
+        timer = threading.Timer(delay, self._executor.submit, args=(self._execute_next, session_id))
+        timer.daemon = True
+        timer.start()
+
+    # executes the oldest message(s) of the session and reschedules the session if it has more messages queued
+    def _execute_next(self, session_id: str) -> None:
+        with self._lock:
+            queue = self._queues[session_id]
+            batch = list(islice(queue, _batch_size(queue, coalesce=self._window is not None)))
+        started_at = time.perf_counter()
+        for inbound in batch:
+            self.stats.started(started_at - inbound.submitted_at)
+        running = [inbound for inbound in batch if inbound.future.set_running_or_notify_cancel()]
+        failed = False
+        try:
+            if running:
+                self.chatbot.run(message=merge_messages([inbound.message for inbound in running]), config=running[-1].config)
+                for inbound in running:
+                    inbound.future.set_result(None)
+        except BaseException as e:
+            failed = True
+            log.error(f"message execution failed for session-id: {session_id}, error: {e}")
+            for inbound in running:
+                inbound.future.set_exception(e)
+            # e.g. KeyboardInterrupt or SystemExit is raised after the session is released
+            if not isinstance(e, Exception):
+                raise
+        finally:
+            self.stats.finished(failed=failed, messages=len(batch))
+            # session must not stay busy whatever the outcome, otherwise its later messages and shutdown would wait forever
+            self._dequeue(session_id=session_id, queue=queue, executed=len(batch))
+
+    def _dequeue(self, session_id: str, queue: deque[_Inbound], executed: int) -> None:
+        with self._lock:
+            for _ in range(executed):
+                queue.popleft()
+            if not queue:
+                del self._queues[session_id]
+                self._session_done.notify_all()
+                return
+            submitted_at = queue[0].submitted_at
+        self._schedule(session_id=session_id, submitted_at=submitted_at)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stops worker threads, if wait is true queued messages are executed before the shutdown completes.
+        """
+        if wait:
+            with self._lock:
+                self._session_done.wait_for(lambda: not self._queues)
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self) -> "SessionDispatcher":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.shutdown(wait=True)
+
+
+class AsyncSessionDispatcher:
+    """
+    Executes ChatbotFlow.arun in the event loop, at most max_concurrency messages are executed at the same time.
+    Messages of one session are serialized via per-session queue. Dispatcher must be used within one event loop.
+    """
+
+    def __init__(self, chatbot: ChatbotFlow, max_concurrency: int = 64):
+        """
+        :param chatbot: to execute messages with, its configuration defines concurrent session strategy
+        :param max_concurrency: maximum number of sessions executed at the same time
+        """
+        self.chatbot = chatbot
+        self.stats = DispatcherStats()
+        self.max_concurrency = max_concurrency
+        self._window = _coalescing_window(chatbot)
+        self._semaphore: asyncio.Semaphore | None = None
+        self._queues: dict[str, deque[_Inbound]] = {}
+        # set when a new message of the session arrives, used to supersede executing turn
+        self._arrivals: dict[str, asyncio.Event] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    def submit(self, message: Message, config: dict) -> asyncio.Future:
+        """
+        Queues the message for execution after previously submitted messages of the same session.
+        Must be called from the event loop.
+
+        :param message: user message
+        :param config: channel and session parameters
+        :return: future which completes once the message is executed, with exception if execution failed
+        """
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        session_id = ChatbotFlow.get_session_id(config)
+        future = loop.create_future()
+        queue = self._queues.get(session_id)
+        idle = queue is None
+        if idle:
+            queue = self._queues[session_id] = deque()
+        queue.append(_Inbound(message=message, config=config, future=future, submitted_at=time.perf_counter()))
+        self.stats.enqueued(len(queue))
+        if idle:
+            task = loop.create_task(self._drain(session_id))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        elif session_id in self._arrivals:
+            self._arrivals[session_id].set()
+        return future
+
+    def queue_depth(self, session_id: str) -> int:
+        """
+        :return: number of messages of the session which are queued or executing
+        """
+        return len(self._queues.get(session_id, ()))
+
+    def metrics(self) -> dict:
+        return self.stats.snapshot(self._queues)
+
+    async def _drain(self, session_id: str) -> None:
+        queue = self._queues[session_id]
+        try:
+            while queue:
+                if self._window:
+                    await asyncio.sleep(queue[0].submitted_at + self._window - time.perf_counter())
+                # concurrency slot is released between messages so other sessions get their turn
+                async with self._semaphore:
+                    executed = await self._execute_next(session_id=session_id, queue=queue)
+                for _ in range(executed):
+                    queue.popleft()
+        finally:
+            # messages left in the queue if dispatcher task was cancelled will never be executed
+            for inbound in queue:
+                inbound.future.cancel()
+            del self._queues[session_id]
+            self._arrivals.pop(session_id, None)
+
+    # executes the oldest message(s) of the session and returns how many messages were executed
+    async def _execute_next(self, session_id: str, queue: deque[_Inbound]) -> int:
+        size = _batch_size(queue, coalesce=self._window is not None)
+        self._started(queue=queue, start=0, end=size)
+        failed, error = False, None
+        try:
+            if self._window is None:
+                if not queue[0].future.cancelled():
+                    await self.chatbot.arun(message=queue[0].message, config=queue[0].config)
+            else:
+                size = await self._execute_superseding(session_id=session_id, queue=queue, size=size)
+        except Exception as e:
+            failed, error = True, e
+            log.error(f"message execution failed for session-id: {session_id}, error: {e}")
+        for inbound in islice(queue, size):
+            if inbound.future.done():
+                continue
+            if failed:
+                inbound.future.set_exception(error)
+            else:
+                inbound.future.set_result(None)
+        self.stats.finished(failed=failed, messages=size)
+        return size
+
+    async def _execute_superseding(self, session_id: str, queue: deque[_Inbound], size: int) -> int:
+        """
+        Executes merged message and supersedes the execution while new text messages arrive and nothing was delivered.
+        :return: number of messages executed together
+        """
+        checkpointer = self.chatbot.workflow.checkpointer
+        checkpoint_tuple = await checkpointer.aget_tuple({CONFIGURABLE: {THREAD_ID: session_id}})
+        while True:
+            batch = [inbound for inbound in islice(queue, size) if not inbound.future.cancelled()]
+            if not batch:
+                return size
+            arrival = self._arrivals[session_id] = asyncio.Event()
+            guard = DeliveryGuard()
+            execution = asyncio.create_task(self._run_guarded(message=merge_messages([inbound.message for inbound in batch]),
+                                                              config=batch[-1].config, guard=guard))
+            arrived = asyncio.create_task(arrival.wait())
+            await asyncio.wait({execution, arrived}, return_when=asyncio.FIRST_COMPLETED)
+            arrived.cancel()
+            new_size = _batch_size(queue, coalesce=True)
+            if execution.done() or new_size == size or not guard.supersede():
+                await execution
+                return size
+            execution.cancel()
+            await asyncio.gather(execution, return_exceptions=True)
+            await _restore(checkpointer=checkpointer, session_id=session_id, checkpoint_tuple=checkpoint_tuple)
+            self.stats.supersede()
+            self._started(queue=queue, start=size, end=new_size)
+            size = new_size
+
+    async def _run_guarded(self, message: Message, config: dict, guard: DeliveryGuard) -> None:
+        token = set_delivery_guard(guard)
+        try:
+            await self.chatbot.arun(message=message, config=config)
+        finally:
+            reset_delivery_guard(token)
+
+    def _started(self, queue: deque[_Inbound], start: int, end: int) -> None:
+        started_at = time.perf_counter()
+        for inbound in islice(queue, start, end):
+            self.stats.started(started_at - inbound.submitted_at)
+
+    async def join(self) -> None:
+        """
+        Waits until all submitted messages are executed.
+        """
+        while self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -0,0 +1,378 @@
+from __future__ import annotations
+
+import asyncio
+import logging as log
+import random
+import sqlite3
+import threading
+import time
+from collections.abc import AsyncIterator, Callable, Iterator, Sequence
+from typing import Any
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+from omnia_sdk.workflow.langgraph.chatbot.chatbot_serializer import ChatbotStateSerializer
+
+"""
+This module provides persistent LangGraph checkpointer backed by SQLite, intended as MemorySaver replacement for local
+production-like runs. MemorySaver keeps every checkpoint of every session in process memory forever.
+
+SQLiteCheckpointer:
+ - stores only the latest max_checkpoints checkpoints per session, older checkpoints and unreferenced channel values are pruned
+ - evicts sessions idle for longer than ttl_seconds and executes session end callback (ChatbotFlow.on_session_end),
+   eviction runs in a background thread, so neither eviction nor callbacks add latency to writes of conversation turns
+ - uses WAL journal mode with connection per thread, so readers do not block each other or the writer
+
+Example:
+    checkpointer = SQLiteCheckpointer(path="checkpoints.db", max_checkpoints=5, ttl_seconds=24 * 3600)
+    chatbot = MyChatbot(checkpointer=checkpointer, configuration=configuration)
+    ...
+    checkpointer.close()
+"""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    checkpoint_type TEXT NOT NULL,
+    checkpoint BLOB NOT NULL,
+    metadata_type TEXT NOT NULL,
+    metadata BLOB NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    value_type TEXT NOT NULL,
+    value BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+);
+CREATE TABLE IF NOT EXISTS checkpoint_versions (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, channel)
+);
+CREATE INDEX IF NOT EXISTS checkpoint_versions_channel ON checkpoint_versions (thread_id, checkpoint_ns, channel, version);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    value_type TEXT NOT NULL,
+    value BLOB,
+    task_path TEXT NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    thread_id TEXT PRIMARY KEY,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_last_access ON sessions (last_access);
+"""
+
+
+class SQLiteCheckpointer(BaseCheckpointSaver[str]):
+
+    def __init__(self, path: str, max_checkpoints: int = 10, ttl_seconds: float | None = None,
+                 eviction_interval_seconds: float | None = 60, serde: SerializerProtocol | None = None,
+                 on_session_end: Callable[[str, dict], None] | None = None):
+        """
+        :param path: of the SQLite database file, created if it does not exist
+        :param max_checkpoints: number of the latest checkpoints kept per session, at least one
+        :param ttl_seconds: sessions idle for longer than this are evicted, sessions are never evicted if None
+        :param eviction_interval_seconds: how often idle sessions are evicted by the background thread, if None sessions are
+        evicted only by explicit evict_idle_sessions calls
+        :param serde: serializer for checkpoints and channel values, defaults to ChatbotStateSerializer
+        :param on_session_end: executed with session id and latest channel values of every evicted session
+        """
+        if max_checkpoints < 1:
+            raise ValueError("At least one checkpoint per session must be kept")
+        if eviction_interval_seconds is not None and eviction_interval_seconds <= 0:
+            raise ValueError("Eviction interval must be positive")
+        super().__init__(serde=serde if serde else ChatbotStateSerializer())
+        self.path = path
+        self.max_checkpoints = max_checkpoints
+        self.ttl_seconds = ttl_seconds
+        self.eviction_interval_seconds = eviction_interval_seconds
+        self.on_session_end = on_session_end
+        self._local = threading.local()
+        # SQLite allows single writer, writes from the same process are serialized here instead of waiting on busy timeout
+        self._write_lock = threading.Lock()
+        # only one eviction runs at a time, so session end callback is executed once per evicted session
+        self._eviction_lock = threading.Lock()
+        # connection of every thread, closed when the thread ended or by close
+        self._connections: dict[threading.Thread, sqlite3.Connection] = {}
+        self._connections_lock = threading.Lock()
+        self._closed = threading.Event()
+        with self._write_lock:
+            self._connection().executescript(_SCHEMA)
+        self._eviction_thread = None
+        if ttl_seconds is not None and eviction_interval_seconds is not None:
+            self._eviction_thread = threading.Thread(target=self._evict_periodically, name="omnia-checkpoint-eviction", daemon=True)
+            self._eviction_thread.start()
+
+    def close(self) -> None:
+        """
+        Stops the background eviction and closes connections of all threads. Checkpointer must not be used afterwards.
+        """
+        self._closed.set()
+        if self._eviction_thread and self._eviction_thread is not threading.current_thread():
+            self._eviction_thread.join()
+        with self._connections_lock:
+            connections, self._connections = self._connections, {}
+        for connection in connections.values():
+            connection.close()
+
+    def __enter__(self) -> SQLiteCheckpointer:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    # each thread gets its own connection, WAL mode lets readers run concurrently with the writer
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            if self._closed.is_set():
+                raise sqlite3.ProgrammingError("Checkpointer is closed")
+            # connection is used only by this thread, but it may be closed by another thread
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            with self._connections_lock:
+                # LangGraph writes checkpoints from short-lived executor threads, connections of ended threads are closed
+                for thread in [thread for thread in self._connections if not thread.is_alive()]:
+                    self._connections.pop(thread).close()
+                self._connections[threading.current_thread()] = connection
+        return connection
+
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        query = "SELECT * FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+        params = [thread_id, checkpoint_ns]
+        if checkpoint_id := get_checkpoint_id(config):
+            query += " AND checkpoint_id = ?"
+            params.append(checkpoint_id)
+        row = self._connection().execute(f"{query} ORDER BY checkpoint_id DESC LIMIT 1", params).fetchone()
+        return self._to_checkpoint_tuple(row) if row else None
+
+    def list(self, config: RunnableConfig | None, *, filter: dict[str, Any] | None = None, before: RunnableConfig | None = None,
+             limit: int | None = None) -> Iterator[CheckpointTuple]:
+        query = "SELECT * FROM checkpoints WHERE 1 = 1"
+        params = []
+        if config:
+            query += " AND thread_id = ?"
+            params.append(config["configurable"]["thread_id"])
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                query += " AND checkpoint_ns = ?"
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                query += " AND checkpoint_id = ?"
+                params.append(checkpoint_id)
+        if before and (before_checkpoint_id := get_checkpoint_id(before)):
+            query += " AND checkpoint_id < ?"
+            params.append(before_checkpoint_id)
+        rows = self._connection().execute(f"{query} ORDER BY thread_id, checkpoint_id DESC", params).fetchall()
+        for row in rows:
+            if limit is not None and limit <= 0:
+                break
+            metadata = self.serde.loads_typed((row[6], row[7]))
+            if filter and not all(value == metadata.get(key) for key, value in filter.items()):
+                continue
+            if limit is not None:
+                limit -= 1
+            yield self._to_checkpoint_tuple(row)
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+            new_versions: ChannelVersions) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_copy = checkpoint.copy()
+        values = checkpoint_copy.pop("channel_values")
+        blobs = []
+        for channel, version in new_versions.items():
+            value_type, value = self.serde.dumps_typed(values[channel]) if channel in values else ("empty", None)
+            blobs.append((thread_id, checkpoint_ns, channel, str(version), value_type, value))
+        versions = [(thread_id, checkpoint_ns, checkpoint["id"], channel, str(version))
+                    for channel, version in checkpoint["channel_versions"].items()]
+        checkpoint_type, checkpoint_bytes = self.serde.dumps_typed(checkpoint_copy)
+        metadata_type, metadata_bytes = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        with self._write_lock, self._transaction() as connection:
+            connection.executemany("INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?, ?)", blobs)
+            connection.execute("INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)", (
+                thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"), checkpoint_type,
+                checkpoint_bytes, metadata_type, metadata_bytes))
+            connection.executemany("INSERT OR REPLACE INTO checkpoint_versions VALUES (?, ?, ?, ?, ?)", versions)
+            connection.execute("INSERT OR REPLACE INTO sessions VALUES (?, ?)", (thread_id, time.time()))
+            self._prune(connection=connection, thread_id=thread_id, checkpoint_ns=checkpoint_ns)
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"]}}
+
+    def put_writes(self, config: RunnableConfig, writes: Sequence[tuple[str, Any]], task_id: str, task_path: str = "") -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            value_type, value_bytes = self.serde.dumps_typed(value)
+            rows.append((thread_id, checkpoint_ns, checkpoint_id, task_id, WRITES_IDX_MAP.get(channel, idx), channel, value_type,
+                         value_bytes, task_path))
+        # special writes (errors, interrupts) replace previous ones, regular writes are saved only once
+        with self._write_lock, self._transaction() as connection:
+            connection.executemany("INSERT OR REPLACE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", [r for r in rows if r[4] < 0])
+            connection.executemany("INSERT OR IGNORE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", [r for r in rows if r[4] >= 0])
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._write_lock, self._transaction() as connection:
+            self._delete_thread(connection=connection, thread_id=thread_id)
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config: RunnableConfig | None, *, filter: dict[str, Any] | None = None, before: RunnableConfig | None = None,
+                    limit: int | None = None) -> AsyncIterator[CheckpointTuple]:
+        checkpoint_tuples = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for checkpoint_tuple in checkpoint_tuples:
+            yield checkpoint_tuple
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                   new_versions: ChannelVersions) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config: RunnableConfig, writes: Sequence[tuple[str, Any]], task_id: str, task_path: str = "") -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    # versions must be comparable as strings so unreferenced blobs can be pruned, same format as in MemorySaver
+    def get_next_version(self, current: str | None, channel: None) -> str:
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    def evict_idle_sessions(self) -> list[str]:
+        """
+        Deletes sessions idle for longer than ttl_seconds. Session end callback is executed with the latest channel values of
+        every evicted session before its checkpoints are deleted.
+
+        :return: ids of evicted sessions
+        """
+        if self.ttl_seconds is None:
+            return []
+        with self._eviction_lock:
+            cutoff = time.time() - self.ttl_seconds
+            expired = [row[0] for row in self._connection().execute("SELECT thread_id FROM sessions WHERE last_access < ?", (cutoff,))]
+            return [thread_id for thread_id in expired if self._end_session(thread_id=thread_id, cutoff=cutoff)]
+
+    def _end_session(self, thread_id: str, cutoff: float) -> bool:
+        if self.on_session_end:
+            checkpoint_tuple = self.get_tuple({"configurable": {"thread_id": thread_id}})
+            try:
+                self.on_session_end(thread_id, checkpoint_tuple.checkpoint["channel_values"] if checkpoint_tuple else {})
+            # session is evicted regardless, otherwise failing callback would keep it forever
+            except Exception as e:
+                log.error(f"session end callback failed for session-id: {thread_id}, error: {e}")
+        with self._write_lock, self._transaction() as connection:
+            # user may have sent a message in the meantime
+            if connection.execute("SELECT 1 FROM sessions WHERE thread_id = ? AND last_access < ?", (thread_id, cutoff)).fetchone():
+                self._delete_thread(connection=connection, thread_id=thread_id)
+                return True
+        return False
+
+    def _evict_periodically(self) -> None:
+        while not self._closed.wait(self.eviction_interval_seconds):
+            try:
+                self.evict_idle_sessions()
+            except Exception as e:
+                log.error(f"Eviction of idle sessions failed, error: {e}")
+
+    # keeps the latest max_checkpoints checkpoints and the channel values they reference, checkpoints are not deserialized
+    def _prune(self, connection: sqlite3.Connection, thread_id: str, checkpoint_ns: str) -> None:
+        oldest_retained = connection.execute(
+            "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? ORDER BY checkpoint_id DESC LIMIT 1 OFFSET ?",
+            (thread_id, checkpoint_ns, self.max_checkpoints - 1)).fetchone()
+        if oldest_retained is None:
+            return
+        key = (thread_id, checkpoint_ns, oldest_retained[0])
+        for table in ("checkpoints", "checkpoint_versions", "writes"):
+            connection.execute(f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < ?", key)
+        # blobs older than the oldest version referenced by retained checkpoints are not referenced anymore,
+        # retained checkpoints are not ordered by versions if the session was rolled back to an older checkpoint
+        connection.execute(
+            "DELETE FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? AND version < ("
+            "SELECT MIN(version) FROM checkpoint_versions AS retained WHERE retained.thread_id = blobs.thread_id "
+            "AND retained.checkpoint_ns = blobs.checkpoint_ns AND retained.channel = blobs.channel)", (thread_id, checkpoint_ns))
+
+    @staticmethod
+    def _delete_thread(connection: sqlite3.Connection, thread_id: str) -> None:
+        for table in ("checkpoints", "checkpoint_versions", "blobs", "writes", "sessions"):
+            connection.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+
+    def _transaction(self) -> "_Transaction":
+        return _Transaction(self._connection())
+
+    def _to_checkpoint_tuple(self, row: tuple) -> CheckpointTuple:
+        thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id = row[:4]
+        checkpoint = self.serde.loads_typed((row[4], row[5]))
+        connection = self._connection()
+        channel_values = {}
+        for channel, version in checkpoint["channel_versions"].items():
+            blob = connection.execute(
+                "SELECT value_type, value FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                (thread_id, checkpoint_ns, channel, str(version))).fetchone()
+            if blob and blob[0] != "empty":
+                channel_values[channel] = self.serde.loads_typed(blob)
+        writes = connection.execute(
+            "SELECT task_id, channel, value_type, value FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? "
+            "ORDER BY task_id, idx", (thread_id, checkpoint_ns, checkpoint_id)).fetchall()
+        return CheckpointTuple(
+            config={"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}},
+            checkpoint={**checkpoint, "channel_values": channel_values},
+            metadata=self.serde.loads_typed((row[6], row[7])),
+            parent_config=({"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns,
+                                             "checkpoint_id": parent_checkpoint_id}} if parent_checkpoint_id else None),
+            pending_writes=[(task_id, channel, self.serde.loads_typed((value_type, value)))
+                            for task_id, channel, value_type, value in writes],
+        )
+
+
+class _Transaction:
+    """
+    Executes statements in a single SQLite transaction, rolled back on error.
+    """
+
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.connection.execute("BEGIN IMMEDIATE")
+        return self.connection
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.connection.execute("ROLLBACK" if exc_type else "COMMIT")
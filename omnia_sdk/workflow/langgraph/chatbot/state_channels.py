@@ -0,0 +1,193 @@
+import copy
+import dataclasses
+from typing import Annotated, Any
+
+from typing_extensions import TypedDict
+
+from omnia_sdk.workflow.chatbot.chatbot_state import ArchivedHistory, ChatbotState, ConversationCycle, Message
+"""
+This module defines how chatbot state is laid out in LangGraph channels.
+
+Users interact with the State view (single chatbot_state entry) via accessor methods in ChatbotFlow, while the graph
+stores parts of the chatbot state in separate channels:
+ - conversation_cycles: finished conversation cycles, written only when a new cycle starts
+ - messages: messages of the current cycle, appended with add reducer
+ - variables: user defined variables, merged with dict-merge reducer
+ - intent, user_language and archived_history: last value channels
+
+Checkpointer only serializes channels which were updated, so checkpoint writes scale with what node changed instead of
+the whole conversation history. NodeCheckpointer computes the deltas with StateTracker after each node execution.
+"""
+
+CHATBOT_STATE = "chatbot_state"
+VARIABLES = "variables"
+CONVERSATION_CYCLES = "conversation_cycles"
+ARCHIVED_HISTORY = "archived_history"
+MESSAGES = "messages"
+INTENT = "intent"
+_user_language = "user_language"
+
+
+@dataclasses.dataclass
+class Overwrite:
+    """
+    Update which replaces the value of reducer channel instead of reducing it, e.g. messages of a new conversation cycle.
+    """
+    value: Any
+
+
+def append_messages(messages: list[Message], update: list[Message] | Overwrite) -> list[Message]:
+    if isinstance(update, Overwrite):
+        return list(update.value)
+    return messages + update
+
+
+def merge_variables(variables: dict, update: dict | Overwrite) -> dict:
+    if isinstance(update, Overwrite):
+        return dict(update.value)
+    return variables | update
+
+
+"""
+It is highly recommended to use TypedDict for top level state objects in LangGraph.
+In theory dataclasses and Pydantic models are supported but reductions via Annotated do not work with those.
+This makes it inconvenient to observe state outside of graph and in turn resume execution with merge reduction.
+"""
+
+
+# this is the view of the state which node functions receive, see ChatbotFlow accessor methods
+class State(TypedDict):
+    chatbot_state: ChatbotState
+
+
+# this is how the state is stored in LangGraph channels
+class ChatbotChannels(TypedDict):
+    conversation_cycles: list[ConversationCycle]
+    messages: Annotated[list[Message], append_messages]
+    variables: Annotated[dict, merge_variables]
+    intent: str | None
+    user_language: str
+    archived_history: ArchivedHistory | None
+    # state of sessions checkpointed before the state was split into channels, migrated on first update
+    chatbot_state: ChatbotState | None
+
+
+def to_state(values: dict) -> State:
+    """
+    Assembles the State view from channel values. Returned state can be mutated without affecting channel values.
+
+    :param values: of LangGraph channels
+    :return: state view, empty dict if session has no state yet
+    """
+    if MESSAGES not in values:
+        legacy_state = values.get(CHATBOT_STATE)
+        return State(chatbot_state=legacy_state) if legacy_state else {}
+    current_cycle = ConversationCycle(messages=list(values[MESSAGES]), intent=values.get(INTENT))
+    chatbot_state = ChatbotState(conversation_cycles=list(values.get(CONVERSATION_CYCLES, [])) + [current_cycle],
+                                 user_language=values.get(_user_language), variables=dict(values.get(VARIABLES, {})))
+    if values.get(ARCHIVED_HISTORY):
+        chatbot_state[ARCHIVED_HISTORY] = values[ARCHIVED_HISTORY]
+    return State(chatbot_state=chatbot_state)
+
+
+def to_channels(chatbot_state: ChatbotState, values: dict) -> dict:
+    """
+    Returns channel updates which start a new conversation cycle with the chatbot state.
+    Variables are written only if they are not yet stored in the channel.
+
+    :param chatbot_state: with the new conversation cycle
+    :param values: current channel values
+    :return: updates of LangGraph channels
+    """
+    cycles = chatbot_state[CONVERSATION_CYCLES]
+    update = {
+        CONVERSATION_CYCLES: cycles[:-1],
+        MESSAGES: Overwrite(cycles[-1].messages),
+        INTENT: cycles[-1].intent,
+        _user_language: chatbot_state[_user_language],
+        ARCHIVED_HISTORY: chatbot_state.get(ARCHIVED_HISTORY),
+    }
+    if VARIABLES not in values:
+        update[VARIABLES] = Overwrite(chatbot_state[VARIABLES])
+    if values.get(CHATBOT_STATE):
+        update[CHATBOT_STATE] = None
+    return update
+
+
+class StateTracker:
+    """
+    Remembers the state view node received and computes channel updates from the changes node made.
+    Only the current conversation cycle, variables, language and archived history are tracked, finished cycles should not be
+    modified by nodes.
+    """
+
+    def __init__(self, values: dict):
+        self.state = to_state(values)
+        self._values = values
+        # legacy state is migrated to channels with full update
+        self._baseline = self._capture(self.state) if MESSAGES in values else None
+
+    @staticmethod
+    def _capture(state: State) -> dict:
+        chatbot_state = state[CHATBOT_STATE]
+        cycles = chatbot_state[CONVERSATION_CYCLES]
+        return {
+            CONVERSATION_CYCLES: list(cycles),
+            MESSAGES: list(cycles[-1].messages),
+            INTENT: cycles[-1].intent,
+            VARIABLES: copy.deepcopy(chatbot_state[VARIABLES]),
+            _user_language: chatbot_state[_user_language],
+            ARCHIVED_HISTORY: chatbot_state.get(ARCHIVED_HISTORY),
+        }
+
+    def delta(self, state: State | None = None) -> dict:
+        """
+        Returns channel updates for the changes made to the state view.
+        :param state: view modified by the node, defaults to the view node received
+        :return: updates of LangGraph channels
+        """
+        state = self.state if state is None else state
+        if not state or CHATBOT_STATE not in state:
+            return {}
+        chatbot_state = state[CHATBOT_STATE]
+        if self._baseline is None:
+            return to_channels(chatbot_state=chatbot_state, values=self._values)
+        baseline = self._baseline
+        cycles = chatbot_state[CONVERSATION_CYCLES]
+        update = {}
+        if not _same_items(cycles[:-1], baseline[CONVERSATION_CYCLES][:-1]):
+            update[CONVERSATION_CYCLES] = cycles[:-1]
+        messages = cycles[-1].messages
+        previous_messages = baseline[MESSAGES]
+        if cycles[-1] is not baseline[CONVERSATION_CYCLES][-1] or not _same_items(messages[:len(previous_messages)], previous_messages):
+            update[MESSAGES] = Overwrite(messages)
+        elif len(messages) > len(previous_messages):
+            update[MESSAGES] = messages[len(previous_messages):]
+        if cycles[-1].intent != baseline[INTENT]:
+            update[INTENT] = cycles[-1].intent
+        variables_update = _variables_delta(chatbot_state[VARIABLES], baseline[VARIABLES])
+        if variables_update:
+            update[VARIABLES] = variables_update
+        if chatbot_state[_user_language] != baseline[_user_language]:
+            update[_user_language] = chatbot_state[_user_language]
+        if chatbot_state.get(ARCHIVED_HISTORY) is not baseline[ARCHIVED_HISTORY]:
+            update[ARCHIVED_HISTORY] = chatbot_state.get(ARCHIVED_HISTORY)
+        return update
+
+
+def _same_items(items: list, previous_items: list) -> bool:
+    return len(items) == len(previous_items) and all(item is previous for item, previous in zip(items, previous_items))
+
+
+def _variables_delta(variables: dict, previous_variables: dict) -> dict | Overwrite | None:
+    if previous_variables.keys() - variables.keys():
+        return Overwrite(variables)
+    return {k: v for k, v in variables.items() if k not in previous_variables or _changed(v, previous_variables[k])}
+
+
+def _changed(value: Any, previous_value: Any) -> bool:
+    try:
+        return bool(value != previous_value)
+    # values which can not be compared (e.g. arrays) are written every time
+    except Exception:
+        return True
@@ -1,23 +1,42 @@
 import asyncio
+import logging as log
+import time
+from collections.abc import AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable, Iterator
 from typing import Any
 
-import requests
 from google import genai
 from google.genai.types import ContentListUnion, GenerateContentConfig, GenerateContentResponse, HttpOptions
 from openai import AsyncOpenAI, OpenAI
 from openai.types.chat import ChatCompletion
+from pydantic import BaseModel
 
 from omnia_sdk.workflow.chatbot.constants import CONFIGURABLE, THREAD_ID, WORKFLOW_ID, WORKFLOW_VERSION
 from omnia_sdk.workflow.tools.ai.constants import SESSION_ID_HEADER, WORKFLOW_ID_HEADER, WORKFLOW_VERSION_HEADER
 from omnia_sdk.workflow.tools.ai.llm_models import ChatSessionRequest, ChatSessionResponse, IntentInstruction
+from omnia_sdk.workflow.tools.ai.prompts.completion_cache import (
+    CHAT_COMPLETIONS,
+    GOOGLE_GENERATE_CONTENT,
+    CompletionCache,
+    completion_key,
+    get_completion_cache,
+    get_completion_cache_stats,
+)
+from omnia_sdk.workflow.tools.ai.prompts.intent_classifier import LocalIntentClassifier
 from omnia_sdk.workflow.tools.channels.config import INFOBIP_API_KEY, INFOBIP_BASE_URL
-from omnia_sdk.workflow.tools.rest.exceptions import ApplicationError
-from omnia_sdk.workflow.tools.rest.retryable_http_client import retryable_request
+from omnia_sdk.workflow.tools.rest import http_sessions
+from omnia_sdk.workflow.tools.rest.deadline import check_deadline, get_remaining_seconds
+from omnia_sdk.workflow.tools.rest.exceptions import ApplicationError, DeadlineExceededError
+from omnia_sdk.workflow.tools.rest.http_metrics import HttpCallRecorder, start_http_call
+from omnia_sdk.workflow.tools.rest.rate_limiter import GPT_CREATOR, get_api_limiter_by_family, is_overloaded
+from omnia_sdk.workflow.tools.rest.retryable_http_client import retryable_request, retryable_request_async
 
 default_headers = {"Authorization": f"App {INFOBIP_API_KEY}"}
 
-openai_client = OpenAI(api_key="", base_url=f"{INFOBIP_BASE_URL}/gpt-creator/omnia/openai/v1", default_headers=default_headers)
-openai_client_async = AsyncOpenAI(api_key="", base_url=f"{INFOBIP_BASE_URL}/gpt-creator/omnia/openai/v1", default_headers=default_headers)
+# requests are authorized with Infobip API key in default headers, OpenAI client requires non-empty api_key
+openai_client = OpenAI(api_key="dummy_api_key", base_url=f"{INFOBIP_BASE_URL}/gpt-creator/omnia/openai/v1",
+                       default_headers=default_headers)
+openai_client_async = AsyncOpenAI(api_key="dummy_api_key", base_url=f"{INFOBIP_BASE_URL}/gpt-creator/omnia/openai/v1",
+                                  default_headers=default_headers)
 
 google_client = client = genai.Client(
     api_key="dummy_api_key",
@@ -26,35 +45,41 @@ google_client = client = genai.Client(
 
 
 def google_generate_content(
-    model: str, contents: ContentListUnion, config: dict, google_config: GenerateContentConfig | None = None
+    model: str, contents: ContentListUnion, config: dict, google_config: GenerateContentConfig | None = None, use_cache: bool = True
 ) -> GenerateContentResponse:
     """
     Sends request to Infobip's Google Gemini endpoint to generate content.
+    Response is cached if completion cache is set and temperature is 0, see completion_cache.py.
     
     :param config: channel and session details
     :param google_config: optional Google Gemini configuration
-    :param kwargs: additional parameters for the request
+    :param use_cache: whether response may be served from and stored to the completion cache
     """
-    google_config = _add_headers(google_config, config)
-    return client.models.generate_content(model=model, contents=contents, config=google_config)
+    key = _google_cache_key(use_cache, model, contents, google_config)
+    return _cached(GOOGLE_GENERATE_CONTENT, key, GenerateContentResponse, lambda: _limited(
+        lambda: client.models.generate_content(model=model, contents=contents, config=_add_deadline(_add_headers(google_config, config))),
+        endpoint=_google_endpoint(model), request=contents
+    ))
 
 
 async def google_generate_content_async(
-    model: str, contents: ContentListUnion, config: dict, google_config: GenerateContentConfig | None = None
+    model: str, contents: ContentListUnion, config: dict, google_config: GenerateContentConfig | None = None, use_cache: bool = True
 ) -> GenerateContentResponse:
     """
     Sends async request to Infobip's Google Gemini endpoint to generate content.
-    
-    :param config: channel and session details
-    :param google_config: optional Google Gemini configuration
-    :param kwargs: additional parameters for the request
+    See google_generate_content pydocs for params.
     """
-    google_config = _add_headers(google_config, config)
-    return await client.aio.models.generate_content(model=model, contents=contents, config=google_config)
+    key = _google_cache_key(use_cache, model, contents, google_config)
+    return await _cached_async(GOOGLE_GENERATE_CONTENT, key, GenerateContentResponse, lambda: _limited_async(
+        lambda: client.aio.models.generate_content(
+            model=model, contents=contents, config=_add_deadline(_add_headers(google_config, config))
+        ),
+        endpoint=_google_endpoint(model), request=contents
+    ))
 
 
 def chat_completions(
-    messages: list, config: dict, model: str = None, extract_params: bool = False, **chat_completions_params
+    messages: list, config: dict, model: str = None, extract_params: bool = False, use_cache: bool = True, **chat_completions_params
 ) -> ChatCompletion:
     """
     Sends request to Infobip's chat completions endpoint which should be 1/1 compatible with OpenAI's chat completions endpoint.
@@ -62,54 +87,119 @@ def chat_completions(
     # TODO see models here ...
 
     Extract params feature is also supported on this endpoint, see the chat_session pydocs for details.
+    Response is cached if completion cache is set, temperature is 0 and no tools are given, see completion_cache.py.
 
     :param messages: OpenAI like messages list
     :param model: OpenAI or Gemini model
     :param extract_params: whether to extract params from llm response
     :param config: channel and session details
+    :param use_cache: whether response may be served from and stored to the completion cache
     :param chat_completions_params: OpenAI like chat completions parameters
     :return: ChatCompletion model instance
     """
+    key = _openai_cache_key(use_cache, messages, model, extract_params, chat_completions_params)
     try:
-        return openai_client.chat.completions.create(
-            messages=messages, model=model, extra_headers=_prepare_headers(config), extra_body={"extract_params": extract_params},
-            **chat_completions_params
-        )
+        return _cached(CHAT_COMPLETIONS, key, ChatCompletion, lambda: _limited(
+            lambda: _bound_by_deadline(openai_client).chat.completions.create(
+                messages=messages, model=model, extra_headers=_prepare_headers(config), extra_body={"extract_params": extract_params},
+                **chat_completions_params
+            ), endpoint=_openai_endpoint(), request=messages
+        ))
     except Exception as e:
-        raise ApplicationError(code=500, message=str(e))
+        raise _to_application_error(e)
 
 
 async def chat_completions_async(
-    messages: list, config: dict, model: str = None, extract_params: bool = False, **chat_completions_params
+    messages: list, config: dict, model: str = None, extract_params: bool = False, use_cache: bool = True, **chat_completions_params
 ) -> ChatCompletion:
     """
     Sends request to Infobip's chat completions endpoint asynchronously, returning coroutine.
     See chat_completions pydocs for API details.
     """
+    key = _openai_cache_key(use_cache, messages, model, extract_params, chat_completions_params)
     try:
-        return await openai_client_async.chat.completions.create(
-            messages=messages,
-            model=model,
-            extra_headers=_prepare_headers(config),
-            extra_body={"extract_params": extract_params},
-            **chat_completions_params,
-        )
+        return await _cached_async(CHAT_COMPLETIONS, key, ChatCompletion, lambda: _limited_async(
+            lambda: _bound_by_deadline(openai_client_async).chat.completions.create(
+                messages=messages,
+                model=model,
+                extra_headers=_prepare_headers(config),
+                extra_body={"extract_params": extract_params},
+                **chat_completions_params,
+            ), endpoint=_openai_endpoint(), request=messages))
     except Exception as e:
-        raise ApplicationError(code=500, message=str(e))
+        raise _to_application_error(e)
+
+
+def chat_completions_stream(
+    messages: list, config: dict, model: str = None, extract_params: bool = False, **chat_completions_params
+) -> Iterator[str]:
+    """
+    Streams response of Infobip's chat completions endpoint, yielding text as it is generated instead of waiting for the complete
+    response. Use it with ChatbotFlow.stream_text_response to show the reply to the user while it is being generated.
+    Request is sent once iteration starts, errors are raised as ApplicationError.
+    See chat_completions pydocs for params.
+
+    :return: iterator of text deltas
+    """
+    return _limited_stream(lambda: _bound_by_deadline(openai_client).chat.completions.create(
+        messages=messages, model=model, extra_headers=_prepare_headers(config), extra_body={"extract_params": extract_params}, stream=True,
+        **chat_completions_params
+    ), text=_openai_delta, endpoint=_openai_endpoint(), request=messages)
+
+
+def chat_completions_stream_async(
+    messages: list, config: dict, model: str = None, extract_params: bool = False, **chat_completions_params
+) -> AsyncIterator[str]:
+    """
+    Asynchronous version of chat_completions_stream, to be iterated with async for.
+    See chat_completions pydocs for params.
+    """
+    return _limited_stream_async(lambda: _bound_by_deadline(openai_client_async).chat.completions.create(
+        messages=messages, model=model, extra_headers=_prepare_headers(config), extra_body={"extract_params": extract_params}, stream=True,
+        **chat_completions_params
+    ), text=_openai_delta, endpoint=_openai_endpoint(), request=messages)
+
+
+def google_generate_content_stream(
+    model: str, contents: ContentListUnion, config: dict, google_config: GenerateContentConfig | None = None
+) -> Iterator[str]:
+    """
+    Streams content generated by Infobip's Google Gemini endpoint, yielding text as it is generated.
+    See google_generate_content pydocs for params and chat_completions_stream pydocs for details.
+
+    :return: iterator of text deltas
+    """
+    return _limited_stream(
+        lambda: client.models.generate_content_stream(model=model, contents=contents,
+                                                      config=_add_deadline(_add_headers(google_config, config))),
+        text=_google_delta, endpoint=_google_endpoint(model, action="streamGenerateContent"), request=contents
+    )
+
+
+def google_generate_content_stream_async(
+    model: str, contents: ContentListUnion, config: dict, google_config: GenerateContentConfig | None = None
+) -> AsyncIterator[str]:
+    """
+    Asynchronous version of google_generate_content_stream, to be iterated with async for.
+    """
+    return _limited_stream_async(
+        lambda: client.aio.models.generate_content_stream(model=model, contents=contents,
+                                                          config=_add_deadline(_add_headers(google_config, config))),
+        text=_google_delta, endpoint=_google_endpoint(model, action="streamGenerateContent"), request=contents
+    )
 
 
 async def batch_chat_completions(chat_completion_requests: list[dict[str, Any]], config: dict) -> list[ChatCompletion]:
     """
     Run multiple chat completion requests concurrently.
-    This invocation should be wrapped with asyncio.run() to generate event loop as the runtime environment is synchronous.
+    Inside coroutine node functions (graph executed with ChatbotFlow.arun) this invocation should be simply awaited.
+    Inside synchronous node functions it should be wrapped with asyncio.run() to generate event loop.
 
     Example invocation:
-        import asyncio
-        ...
         cats = [{"role": "user","content": "Tell me joke about cats"}]
         dogs = [{"role": "user","content": "Tell me joke about dogs"}]
         tasks = [{'messages': cats}, {'messages': dogs}]
-        foo = asyncio.run(batch_chat_completions(chat_completion_requests=tasks))
+        foo = await batch_chat_completions(chat_completion_requests=tasks, config=config)
         print([f.choices[0].message.content for f in foo])
 
     Each request dict should include:
@@ -121,6 +211,7 @@ async def batch_chat_completions(chat_completion_requests: list[dict[str, Any]],
 
     return: List of ChatCompletion objects, in the same order as the requests.
     """
+    recorder = start_http_call(endpoint=f"{_openai_endpoint()}:batch", method="batch")
     tasks = [
         chat_completions_async(
             messages=req["messages"],
@@ -130,7 +221,14 @@ async def batch_chat_completions(chat_completion_requests: list[dict[str, Any]],
             **{k: v for k, v in req.items() if k not in {"messages", "model", "extract_params"}},
         ) for req in chat_completion_requests
     ]
-    return await asyncio.gather(*tasks, return_exceptions=True)
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    if recorder:
+        # one attempt per request in the batch, each request is also recorded as chat completions call
+        # failed requests are raised as ApplicationError, which keeps the status in code
+        for result in results:
+            recorder.attempt(status_code=getattr(result, "code", None) if isinstance(result, Exception) else 200, response_bytes=0)
+        recorder.finish()
+    return results
 
 
 def chat_session(chat_session_request: ChatSessionRequest, config: dict) -> ChatSessionResponse:
@@ -167,10 +265,62 @@ def chat_session(chat_session_request: ChatSessionRequest, config: dict) -> Chat
       execute tool_call
       - call the endpoint with the result of the tool_call to persist the result, and optionally new user message
 
+    Responses are never served from the completion cache, the endpoint must record every exchange in its memory.
+
     :param config: with channel and session details
     :param chat_session_request: stateful chat completions request
     :return: ChatSessionResponse model instance
     """
+    response_body = retryable_request(x=http_sessions.post, config=config, **_chat_session_request(chat_session_request, config))
+    return ChatSessionResponse(**response_body)
+
+
+async def chat_session_async(chat_session_request: ChatSessionRequest, config: dict) -> ChatSessionResponse:
+    """
+    Sends request to Infobip's stateful chat completions endpoint asynchronously, returning coroutine.
+    See chat_session pydocs for API details.
+    """
+    response_body = await retryable_request_async(
+        x=http_sessions.post_async, config=config, **_chat_session_request(chat_session_request, config)
+    )
+    return ChatSessionResponse(**response_body)
+
+
+def detect_intent(intent_instruction: IntentInstruction, config: dict, classifier: LocalIntentClassifier | None = None) -> str:
+    """
+    Returns intent inferred for the message using GenAI tool.
+
+    :param config: with session and channel details
+    :param intent_instruction: prompt instructions for GenAI intent detection
+    :param classifier: classifies user_message of the instruction locally, GenAI tool is called only if it is not confident
+    :return: inferred intent, or ApplicationError in request failed after retries
+    """
+    if classifier and (intent := classifier.detect(intent_instruction)):
+        return intent
+    started = time.perf_counter()
+    response_body = retryable_request(x=http_sessions.post, config=config, **_detect_intent_request(intent_instruction, config))
+    if classifier:
+        classifier.record_llm(time.perf_counter() - started)
+    return response_body["response"]
+
+
+async def detect_intent_async(intent_instruction: IntentInstruction, config: dict, classifier: LocalIntentClassifier | None = None) -> str:
+    """
+    Returns intent inferred for the message using GenAI tool asynchronously, returning coroutine.
+    See detect_intent pydocs for API details.
+    """
+    if classifier and (intent := classifier.detect(intent_instruction)):
+        return intent
+    started = time.perf_counter()
+    response_body = await retryable_request_async(
+        x=http_sessions.post_async, config=config, **_detect_intent_request(intent_instruction, config)
+    )
+    if classifier:
+        classifier.record_llm(time.perf_counter() - started)
+    return response_body["response"]
+
+
+def _chat_session_request(chat_session_request: ChatSessionRequest, config: dict) -> dict:
     headers = _prepare_headers(config) | default_headers
     body = {
         "prompt": chat_session_request.prompt,
@@ -183,24 +333,288 @@ def chat_session(chat_session_request: ChatSessionRequest, config: dict) -> Chat
         "extract_params": chat_session_request.extract_params,
         **chat_session_request.chat_completions_params,
     }
-    url = f"{INFOBIP_BASE_URL}/gpt-creator/omnia/chat-session"
-    response_body = retryable_request(x=requests.post, config=config, url=url, json=body, headers=headers)
-    return ChatSessionResponse(**response_body)
+    return {"url": f"{INFOBIP_BASE_URL}/gpt-creator/omnia/chat-session", "json": body, "headers": headers}
 
 
-def detect_intent(intent_instruction: IntentInstruction, config: dict) -> str:
-    """
-    Returns intent inferred for the message using GenAI tool.
-
-    :param config: with session and channel details
-    :param intent_instruction: prompt instructions for GenAI intent detection
-    :return: inferred intent, or ApplicationError in request failed after retries
-    """
+def _detect_intent_request(intent_instruction: IntentInstruction, config: dict) -> dict:
     session_id = config[CONFIGURABLE][THREAD_ID]
     headers = {SESSION_ID_HEADER: session_id} | default_headers
     url = f"{INFOBIP_BASE_URL}/gpt-creator/omnia/2/intent"
-    response_body = retryable_request(x=requests.post, config=config, url=url, json=intent_instruction.model_dump(), headers=headers)
-    return response_body["response"]
+    return {"url": url, "json": intent_instruction.model_dump(), "headers": headers}
+
+
+# returns response from the completion cache, key is None if request must not be cached
+def _cached(api: str, key: str | None, response_type: type[BaseModel], call: Callable[[], Any]) -> Any:
+    cache = get_completion_cache()
+    if cache is None or key is None:
+        if cache is not None:
+            get_completion_cache_stats().record(api, "bypassed")
+        return call()
+    cached = _cache_get(cache, api, key, response_type)
+    if cached is not None:
+        return cached
+    response = call()
+    _cache_set(cache, key, response)
+    return response
+
+
+async def _cached_async(api: str, key: str | None, response_type: type[BaseModel], call: Callable[[], Awaitable[Any]]) -> Any:
+    cache = get_completion_cache()
+    if cache is None or key is None:
+        if cache is not None:
+            get_completion_cache_stats().record(api, "bypassed")
+        return await call()
+    cached = _cache_get(cache, api, key, response_type)
+    if cached is not None:
+        return cached
+    response = await call()
+    _cache_set(cache, key, response)
+    return response
+
+
+# failing cache must not fail the LLM call
+def _cache_get(cache: CompletionCache, api: str, key: str, response_type: type[BaseModel]) -> Any:
+    try:
+        value = cache.get(key)
+        response = response_type.model_validate_json(value) if value is not None else None
+    except Exception as e:
+        log.error(f"Completion cache read failed for {api}, error: {e}")
+        response = None
+    get_completion_cache_stats().record(api, "hits" if response is not None else "misses")
+    return response
+
+
+def _cache_set(cache: CompletionCache, key: str, response: BaseModel) -> None:
+    try:
+        cache.set(key, response.model_dump_json())
+    except Exception as e:
+        log.error(f"Completion cache write failed, error: {e}")
+
+
+def _openai_cache_key(use_cache: bool, messages: list, model: str | None, extract_params: bool, params: dict) -> str | None:
+    if not use_cache or get_completion_cache() is None:
+        return None
+    if params.get("temperature") != 0 or params.get("tools") or params.get("functions") or params.get("n", 1) != 1:
+        return None
+    return completion_key(CHAT_COMPLETIONS, model=model, messages=messages, extract_params=extract_params, params=params)
+
+
+def _google_cache_key(use_cache: bool, model: str, contents: ContentListUnion, google_config: GenerateContentConfig | None) -> str | None:
+    if not use_cache or get_completion_cache() is None:
+        return None
+    if google_config is None or google_config.temperature != 0 or google_config.tools:
+        return None
+    # http options carry session headers and timeouts which do not change the response
+    generation_config = google_config.model_dump(mode="json", exclude_none=True, exclude={"http_options"})
+    return completion_key(GOOGLE_GENERATE_CONTENT, model=model, contents=contents, config=generation_config)
+
+
+# LLM calls share concurrency limit of gpt-creator API with chat_session, detect_intent and RAG, see rate_limiter.py
+def _limited(call: Callable[[], Any], endpoint: str, request: Any) -> Any:
+    recorder = start_http_call(endpoint=endpoint, method="sdk", request={"json": request})
+    limiter = get_api_limiter_by_family(GPT_CREATOR)
+    overloaded = None
+    try:
+        if limiter:
+            limiter.acquire()
+        try:
+            result = call()
+        except Exception as error:
+            overloaded = _is_overloaded(error)
+            _record_attempt(recorder, error=error)
+            raise
+        finally:
+            if limiter:
+                limiter.release(overloaded=overloaded)
+        _record_attempt(recorder, result=result)
+        return result
+    except BaseException as error:
+        if recorder:
+            recorder.finish(error)
+            recorder = None
+        raise
+    finally:
+        if recorder:
+            recorder.finish()
+
+
+async def _limited_async(call: Callable[[], Awaitable[Any]], endpoint: str, request: Any) -> Any:
+    recorder = start_http_call(endpoint=endpoint, method="sdk", request={"json": request})
+    limiter = get_api_limiter_by_family(GPT_CREATOR)
+    overloaded = None
+    try:
+        if limiter:
+            await limiter.acquire_async()
+        try:
+            result = await call()
+        except Exception as error:
+            overloaded = _is_overloaded(error)
+            _record_attempt(recorder, error=error)
+            raise
+        finally:
+            if limiter:
+                limiter.release(overloaded=overloaded)
+        _record_attempt(recorder, result=result)
+        return result
+    except BaseException as error:
+        if recorder:
+            recorder.finish(error)
+            recorder = None
+        raise
+    finally:
+        if recorder:
+            recorder.finish()
+
+
+# permit of the concurrency limit is held until the stream is consumed or closed
+def _limited_stream(open_stream: Callable[[], Iterable], text: Callable[[Any], str | None], endpoint: str, request: Any) -> Iterator[str]:
+    recorder = start_http_call(endpoint=endpoint, method="sdk_stream", request={"json": request})
+    limiter = get_api_limiter_by_family(GPT_CREATOR)
+    stream = _StreamOutcome()
+    try:
+        if limiter:
+            try:
+                limiter.acquire()
+            except Exception as error:
+                stream.error = error
+                raise
+        stream.started = True
+        try:
+            for chunk in open_stream():
+                delta = text(chunk)
+                if delta:
+                    stream.response_bytes += len(delta.encode("utf-8"))
+                    yield delta
+            stream.completed = True
+        except Exception as error:
+            stream.error = error
+            raise _to_application_error(error)
+        finally:
+            if limiter:
+                limiter.release(overloaded=stream.overloaded())
+    finally:
+        stream.finish(recorder)
+
+
+async def _limited_stream_async(
+    open_stream: Callable[[], Awaitable[AsyncIterable]], text: Callable[[Any], str | None], endpoint: str, request: Any
+) -> AsyncIterator[str]:
+    recorder = start_http_call(endpoint=endpoint, method="sdk_stream", request={"json": request})
+    limiter = get_api_limiter_by_family(GPT_CREATOR)
+    stream = _StreamOutcome()
+    try:
+        if limiter:
+            try:
+                await limiter.acquire_async()
+            except Exception as error:
+                stream.error = error
+                raise
+        stream.started = True
+        try:
+            async for chunk in await open_stream():
+                delta = text(chunk)
+                if delta:
+                    stream.response_bytes += len(delta.encode("utf-8"))
+                    yield delta
+            stream.completed = True
+        except Exception as error:
+            stream.error = error
+            raise _to_application_error(error)
+        finally:
+            if limiter:
+                limiter.release(overloaded=stream.overloaded())
+    finally:
+        stream.finish(recorder)
+
+
+class _StreamOutcome:
+    __slots__ = ("started", "completed", "response_bytes", "error")
+
+    def __init__(self):
+        # false if stream was not opened because limit was not acquired
+        self.started = False
+        self.completed = False
+        self.response_bytes = 0
+        self.error: Exception | None = None
+
+    # stream closed by the consumer before the end says nothing about the load
+    def overloaded(self) -> bool | None:
+        if self.error:
+            return _is_overloaded(self.error)
+        return False if self.completed else None
+
+    def finish(self, recorder: HttpCallRecorder | None) -> None:
+        if recorder is None:
+            return
+        if self.started:
+            recorder.attempt(status_code=_status_code(self.error) if self.error else 200, response_bytes=self.response_bytes)
+        recorder.finish(self.error)
+
+
+def _openai_delta(chunk) -> str | None:
+    # the last chunk may contain only usage without choices
+    return chunk.choices[0].delta.content if chunk.choices else None
+
+
+def _google_delta(chunk: GenerateContentResponse) -> str | None:
+    return chunk.text
+
+
+def _record_attempt(recorder: HttpCallRecorder | None, result: Any = None, error: Exception | None = None) -> None:
+    if recorder is None:
+        return
+    if error is not None:
+        status_code = _status_code(error)
+        recorder.attempt(status_code=status_code, response_bytes=0)
+        return
+    # SDK responses are pydantic models, size of their JSON approximates size of the response body
+    dump = getattr(result, "model_dump_json", None)
+    recorder.attempt(status_code=200, response_bytes=len(dump().encode("utf-8")) if dump else 0)
+
+
+def _openai_endpoint() -> str:
+    return f"{openai_client.base_url}chat/completions"
+
+
+def _google_endpoint(model: str, action: str = "generateContent") -> str:
+    return f"{INFOBIP_BASE_URL}/gpt-creator/omnia/google/v1/models/{model}:{action}"
+
+
+# OpenAI errors have status_code, Gemini errors code, errors without status (e.g. timeouts) are treated as overload
+def _is_overloaded(error: Exception) -> bool | None:
+    return is_overloaded(_status_code(error))
+
+
+def _status_code(error: Exception) -> int | None:
+    status_code = getattr(error, "status_code", getattr(error, "code", None))
+    return status_code if isinstance(status_code, int) else None
+
+
+# client with timeout shrunk to the remaining turn budget, retries are not attempted since they could not finish in time
+def _bound_by_deadline(openai: OpenAI | AsyncOpenAI) -> OpenAI | AsyncOpenAI:
+    remaining = check_deadline()
+    return openai if remaining is None else openai.with_options(timeout=remaining, max_retries=0)
+
+
+def _to_application_error(error: Exception) -> ApplicationError:
+    if isinstance(error, ApplicationError):
+        return error
+    remaining = get_remaining_seconds()
+    if remaining is not None and remaining <= 0:
+        return DeadlineExceededError(message=str(error))
+    return ApplicationError(code=500, message=str(error))
+
+
+def _add_deadline(google_config: GenerateContentConfig) -> GenerateContentConfig:
+    remaining = check_deadline()
+    if remaining is None:
+        return google_config
+    timeout_ms = max(1, int(remaining * 1000))
+    if google_config.http_options.timeout is not None:
+        timeout_ms = min(google_config.http_options.timeout, timeout_ms)
+    # caller's config may be reused by later turns, timeout bound to this turn is set on a copy
+    http_options = google_config.http_options.model_copy(update={"timeout": timeout_ms})
+    return google_config.model_copy(update={"http_options": http_options})
 
 
 def _prepare_headers(config: dict) -> dict:
@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+from pydantic import BaseModel
+
+"""
+This module provides exact-match cache of LLM responses. Deterministic prompts (temperature 0) repeating across sessions, e.g.
+classification, slot extraction or FAQ rewording, are answered from the cache instead of a paid round trip.
+
+    set_completion_cache(InMemoryCompletionCache(max_entries=10_000, ttl_seconds=3600))
+
+Once cache is set, chat_completions and google_generate_content (and their async variants) use it automatically:
+ - key is SHA-256 hash of canonical JSON of the API, model, messages/contents and all sampling params
+ - requests with non-zero or unspecified temperature or tools bypass the cache
+ - chat_session is never cached, it keeps conversation memory on the server which must record every exchange
+ - caller may bypass the cache with use_cache=False
+
+Hit rate is reported by get_completion_cache_stats.
+"""
+
+CHAT_COMPLETIONS = "chat_completions"
+GOOGLE_GENERATE_CONTENT = "google_generate_content"
+
+
+class CompletionCache(ABC):
+    """
+    Storage of serialized LLM responses by cache key. Implementations must be safe to use from multiple threads.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> str | None:
+        """
+        :param key: cache key, see completion_key
+        :return: serialized response, None if there is no valid entry
+        """
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: str) -> None:
+        """
+        :param key: cache key, see completion_key
+        :param value: serialized response
+        """
+        pass
+
+    @abstractmethod
+    def clear(self) -> None:
+        pass
+
+
+class InMemoryCompletionCache(CompletionCache):
+    """
+    Process local LRU cache with TTL.
+    """
+
+    def __init__(self, max_entries: int = 10_000, ttl_seconds: float | None = 3600):
+        """
+        :param max_entries: least recently used entries are evicted above this size
+        :param ttl_seconds: entry lifetime, entries do not expire if None
+        """
+        if max_entries < 1:
+            raise ValueError("Cache must hold at least one entry")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # key -> (expires_at, value)
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: str) -> None:
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds is not None else float("inf")
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS completions (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS completions_expires_at ON completions (expires_at);
+"""
+
+
+class SQLiteCompletionCache(CompletionCache):
+    """
+    On-disk cache shared by worker processes on the same host and kept over restarts.
+    Expired entries are ignored on read and deleted with evict_expired. Connections are released with close.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 24 * 3600):
+        """
+        :param path: of the SQLite database file
+        :param ttl_seconds: entry lifetime
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+        self._connections_lock = threading.Lock()
+        self._connections: dict[threading.Thread, sqlite3.Connection] = {}
+        self._closed = False
+        self._connection().executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """
+        Closes connections of all threads. Cache must not be used afterwards.
+        """
+        with self._connections_lock:
+            self._closed = True
+            connections, self._connections = self._connections, {}
+        for connection in connections.values():
+            connection.close()
+
+    def __enter__(self) -> SQLiteCompletionCache:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    # connection per thread, in WAL mode readers do not block the writer
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # connection is used only by this thread, but it may be closed by another thread
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            with self._connections_lock:
+                if self._closed:
+                    connection.close()
+                    raise sqlite3.ProgrammingError("Completion cache is closed")
+                # connections of ended threads are closed
+                for thread in [thread for thread in self._connections if not thread.is_alive()]:
+                    self._connections.pop(thread).close()
+                self._connections[threading.current_thread()] = connection
+            self._local.connection = connection
+        return connection
+
+    def get(self, key: str) -> str | None:
+        row = self._connection().execute("SELECT value FROM completions WHERE key = ? AND expires_at > ?", (key, time.time())).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: str) -> None:
+        self._connection().execute("INSERT OR REPLACE INTO completions (key, value, expires_at) VALUES (?, ?, ?)",
+                                   (key, value, time.time() + self.ttl_seconds))
+
+    def clear(self) -> None:
+        self._connection().execute("DELETE FROM completions")
+
+    def evict_expired(self) -> int:
+        """
+        :return: number of deleted entries
+        """
+        return self._connection().execute("DELETE FROM completions WHERE expires_at <= ?", (time.time(), )).rowcount
+
+
+class CompletionCacheStats:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # api -> {"hits": int, "misses": int, "bypassed": int}
+        self._apis: dict[str, dict[str, int]] = {}
+
+    def record(self, api: str, outcome: str) -> None:
+        with self._lock:
+            counts = self._apis.setdefault(api, {"hits": 0, "misses": 0, "bypassed": 0})
+            counts[outcome] += 1
+
+    def summary(self) -> dict[str, dict]:
+        """
+        :return: hits, misses, bypassed requests and hit rate of cacheable requests per API
+        """
+        with self._lock:
+            summary = {api: dict(counts) for api, counts in self._apis.items()}
+        for counts in summary.values():
+            lookups = counts["hits"] + counts["misses"]
+            counts["hit_rate"] = counts["hits"] / lookups if lookups else 0.0
+        return summary
+
+    def reset(self) -> None:
+        with self._lock:
+            self._apis.clear()
+
+
+_cache: CompletionCache | None = None
+_stats = CompletionCacheStats()
+
+
+def set_completion_cache(cache: CompletionCache | None) -> None:
+    """
+    :param cache: used by LLM wrappers in chat.py, responses are not cached if None
+    """
+    global _cache
+    _cache = cache
+
+
+def get_completion_cache() -> CompletionCache | None:
+    return _cache
+
+
+def get_completion_cache_stats() -> CompletionCacheStats:
+    return _stats
+
+
+def completion_key(api: str, **request) -> str:
+    """
+    Returns hash of canonical JSON of the request, equal requests have equal keys regardless of dict ordering.
+    :param api: name of the LLM API
+    :param request: everything that determines the response, e.g. model, messages and sampling params
+    """
+    canonical = json.dumps({"api": api, **request}, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=_canonical)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _canonical(value):
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json", exclude_none=True)
+    if isinstance(value, (bytes, bytearray)):
+        return base64.b64encode(value).decode("ascii")
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=str)
+    return str(value)
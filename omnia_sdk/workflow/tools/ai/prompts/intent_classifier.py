@@ -0,0 +1,183 @@
+import dataclasses
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+
+from omnia_sdk.workflow.tools.ai.chat_utils import clean_text
+from omnia_sdk.workflow.tools.ai.llm_models import IntentInstruction
+
+"""
+This module provides local intent classifier which answers trivial messages ("yes", "menu", button postbacks) without calling
+the LLM intent endpoint. Messages are compared with example utterances of every intent by cosine similarity of TF-IDF weighted
+character n-grams and words. If the best intent is not confident enough, detect_intent falls back to the LLM.
+
+Classifier is built once, e.g. in the flow constructor, and passed to detect_intent:
+
+    self.intent_classifier = LocalIntentClassifier(intents=["order_status", "menu"], examples={"menu": ["main menu", "options"]})
+    ...
+    intent = detect_intent(intent_instruction, config, classifier=self.intent_classifier)
+
+Name of every intent is its example as well, so postback data equal to the intent name is always matched.
+How often the LLM was skipped and estimated latency saved is reported by classifier.stats.
+"""
+
+
+@dataclasses.dataclass
+class IntentMatch:
+    intent: str
+    # cosine similarity to the closest example of the intent
+    score: float
+    # difference to the score of the second best intent
+    margin: float
+
+
+class IntentClassifierStats:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.local = 0
+        self.llm = 0
+        self.local_seconds = 0.0
+        self.llm_seconds = 0.0
+
+    def record(self, local: bool, seconds: float) -> None:
+        with self._lock:
+            if local:
+                self.local += 1
+                self.local_seconds += seconds
+            else:
+                self.llm += 1
+                self.llm_seconds += seconds
+
+    def summary(self) -> dict:
+        """
+        :return: number of locally classified and LLM classified messages, share of skipped LLM calls and latency saved in seconds,
+        estimated from the average latency of LLM calls
+        """
+        with self._lock:
+            total = self.local + self.llm
+            average_llm_seconds = self.llm_seconds / self.llm if self.llm else 0.0
+            return {
+                "local": self.local,
+                "llm": self.llm,
+                "skipped_ratio": self.local / total if total else 0.0,
+                "average_llm_seconds": average_llm_seconds,
+                "saved_seconds": max(0.0, self.local * average_llm_seconds - self.local_seconds),
+            }
+
+
+class LocalIntentClassifier:
+
+    def __init__(self, intents: list[str], examples: dict[str, list[str]] | None = None, threshold: float = 0.8, margin: float = 0.1,
+                 ngram_range: tuple[int, int] = (2, 4)):
+        """
+        :param intents: which may be classified locally, usually IntentInstruction.intents
+        :param examples: example utterances per intent
+        :param threshold: minimum cosine similarity of the message and the closest example
+        :param margin: minimum difference between the best and the second best intent
+        :param ngram_range: lengths of character n-grams
+        """
+        examples = examples or {}
+        unknown = set(examples) - set(intents)
+        if unknown:
+            raise ValueError(f"Examples are given for unknown intents: {unknown}")
+        self.intents = list(intents)
+        self.threshold = threshold
+        self.margin = margin
+        self.ngram_range = ngram_range
+        self.stats = IntentClassifierStats()
+        utterances = [(index, text) for index, intent in enumerate(self.intents)
+                      for text in [intent, *examples.get(intent, [])]]
+        self._build_index(utterances)
+
+    # inverted index of L2 normalized TF-IDF vectors: entries of every term are stored contiguously, see _scores
+    def _build_index(self, utterances: list[tuple[int, str]]) -> None:
+        self._vocabulary: dict[str, int] = {}
+        rows, terms, counts = [], [], []
+        for row, (_, text) in enumerate(utterances):
+            for term, count in Counter(self._terms(text)).items():
+                rows.append(row)
+                terms.append(self._vocabulary.setdefault(term, len(self._vocabulary)))
+                counts.append(count)
+        rows, terms = np.array(rows, dtype=np.int64), np.array(terms, dtype=np.int64)
+        document_frequency = np.bincount(terms, minlength=len(self._vocabulary))
+        self._idf = np.log((1 + len(utterances)) / (1 + document_frequency)) + 1.0
+        weights = (1.0 + np.log(np.array(counts, dtype=np.float64))) * self._idf[terms]
+        norms = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=len(utterances)))
+        weights = weights / norms[rows]
+
+        order = np.argsort(terms, kind="stable")
+        self._rows, self._weights = rows[order], weights[order]
+        self._term_offsets = np.concatenate(([0], np.cumsum(document_frequency)))
+        self._row_intents = np.array([intent for intent, _ in utterances], dtype=np.int64)
+        self._utterances = len(utterances)
+
+    def _terms(self, text: str) -> list[str]:
+        # postback data usually separates words by underscores
+        words = clean_text(text.replace("_", " ")).lower().split()
+        padded = f" {' '.join(words)} "
+        low, high = self.ngram_range
+        ngrams = [padded[i:i + n] for n in range(low, high + 1) for i in range(len(padded) - n + 1)]
+        return ngrams + [f"w:{word}" for word in words]
+
+    # cosine similarity of the text to every example
+    def _scores(self, text: str) -> np.ndarray:
+        query = Counter(term for term in self._terms(text) if term in self._vocabulary)
+        if not query:
+            return np.zeros(self._utterances)
+        terms = np.fromiter((self._vocabulary[term] for term in query), dtype=np.int64, count=len(query))
+        weights = (1.0 + np.log(np.fromiter(query.values(), dtype=np.float64, count=len(query)))) * self._idf[terms]
+        weights /= np.linalg.norm(weights)
+        starts, lengths = self._term_offsets[terms], np.diff(self._term_offsets)[terms]
+        # positions of index entries of all query terms, without a loop over the terms
+        positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        products = self._weights[positions] * np.repeat(weights, lengths)
+        return np.bincount(self._rows[positions], weights=products, minlength=self._utterances)
+
+    def match(self, text: str) -> IntentMatch | None:
+        """
+        :param text: of the user message
+        :return: the most similar intent, None if text has nothing in common with any example
+        """
+        if not text or not text.strip():
+            return None
+        scores = self._scores(text)
+        best = np.zeros(len(self.intents))
+        np.maximum.at(best, self._row_intents, scores)
+        ranking = np.argsort(best)[::-1]
+        if best[ranking[0]] <= 0:
+            return None
+        second = best[ranking[1]] if len(ranking) > 1 else 0.0
+        return IntentMatch(intent=self.intents[ranking[0]], score=float(best[ranking[0]]), margin=float(best[ranking[0]] - second))
+
+    def classify(self, text: str, intents: list[str] | None = None) -> str | None:
+        """
+        :param text: of the user message
+        :param intents: allowed intents, e.g. IntentInstruction.intents, all intents of the classifier if None
+        :return: confidently matched intent, None if the LLM should classify the message
+        """
+        match = self.match(text)
+        if match is None or match.score < self.threshold or match.margin < self.margin:
+            return None
+        return match.intent if intents is None or match.intent in intents else None
+
+    def detect(self, intent_instruction: IntentInstruction) -> str | None:
+        """
+        Classifies user message of the instruction and records the outcome, see detect_intent.
+        :return: confidently matched intent, None if the LLM should classify the message
+        """
+        if not intent_instruction.user_message:
+            return None
+        started = time.perf_counter()
+        intent = self.classify(intent_instruction.user_message, intents=intent_instruction.intents)
+        if intent:
+            self.stats.record(local=True, seconds=time.perf_counter() - started)
+        return intent
+
+    def record_llm(self, seconds: float) -> None:
+        """
+        :param seconds: latency of the LLM classification, used to estimate latency saved by local classification
+        """
+        self.stats.record(local=False, seconds=seconds)
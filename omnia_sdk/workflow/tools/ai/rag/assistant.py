@@ -1,10 +1,10 @@
-import requests
-
 from omnia_sdk.workflow.chatbot.constants import CONFIGURABLE, THREAD_ID
 from omnia_sdk.workflow.tools.ai.constants import SESSION_ID_HEADER
 from omnia_sdk.workflow.tools.channels.config import INFOBIP_API_KEY, INFOBIP_BASE_URL
+from omnia_sdk.workflow.tools.rest import http_sessions
 from omnia_sdk.workflow.tools.rest.exceptions import ApplicationError
-from omnia_sdk.workflow.tools.rest.retryable_http_client import retryable_request
+from omnia_sdk.workflow.tools.rest.retryable_http_client import retryable_request, retryable_request_async
+from omnia_sdk.workflow.tools.rest.single_flight import single_flight_request, single_flight_request_async
 
 default_headers = {"Authorization": f"App {INFOBIP_API_KEY}"}
 
@@ -15,11 +15,12 @@ RAG pipeline should be built via portal or API (TODO details) before using this
 
 
 def assistant_response(message: str, assistant_id: str, config: dict, prompt_var: str = None, context: str = None,
-                       error_message: str = None, language: str = None) -> str:
+                       error_message: str = None, language: str = None, single_flight: bool = False) -> str:
     """
     Calls pre-built RAG assistant endpoint for the user's message.
     In an event of unlikely error, the error_message will be returned.
     If no error message is specified, ApplicationError will be raised.
+    While RAG endpoint is down, its circuit breaker is open and error_message is returned without waiting for timeouts.
 
     :param message: of the user
     :param assistant_id: specifying exact RAG assistant
@@ -28,24 +29,45 @@ def assistant_response(message: str, assistant_id: str, config: dict, prompt_var
     :param context: external context which can override RAG chunks
     :param error_message: optional message which can returned to user in case of an unexpected error. Otherwise, error is raised.
     :param language: language of the user message
+    :param single_flight: whether identical questions asked concurrently by other sessions share one request
     :return: RAG response if successful. In case of an error, error_message if defined will be returned with fallback to
     raising  ApplicationError.
     """
-    session_id = config[CONFIGURABLE][THREAD_ID]
-    headers = {"return-contexts": "true", SESSION_ID_HEADER: session_id, "assistant-id": assistant_id} | default_headers
-    message = f"{message}\n{_get_local_language_instruction(lang_iso=language)}"
-    body = {"message": message, "prompt_var": prompt_var, "context": context}
+    request = _assistant_request(message, assistant_id, config, prompt_var, context, language)
+    execute = single_flight_request if single_flight else retryable_request
+    try:
+        return execute(x=http_sessions.post, config=config, **request)["message"]
+    except ApplicationError as application_error:
+        if error_message:
+            return error_message
+        raise application_error
+
+
+async def assistant_response_async(message: str, assistant_id: str, config: dict, prompt_var: str = None, context: str = None,
+                                   error_message: str = None, language: str = None, single_flight: bool = False) -> str:
+    """
+    Calls pre-built RAG assistant endpoint for the user's message asynchronously, returning coroutine.
+    See assistant_response pydocs for API details.
+    """
+    request = _assistant_request(message, assistant_id, config, prompt_var, context, language)
+    execute = single_flight_request_async if single_flight else retryable_request_async
     try:
-        response = retryable_request(
-            x=requests.post, config=config, url=f"{INFOBIP_BASE_URL}/gpt-creator/omnia/2/query", json=body, headers=headers
-            )
-        return response["message"]
+        return (await execute(x=http_sessions.post_async, config=config, **request))["message"]
     except ApplicationError as application_error:
         if error_message:
             return error_message
         raise application_error
 
 
+def _assistant_request(message: str, assistant_id: str, config: dict, prompt_var: str | None, context: str | None,
+                       language: str | None) -> dict:
+    session_id = config[CONFIGURABLE][THREAD_ID]
+    headers = {"return-contexts": "true", SESSION_ID_HEADER: session_id, "assistant-id": assistant_id} | default_headers
+    message = f"{message}\n{_get_local_language_instruction(lang_iso=language)}"
+    body = {"message": message, "prompt_var": prompt_var, "context": context}
+    return {"url": f"{INFOBIP_BASE_URL}/gpt-creator/omnia/2/query", "json": body, "headers": headers}
+
+
 """
 This method returns localised instruction for RAG assistant for the expected language.
 We noticed when there are multiple languages in the prompt:
@@ -1,7 +1,7 @@
-import requests
-
 from omnia_sdk.workflow.tools.channels.config import INFOBIP_API_KEY, INFOBIP_BASE_URL
-from omnia_sdk.workflow.tools.rest.retryable_http_client import retryable_request
+from omnia_sdk.workflow.tools.rest import http_sessions
+from omnia_sdk.workflow.tools.rest.retryable_http_client import retryable_request, retryable_request_async
+from omnia_sdk.workflow.tools.rest.single_flight import single_flight_request, single_flight_request_async
 
 headers = {
     "Content-Type": "application/json",
@@ -18,7 +18,7 @@ Often user may proceed without information from People service, so it is up to t
 """
 
 
-def get_people_profile(identifier: str, id_type: str, config: dict, sender: str = None) -> dict:
+def get_people_profile(identifier: str, id_type: str, config: dict, sender: str = None, single_flight: bool = False) -> dict:
     """
     Returns profile for person identified by the identifier.
     More details: https://www.infobip.com/docs/api/customer-engagement/people/get-a-single-person-or-a-list-of-people
@@ -27,20 +27,23 @@ def get_people_profile(identifier: str, id_type: str, config: dict, sender: str
     :param id_type: phone, WhatsApp, email, etc. as in docs above
     :param config: session and channel details
     :param sender: sender ID
+    :param single_flight: whether identical lookups executed concurrently by other sessions share one request
     @return: profile of the person, ApplicationError is raised if People service is not available
     """
-    data = {
-        "type": id_type,
-        "identifier": identifier,
-    }
-    if sender:
-        data["sender"] = sender
-    response_json = retryable_request(
-        config, requests.post, url=f"{INFOBIP_BASE_URL}/people/2/custom/persons/find", headers=headers, json=data
-    )
+    request = single_flight_request if single_flight else retryable_request
+    response_json = request(config, http_sessions.post, **_find_person_request(identifier, id_type, sender))
     return response_json
 
 
+async def get_people_profile_async(identifier: str, id_type: str, config: dict, sender: str = None, single_flight: bool = False) -> dict:
+    """
+    Returns profile for person identified by the identifier asynchronously, returning coroutine.
+    See get_people_profile pydocs for API details.
+    """
+    request = single_flight_request_async if single_flight else retryable_request_async
+    return await request(config, http_sessions.post_async, **_find_person_request(identifier, id_type, sender))
+
+
 def get_people_profiles(config: dict, **kwargs) -> dict:
     """
     Returns profile for persons identified by the filter in **kwargs.
@@ -52,11 +55,21 @@ def get_people_profiles(config: dict, **kwargs) -> dict:
     @return: profiles of the people, ApplicationError is raised if People service is not available
     """
     response_json = retryable_request(
-        config, requests.post, url=f"{INFOBIP_BASE_URL}/people/2/custom/persons/find/list", headers=headers, body=kwargs
+        config, http_sessions.post, url=f"{INFOBIP_BASE_URL}/people/2/custom/persons/find/list", headers=headers, json=kwargs
     )
     return response_json
 
 
+async def get_people_profiles_async(config: dict, **kwargs) -> dict:
+    """
+    Returns profile for persons identified by the filter in **kwargs asynchronously, returning coroutine.
+    See get_people_profiles pydocs for API details.
+    """
+    return await retryable_request_async(
+        config, http_sessions.post_async, url=f"{INFOBIP_BASE_URL}/people/2/custom/persons/find/list", headers=headers, json=kwargs
+    )
+
+
 def create_person_profile(data: dict, config: dict) -> None:
     """
     Creates a new person profile.
@@ -66,7 +79,7 @@ def create_person_profile(data: dict, config: dict) -> None:
     :param config: session and channel details
     @return: profile of the person, ApplicationError is raised if People service is not available
     """
-    retryable_request(config, requests.post, url=f"{INFOBIP_BASE_URL}/people/2/persons", headers=headers, json=data)
+    retryable_request(config, http_sessions.post, url=f"{INFOBIP_BASE_URL}/people/2/persons", headers=headers, json=data)
 
 
 def update_person_profile(identifier: str, id_type: str, sender: str, data: dict, config: dict) -> None:
@@ -86,7 +99,7 @@ def update_person_profile(identifier: str, id_type: str, sender: str, data: dict
         "type": id_type,
         "sender": sender,
     }
-    retryable_request(config, requests.put, url=f"{INFOBIP_BASE_URL}/people/2/persons/", headers=headers, json=data, params=params)
+    retryable_request(config, http_sessions.put, url=f"{INFOBIP_BASE_URL}/people/2/persons/", headers=headers, json=data, params=params)
 
 
 def delete_person(config: dict, identifier: str, sender: str, id_type: str) -> None:
@@ -103,4 +116,14 @@ def delete_person(config: dict, identifier: str, sender: str, id_type: str) -> N
         "type": id_type,
         "sender": sender,
     }
-    retryable_request(config, requests.delete, url=f"{INFOBIP_BASE_URL}/people/2/persons/", headers=headers, params=params)
+    retryable_request(config, http_sessions.delete, url=f"{INFOBIP_BASE_URL}/people/2/persons/", headers=headers, params=params)
+
+
+def _find_person_request(identifier: str, id_type: str, sender: str | None) -> dict:
+    data = {
+        "type": id_type,
+        "identifier": identifier,
+    }
+    if sender:
+        data["sender"] = sender
+    return {"url": f"{INFOBIP_BASE_URL}/people/2/custom/persons/find", "headers": headers, "json": data}
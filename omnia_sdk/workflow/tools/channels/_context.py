@@ -1,22 +1,132 @@
-from contextvars import ContextVar
+import asyncio
+import logging as log
+import threading
+from collections.abc import AsyncIterator, Iterator
+from contextvars import ContextVar, Token
+
+from omnia_sdk.workflow.tools.channels.config import MAX_RESPONSES_PER_REQUEST
+from omnia_sdk.workflow.tools.channels.delivery_queue import DeliveryHandle
 
 """
 This variable is used to track state of message requests to chatbot.
 These methods are used by runtime environment, user should never call these directly.
 """
 
-_api_request = ContextVar("outbound_context", default=[])
+
+class ResponseCollector:
+    """
+    Collects outbound responses of one inbound request in order they are generated. Responses may be consumed while the graph
+    is still executing by iterating the collector, synchronously or with async for, e.g. to stream them as server-sent events.
+    Iteration ends once the collector is closed, after all collected responses were yielded.
+    """
+
+    def __init__(self, max_responses: int = MAX_RESPONSES_PER_REQUEST):
+        """
+        :param max_responses: upper bound of collected responses, further responses are dropped
+        """
+        self.max_responses = max_responses
+        self.dropped = 0
+        self._condition = threading.Condition()
+        self._responses: list[dict] = []
+        self._closed = False
+        self._error: BaseException | None = None
+        # futures of coroutines waiting for the next response
+        self._waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    def add(self, response: dict) -> bool:
+        """
+        :return: false if response was dropped because collector is full or closed
+        """
+        with self._condition:
+            if self._closed or len(self._responses) >= self.max_responses:
+                self.dropped += 1
+                log.warning(f"Response is not collected, collector is {'closed' if self._closed else 'full'}: {response}")
+                return False
+            self._responses.append(response)
+            self._condition.notify_all()
+            waiters, self._waiters = self._waiters, []
+        _wake(waiters)
+        return True
+
+    def close(self, error: BaseException | None = None) -> None:
+        """
+        Ends iteration after collected responses, error is raised to iterating consumers if set.
+        """
+        with self._condition:
+            self._closed = True
+            self._error = error
+            self._condition.notify_all()
+            waiters, self._waiters = self._waiters, []
+        _wake(waiters)
+
+    @property
+    def closed(self) -> bool:
+        with self._condition:
+            return self._closed
+
+    @property
+    def responses(self) -> list[dict]:
+        with self._condition:
+            return list(self._responses)
+
+    def __iter__(self) -> Iterator[dict]:
+        index = 0
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: index < len(self._responses) or self._closed)
+                if index >= len(self._responses):
+                    break
+                response = self._responses[index]
+            index += 1
+            yield response
+        if self._error:
+            raise self._error
+
+    async def __aiter__(self) -> AsyncIterator[dict]:
+        index = 0
+        while True:
+            waiter = None
+            with self._condition:
+                if index < len(self._responses):
+                    response = self._responses[index]
+                elif self._closed:
+                    break
+                else:
+                    loop = asyncio.get_running_loop()
+                    waiter = loop.create_future()
+                    self._waiters.append((loop, waiter))
+            if waiter:
+                await waiter
+                continue
+            index += 1
+            yield response
+        if self._error:
+            raise self._error
+
+
+def _wake(waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Future]]) -> None:
+    for loop, waiter in waiters:
+        loop.call_soon_threadsafe(lambda w=waiter: w.done() or w.set_result(None))
+
+
+_response_collector = ContextVar("outbound_context", default=None)
 _session_id = ContextVar("chatbot_session", default="")
 
 
-# single request may trigger multiple outbound messages, hence we add them into list
+# single request may trigger multiple outbound messages, hence we collect them
 def add_response(response: dict):
-    _api_request.get().append(response)
+    collector = _response_collector.get()
+    if collector is None:
+        # collector is set for every turn by ChatbotFlow.run, response sent outside of a turn is not collected
+        log.debug(f"Response is not collected, no collector is set: {response}")
+        return
+    collector.add(response)
 
 
 # returns responses in order they are generated
 def get_responses() -> list[dict]:
-    return _api_request.get()
+    collector = _response_collector.get()
+    return collector.responses if collector else []
 
 
 def set_session_id(session_id: str):
@@ -28,4 +138,110 @@ def get_session_id() -> str:
 
 
 def reset_responses():
-    _api_request.set([])
+    _response_collector.set(ResponseCollector())
+
+
+def set_response_collector(collector: ResponseCollector) -> Token:
+    return _response_collector.set(collector)
+
+
+def get_response_collector() -> ResponseCollector | None:
+    return _response_collector.get()
+
+
+def reset_response_collector(token: Token) -> None:
+    _response_collector.reset(token)
+
+
+class DeliveryGuard:
+    """
+    Tracks whether a conversation turn delivered any message to the user. Turn which did not deliver anything yet may be
+    superseded by a newer turn, after which its messages are not delivered anymore. See session_dispatcher.py.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.delivered = False
+        self.superseded = False
+
+    # returns false if message should not be delivered
+    def deliver(self) -> bool:
+        with self._lock:
+            if self.superseded:
+                return False
+            self.delivered = True
+            return True
+
+    # returns false if turn can not be superseded because it already delivered a message
+    def supersede(self) -> bool:
+        with self._lock:
+            if self.delivered:
+                return False
+            self.superseded = True
+            return True
+
+
+_delivery_guard = ContextVar("delivery_guard", default=None)
+
+
+def set_delivery_guard(guard: DeliveryGuard) -> Token:
+    return _delivery_guard.set(guard)
+
+
+def get_delivery_guard() -> DeliveryGuard | None:
+    return _delivery_guard.get()
+
+
+def reset_delivery_guard(token: Token) -> None:
+    _delivery_guard.reset(token)
+
+
+class OutboundBatch:
+    """
+    Buffers Messages API messages of a conversation turn in the order they are sent. Buffered messages are sent together in
+    one multi-message request when the batch is flushed. See batch_outbound in chatbot_configuration.py.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._messages: list[dict] = []
+
+    def add(self, message: dict) -> None:
+        with self._lock:
+            self._messages.append(message)
+
+    # returns buffered messages in order and empties the batch
+    def drain(self) -> list[dict]:
+        with self._lock:
+            messages, self._messages = self._messages, []
+            return messages
+
+
+_outbound_batch = ContextVar("outbound_batch", default=None)
+
+
+def set_outbound_batch(batch: OutboundBatch) -> Token:
+    return _outbound_batch.set(batch)
+
+
+def get_outbound_batch() -> OutboundBatch | None:
+    return _outbound_batch.get()
+
+
+def reset_outbound_batch(token: Token) -> None:
+    _outbound_batch.reset(token)
+
+
+_delivery_handle = ContextVar("delivery_handle", default=None)
+
+
+def set_delivery_handle(handle: DeliveryHandle) -> Token:
+    return _delivery_handle.set(handle)
+
+
+def get_delivery_handle() -> DeliveryHandle | None:
+    return _delivery_handle.get()
+
+
+def reset_delivery_handle(token: Token) -> None:
+    _delivery_handle.reset(token)
@@ -5,3 +5,5 @@ config = Config(".env")
 
 INFOBIP_API_KEY = config("INFOBIP_API_KEY", cast=Secret, default="")
 INFOBIP_BASE_URL = config("INFOBIP_BASE_URL", cast=str, default="https://api-ny2.infobip.com")
+# responses collected for one inbound request of HTTP channel, extra responses are dropped
+MAX_RESPONSES_PER_REQUEST = config("MAX_RESPONSES_PER_REQUEST", cast=int, default=100)
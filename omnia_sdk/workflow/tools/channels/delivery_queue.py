@@ -0,0 +1,153 @@
+import asyncio
+import concurrent.futures
+import dataclasses
+import logging as log
+import threading
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextvars import Context, copy_context
+from typing import Any
+
+"""
+This module provides background delivery of outbound messages. Node which sends a message does not wait for Messages API or
+HTTP callback (including retries), it continues with its work while the message is delivered by a worker thread.
+
+Messages of the same session are delivered one by one in the order they were sent, messages of different sessions are
+delivered in parallel. ChatbotFlow waits for deliveries of the turn only at the end of the turn, so the runtime still observes
+all messages as delivered when run/arun returns:
+
+    chatbot = MyChatbot(delivery_queue=DeliveryQueue(workers=16, on_delivery_failure=report))
+
+Failed deliveries do not fail the graph, they are reported to on_delivery_failure.
+"""
+
+
+@dataclasses.dataclass
+class DeliveryFailure:
+    session_id: str
+    # HTTP request which was not delivered, with url, json and headers
+    request: dict
+    error: Exception
+
+
+def _log_failure(failure: DeliveryFailure) -> None:
+    log.error(f"Message was not delivered, session: {failure.session_id}, url: {failure.request.get('url')}, error: {failure.error}")
+
+
+class _Delivery:
+    __slots__ = ("session_id", "deliver", "request", "context", "future")
+
+    def __init__(self, session_id: str, deliver: Callable[[], Any], request: dict, context: Context):
+        self.session_id = session_id
+        self.deliver = deliver
+        self.request = request
+        self.context = context
+        self.future: Future = Future()
+
+
+class DeliveryQueue:
+    """
+    Pool of delivery workers with FIFO order per session. Instance may be shared by all flows of the process.
+    """
+
+    def __init__(self, workers: int = 8, on_delivery_failure: Callable[[DeliveryFailure], None] | None = None):
+        """
+        :param workers: number of threads delivering messages, i.e. sessions delivered in parallel
+        :param on_delivery_failure: executed in the worker thread when message was not delivered, failures are logged if None
+        """
+        if workers < 1:
+            raise ValueError("At least one delivery worker is required")
+        self.on_delivery_failure = on_delivery_failure if on_delivery_failure else _log_failure
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="omnia-delivery")
+        self._lock = threading.Lock()
+        # pending deliveries of sessions which are being delivered by a worker
+        self._sessions: dict[str, deque[_Delivery]] = {}
+
+    def submit(self, session_id: str, deliver: Callable[[], Any], request: dict) -> Future:
+        """
+        Enqueues delivery after all pending deliveries of the session. Delivery is executed with a copy of the caller's context.
+        :param session_id: of the message
+        :param deliver: function which sends the message
+        :param request: HTTP request sent by deliver, reported on failure
+        :return: future completed once delivery finished, successfully or not
+        """
+        delivery = _Delivery(session_id=session_id, deliver=deliver, request=request, context=copy_context())
+        with self._lock:
+            pending = self._sessions.get(session_id)
+            if pending is not None:
+                pending.append(delivery)
+                return delivery.future
+            self._sessions[session_id] = deque([delivery])
+        self._executor.submit(self._drain, session_id)
+        return delivery.future
+
+    def close(self, wait: bool = True) -> None:
+        """
+        Stops the workers, pending deliveries are completed if wait is true.
+        """
+        self._executor.shutdown(wait=wait)
+
+    # delivers pending messages of the session until there are none left
+    def _drain(self, session_id: str) -> None:
+        while True:
+            with self._lock:
+                pending = self._sessions[session_id]
+                if not pending:
+                    del self._sessions[session_id]
+                    return
+                delivery = pending.popleft()
+            self._deliver(delivery)
+
+    def _deliver(self, delivery: _Delivery) -> None:
+        try:
+            delivery.context.run(delivery.deliver)
+        except Exception as error:
+            try:
+                self.on_delivery_failure(DeliveryFailure(session_id=delivery.session_id, request=delivery.request, error=error))
+            except Exception as e:
+                log.error(f"Delivery failure callback failed for session: {delivery.session_id}, error: {e}")
+        finally:
+            delivery.future.set_result(None)
+
+
+class DeliveryHandle:
+    """
+    Deliveries submitted during one conversation turn, joined at the end of the turn.
+    """
+
+    def __init__(self, queue: DeliveryQueue):
+        self.queue = queue
+        self._lock = threading.Lock()
+        self._futures: list[Future] = []
+
+    def submit(self, session_id: str, deliver: Callable[[], Any], request: dict) -> None:
+        """
+        See DeliveryQueue.submit.
+        """
+        future = self.queue.submit(session_id=session_id, deliver=deliver, request=request)
+        with self._lock:
+            self._futures.append(future)
+
+    def join(self, timeout: float | None = None) -> bool:
+        """
+        Waits until all submitted deliveries finished.
+        :param timeout: in seconds, waits indefinitely if None
+        :return: false if some deliveries did not finish before timeout
+        """
+        _, not_done = concurrent.futures.wait(self._pending(), timeout=timeout)
+        return not not_done
+
+    async def wait(self, timeout: float | None = None) -> bool:
+        """
+        Asynchronous version of join, event loop is not blocked while waiting.
+        """
+        pending = [asyncio.wrap_future(future) for future in self._pending()]
+        if not pending:
+            return True
+        _, not_done = await asyncio.wait(pending, timeout=timeout)
+        return not not_done
+
+    def _pending(self) -> list[Future]:
+        with self._lock:
+            return [future for future in self._futures if not future.done()]
@@ -1,13 +1,15 @@
+import functools
 import logging as log
 from collections import namedtuple
-
-import requests
+from collections.abc import Callable
 
 from omnia_sdk.workflow.chatbot.chatbot_state import Message
 from omnia_sdk.workflow.chatbot.constants import CONFIGURABLE, TEXT, TYPE, WORKFLOW_ID, THREAD_ID, ASSISTANT
 from omnia_sdk.workflow.tools.channels import config as channels_config
-from omnia_sdk.workflow.tools.channels._context import add_response
-from omnia_sdk.workflow.tools.rest.retryable_http_client import retryable_request
+from omnia_sdk.workflow.tools.channels._context import add_response, get_delivery_guard, get_delivery_handle, get_outbound_batch
+from omnia_sdk.workflow.tools.rest import http_sessions
+from omnia_sdk.workflow.tools.rest.retry_policy import CALLBACK_RETRY_POLICY, get_retry_policy
+from omnia_sdk.workflow.tools.rest.retryable_http_client import retryable_request, retryable_request_async
 
 BUSINESS_NUMBER = "business_number"
 END_USER_NUMBER = "end_user_number"
@@ -18,11 +20,18 @@ POSTBACK_DATA = "postbackData"
 CALLBACK_URL = "callback_url"
 BODY = "body"
 
+# upper bound of messages sent in one Messages API request when outbound messages are batched
+MAX_BATCH_MESSAGES = 100
+
 messages_url = f"{channels_config.INFOBIP_BASE_URL}/messages-api/1/messages"
 """
 This module provides integration with Infobip's Omni Channel API.
 User may send content to various channels with a single API which abstracts channel details.
 Messages API https://www.infobip.com/docs/api/platform/messages-api
+
+While outbound batch is active (see batch_outbound in chatbot_configuration.py), messages for Messages API channels are
+buffered and sent together with flush_messages, instead of one request per message. HTTP callbacks are never batched.
+While delivery handle is active (see delivery_queue.py), requests are sent by background workers instead of the caller.
 """
 
 ButtonDefinition = namedtuple("ButtonDefinition", ["type", "text", "postback_data"])
@@ -91,23 +100,99 @@ def send_message(message: Message, config: dict) -> None:
     _send_to_channel(content=message.content, config=config)
 
 
+async def asend_message(message: Message, config: dict) -> None:
+    """
+    Sends message to the channel defined in config without blocking the event loop.
+    :param message: to send
+    :param config: with session and channel details
+    """
+    await _send_to_channel_async(content=message.content, config=config)
+
+
 def send_template():
     pass
 
 
+def flush_messages(config: dict) -> None:
+    """
+    Sends messages buffered in the outbound batch, in order, with as few Messages API requests as possible.
+    Nothing is sent if outbound batching is not active.
+    :param config: with session and channel details
+    """
+    for request in _drain_batch():
+        _deliver(config=config, request=request)
+
+
+async def aflush_messages(config: dict) -> None:
+    """
+    Asynchronous version of flush_messages.
+    :param config: with session and channel details
+    """
+    for request in _drain_batch():
+        await _deliver_async(config=config, request=request)
+
+
+# returns requests delivering buffered messages, requests must be sent sequentially to keep the order of messages
+def _drain_batch() -> list[dict]:
+    batch = get_outbound_batch()
+    messages = batch.drain() if batch else []
+    return [_prepare_messages_request(messages[i:i + MAX_BATCH_MESSAGES]) for i in range(0, len(messages), MAX_BATCH_MESSAGES)]
+
+
 # sends message to whichever channel we received request from
 def _send_to_channel(content: dict, config: dict):
+    request = _prepare_delivery(content=content, config=config)
+    if request:
+        _deliver(config=config, request=request)
+    # if this results with an error, Infobip and/or META teams are already working on the issue
+
+
+async def _send_to_channel_async(content: dict, config: dict):
+    request = _prepare_delivery(content=content, config=config)
+    if request:
+        await _deliver_async(config=config, request=request)
+
+
+# delivery is not bound by the turn deadline, so fallback message reaches the user after DeadlineExceededError
+def _delivery(config: dict, request: dict) -> Callable[[], dict | bytes]:
+    return functools.partial(retryable_request, config=config, x=http_sessions.post, bound_by_deadline=False, **request)
+
+
+def _deliver(config: dict, request: dict) -> None:
+    deliver = _delivery(config=config, request=request)
+    handle = get_delivery_handle()
+    if handle:
+        # delivered in background, in order with other messages of the session, see delivery_queue.py
+        handle.submit(session_id=config[CONFIGURABLE][THREAD_ID], deliver=deliver, request=request)
+        return
+    _ = deliver()
+
+
+async def _deliver_async(config: dict, request: dict) -> None:
+    handle = get_delivery_handle()
+    if handle:
+        handle.submit(session_id=config[CONFIGURABLE][THREAD_ID], deliver=_delivery(config=config, request=request), request=request)
+        return
+    _ = await retryable_request_async(config=config, x=http_sessions.post_async, bound_by_deadline=False, **request)
+
+
+# returns HTTP request which delivers the content, None if content should not be sent over HTTP
+def _prepare_delivery(content: dict, config: dict) -> dict | None:
     configurable = config[CONFIGURABLE]
     channel = configurable[CHANNEL]
+    guard = get_delivery_guard()
+    if guard and not guard.deliver():
+        log.info(f"Turn was superseded by newer user message, content is not sent:\n{content}")
+        return None
     if channel == CONSOLE:
         log.info(f"Sending content to console:\n{content}")
-        return
+        return None
     # we add outbound content to the request state
     add_response(response=content)
     if channel == HTTP:
         callback_url = configurable.get(CALLBACK_URL)
         if not callback_url:
-            return
+            return None
         # asynchronous HTTP communication if user specified callback url
         headers = {
             "session-id": configurable[THREAD_ID],
@@ -115,19 +200,27 @@ def _send_to_channel(content: dict, config: dict):
             "user-id": configurable["user_id"],
             "workflow-id": configurable[WORKFLOW_ID],
         }
-        _ = retryable_request(config=config, x=requests.post, url=callback_url, json=content, headers=headers, timeout=5)
+        retry_policy = get_retry_policy(callback_url, default=CALLBACK_RETRY_POLICY)
+        return {"url": callback_url, "json": content, "headers": headers, "timeout": 5, "retry_policy": retry_policy}
     # deliver message to OTT Gateway
-    else:
-        _send_messages(config=config, content=content, channel=channel)
-    # if this results with an error, Infobip and/or META teams are already working on the issue
+    message = _prepare_message(config=config, content=content, channel=channel)
+    batch = get_outbound_batch()
+    if batch:
+        batch.add(message)
+        return None
+    return _prepare_messages_request([message])
 
 
-# sends a message to the channel in which user started communication
-def _send_messages(config: dict, content: dict, channel: str) -> None:
+# prepares message to the channel in which user started communication
+def _prepare_message(config: dict, content: dict, channel: str) -> dict:
     configurable = config[CONFIGURABLE]
     sender = configurable[BUSINESS_NUMBER]
     destination = configurable[END_USER_NUMBER]
-    message = {"channel": channel, "sender": sender, "destinations": [{"to": destination}], "content": content}
-    body = {"messages": [message]}
+    return {"channel": channel, "sender": sender, "destinations": [{"to": destination}], "content": content}
+
+
+# prepares request which sends messages with a single Messages API call
+def _prepare_messages_request(messages: list[dict]) -> dict:
+    body = {"messages": messages}
     headers = {"Authorization": f"App {channels_config.INFOBIP_API_KEY}", "Content-Type": "application/json", "Accept": "application/json"}
-    _ = retryable_request(config=config, x=requests.post, url=messages_url, json=body, headers=headers)
+    return {"url": messages_url, "json": body, "headers": headers}
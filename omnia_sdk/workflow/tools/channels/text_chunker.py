@@ -0,0 +1,69 @@
+import re
+
+"""
+This module groups streamed LLM tokens into chunks which are sent to the user as separate messages while the response is still
+being generated. Chunks end at sentence boundaries, so every message reads naturally, unless a sentence is longer than
+max_chars. See ChatbotFlow.stream_text_response.
+"""
+
+# end of sentence or paragraph followed by whitespace
+_SENTENCE_END = re.compile(r"(?<=[.!?…。！？])\s+|\n+")
+
+
+class TextChunker:
+
+    def __init__(self, min_chars: int = 40, max_chars: int = 400):
+        """
+        :param min_chars: chunk is not closed at a sentence boundary before it has at least min_chars, avoiding many tiny messages
+        :param max_chars: chunk without sentence boundary is split at the last whitespace before max_chars
+        """
+        if min_chars < 1 or max_chars < min_chars:
+            raise ValueError("max_chars must not be lower than min_chars, which must be positive")
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self._buffer = ""
+        self._parts: list[str] = []
+
+    @property
+    def text(self) -> str:
+        """
+        :return: all text fed so far
+        """
+        return "".join(self._parts)
+
+    def feed(self, token: str) -> list[str]:
+        """
+        :param token: streamed text
+        :return: chunks completed by the token, in order
+        """
+        self._parts.append(token)
+        self._buffer += token
+        chunks = []
+        while chunk := self._next_chunk():
+            chunks.append(chunk)
+        return chunks
+
+    def flush(self) -> str | None:
+        """
+        :return: remaining text once the stream ended, None if nothing remained
+        """
+        chunk, self._buffer = self._buffer.strip(), ""
+        return chunk or None
+
+    def _next_chunk(self) -> str | None:
+        for boundary in _SENTENCE_END.finditer(self._buffer):
+            if boundary.start() > self.max_chars:
+                break
+            if boundary.start() >= self.min_chars:
+                return self._cut(end=boundary.start(), rest=boundary.end())
+        if len(self._buffer) <= self.max_chars:
+            return None
+        space = self._buffer.rfind(" ", 0, self.max_chars + 1)
+        if space > 0:
+            return self._cut(end=space, rest=space + 1)
+        return self._cut(end=self.max_chars, rest=self.max_chars)
+
+    def _cut(self, end: int, rest: int) -> str | None:
+        chunk, self._buffer = self._buffer[:end].strip(), self._buffer[rest:]
+        # chunk of whitespace only is skipped, next chunk is checked
+        return chunk or self._next_chunk()
@@ -1,10 +1,9 @@
 import re
 from collections import namedtuple
 
-import requests
-
 from omnia_sdk.workflow.tools.channels.config import INFOBIP_API_KEY, INFOBIP_BASE_URL
-from omnia_sdk.workflow.tools.rest.retryable_http_client import retryable_request
+from omnia_sdk.workflow.tools.rest import http_sessions
+from omnia_sdk.workflow.tools.rest.retryable_http_client import retryable_request, retryable_request_async
 
 """
 This module provides integration with Infobip's Whatsapp API.
@@ -38,10 +37,30 @@ def send_bulk_wa_template(config: dict, template_messages: list[WhatsAppTemplate
     :param template_messages: list of: (phone_number, template_name and placeholders)
     :return: None or raises exception if WA gateways are down
     """
+    # if this fails, we (or WhatsApp) have serious outage
+    retryable_request(x=http_sessions.post, config=config, **_bulk_template_request(config, template_messages, sender))
+
+
+async def send_wa_template_async(config: dict, template_message: WhatsAppTemplateMessage, sender: str):
+    """
+    Send a single WhatsApp template message asynchronously, returning coroutine.
+    See send_wa_template pydocs for API details.
+    """
+    await send_bulk_wa_template_async(config=config, template_messages=[template_message], sender=sender)
+
+
+async def send_bulk_wa_template_async(config: dict, template_messages: list[WhatsAppTemplateMessage], sender: str):
+    """
+    Send a bulk WhatsApp template message to multiple receivers asynchronously, returning coroutine.
+    See send_bulk_wa_template pydocs for API details.
+    """
+    await retryable_request_async(x=http_sessions.post_async, config=config, **_bulk_template_request(config, template_messages, sender))
+
+
+def _bulk_template_request(config: dict, template_messages: list[WhatsAppTemplateMessage], sender: str) -> dict:
     headers = {"Authorization": f"App {INFOBIP_API_KEY}"}
     messages = [_create_payload(template_message=message, config=config, sender=sender) for message in template_messages]
-    # if this fails, we (or WhatsApp) have serious outage
-    retryable_request(x=requests.post, config=config, url=url, json={"messages": messages}, headers=headers)
+    return {"url": url, "json": {"messages": messages}, "headers": headers}
 
 
 def _create_payload(template_message: WhatsAppTemplateMessage, config: dict, sender: str) -> dict:
@@ -0,0 +1,127 @@
+import dataclasses
+import threading
+import time
+from urllib.parse import urlsplit
+
+from omnia_sdk.workflow.tools.rest import config as rest_config
+
+"""
+This module provides circuit breakers for endpoints called with retryable_request, one breaker per host and path.
+When endpoint is down, sessions would otherwise wait for timeouts and retries of every request, tying up worker threads and
+adding load to the failing service.
+
+ - closed: requests are executed, consecutive failures (errors and 5xx responses) are counted
+ - open: after failure_threshold consecutive failures requests fail immediately with CircuitOpenError (an ApplicationError)
+ - half-open: after reset_timeout_seconds a single trial request is executed, success closes the circuit and failure opens it
+   again. Other requests keep failing fast until the trial finishes or another reset_timeout_seconds passes.
+
+Thresholds are read from the environment (see rest/config.py) or set with configure_circuit_breakers.
+States of all breakers can be read with get_circuit_states, e.g. to export them as metrics.
+"""
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+@dataclasses.dataclass(frozen=True)
+class CircuitBreakerConfig:
+    # consecutive failures which open the circuit
+    failure_threshold: int = rest_config.CIRCUIT_FAILURE_THRESHOLD
+    # time after which open circuit lets a trial request through
+    reset_timeout_seconds: float = rest_config.CIRCUIT_RESET_TIMEOUT_SECONDS
+    enabled: bool = True
+
+    def __post_init__(self):
+        if self.failure_threshold < 1:
+            raise ValueError("failure_threshold must be at least 1")
+        if self.reset_timeout_seconds < 0:
+            raise ValueError("reset_timeout_seconds must not be negative")
+
+
+class CircuitBreaker:
+
+    def __init__(self, endpoint: str, config: CircuitBreakerConfig):
+        """
+        :param endpoint: scheme, host and path the breaker protects
+        :param config: thresholds of the breaker
+        """
+        self.endpoint = endpoint
+        self.config = config
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def allow(self) -> bool:
+        """
+        Returns whether request may be executed, caller must report its outcome with record_success or record_failure.
+        """
+        if self._state == CLOSED or not self.config.enabled:
+            return True
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if time.monotonic() - self._opened_at < self.config.reset_timeout_seconds:
+                return False
+            # this caller executes the trial request, others wait for its outcome until the timeout passes again
+            self._state = HALF_OPEN
+            self._opened_at = time.monotonic()
+            return True
+
+    def record_success(self) -> None:
+        if self._state == CLOSED and self._failures == 0:
+            return
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.config.failure_threshold:
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+
+
+_config = CircuitBreakerConfig()
+_breakers: dict[str, CircuitBreaker] = {}
+_lock = threading.Lock()
+
+
+def get_circuit_breaker(url: str) -> CircuitBreaker:
+    """
+    Returns breaker for scheme, host and path of the url, query parameters are ignored.
+    :param url: of the request
+    """
+    parts = urlsplit(url)
+    endpoint = f"{parts.scheme}://{parts.netloc}{parts.path}"
+    breaker = _breakers.get(endpoint)
+    if breaker is None:
+        with _lock:
+            breaker = _breakers.get(endpoint)
+            if breaker is None:
+                breaker = _breakers[endpoint] = CircuitBreaker(endpoint=endpoint, config=_config)
+    return breaker
+
+
+def get_circuit_states() -> dict[str, str]:
+    """
+    :return: state of every breaker by its endpoint
+    """
+    return {endpoint: breaker.state for endpoint, breaker in list(_breakers.items())}
+
+
+def configure_circuit_breakers(config: CircuitBreakerConfig) -> None:
+    """
+    Sets thresholds of all breakers, existing breakers are discarded and their endpoints start closed.
+    :param config: of breakers
+    """
+    global _config
+    with _lock:
+        _config = config
+        _breakers.clear()
@@ -0,0 +1,17 @@
+from starlette.config import Config
+
+config = Config(".env")
+
+# connection pool sizes of shared HTTP sessions, see http_sessions.py
+HTTP_POOL_CONNECTIONS = config("HTTP_POOL_CONNECTIONS", cast=int, default=10)
+HTTP_POOL_MAXSIZE = config("HTTP_POOL_MAXSIZE", cast=int, default=32)
+HTTP_TCP_KEEPALIVE = config("HTTP_TCP_KEEPALIVE", cast=bool, default=True)
+
+# default retry policy of retryable_request, see retry_policy.py
+RETRY_MAX_ATTEMPTS = config("RETRY_MAX_ATTEMPTS", cast=int, default=3)
+RETRY_BASE_DELAY_SECONDS = config("RETRY_BASE_DELAY_SECONDS", cast=float, default=1.0)
+RETRY_MAX_DELAY_SECONDS = config("RETRY_MAX_DELAY_SECONDS", cast=float, default=10.0)
+
+# circuit breaker of every endpoint, see circuit_breaker.py
+CIRCUIT_FAILURE_THRESHOLD = config("CIRCUIT_FAILURE_THRESHOLD", cast=int, default=5)
+CIRCUIT_RESET_TIMEOUT_SECONDS = config("CIRCUIT_RESET_TIMEOUT_SECONDS", cast=float, default=30.0)
@@ -0,0 +1,67 @@
+import time
+from contextvars import ContextVar, Token
+
+from omnia_sdk.workflow.tools.rest.exceptions import DeadlineExceededError
+
+"""
+Latency budget of a conversation turn. ChatbotFlow sets the deadline at the start of every turn (see turn_budget_ms in
+chatbot_configuration.py) and outbound calls read it: timeouts are shrunk to the remaining budget and retries which can not
+finish in time are skipped. When the budget is exhausted DeadlineExceededError is raised.
+
+Messages delivered to the user are not bound by the deadline, so the flow can still send a fallback message.
+"""
+
+# time.monotonic() value after which outbound calls fail, None if turn has no budget
+_deadline = ContextVar("turn_deadline", default=None)
+
+
+def set_turn_deadline(budget_seconds: float | None) -> Token:
+    """
+    Sets deadline budget_seconds from now. Deadline set earlier in the same context is kept if it expires sooner.
+    :param budget_seconds: latency budget, None keeps the current deadline
+    :return: token for reset_turn_deadline
+    """
+    deadline = _deadline.get()
+    if budget_seconds is not None:
+        new_deadline = time.monotonic() + budget_seconds
+        deadline = new_deadline if deadline is None else min(deadline, new_deadline)
+    return _deadline.set(deadline)
+
+
+def reset_turn_deadline(token: Token) -> None:
+    _deadline.reset(token)
+
+
+def get_remaining_seconds() -> float | None:
+    """
+    :return: seconds until deadline (negative if deadline passed), None if turn has no deadline
+    """
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def check_deadline(trace: list = None) -> float | None:
+    """
+    Raises DeadlineExceededError if deadline passed.
+    :param trace: errors of previous attempts, passed to the exception
+    :return: remaining seconds, None if turn has no deadline
+    """
+    remaining = get_remaining_seconds()
+    if remaining is not None and remaining <= 0:
+        raise DeadlineExceededError(trace=trace)
+    return remaining
+
+
+def bound_timeout(timeout, remaining: float | None):
+    """
+    Returns request timeout shrunk to the remaining budget.
+    :param timeout: seconds, or (connect, read) tuple as accepted by requests
+    :param remaining: seconds until deadline, None if turn has no deadline
+    """
+    if remaining is None:
+        return timeout
+    if timeout is None:
+        return remaining
+    if isinstance(timeout, tuple):
+        return tuple(remaining if value is None else min(value, remaining) for value in timeout)
+    return min(timeout, remaining)
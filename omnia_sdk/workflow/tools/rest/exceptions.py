@@ -28,3 +28,22 @@ class UserRequestError(CustomBaseException):
 
     def __init__(self, code: int, message: str, *args):
         super().__init__(code, message, *args)
+
+
+class DeadlineExceededError(ApplicationError):
+    """
+    Exception raised when latency budget of the conversation turn is exhausted, see deadline.py.
+    Flow may catch it to send a fallback message instead of waiting for the slow service.
+    """
+
+    def __init__(self, message: str = "Turn latency budget exhausted.", trace: list = None, *args):
+        super().__init__(504, message, trace, *args)
+
+
+class CircuitOpenError(ApplicationError):
+    """
+    Exception raised without calling the endpoint while its circuit breaker is open, see circuit_breaker.py.
+    """
+
+    def __init__(self, message: str, trace: list = None, *args):
+        super().__init__(503, message, trace, *args)
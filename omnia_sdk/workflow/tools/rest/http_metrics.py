@@ -0,0 +1,235 @@
+import bisect
+import dataclasses
+import json
+import logging as log
+import threading
+import time
+from collections.abc import Callable
+from urllib.parse import urlsplit
+
+"""
+This module provides instrumentation of outbound HTTP calls made by retryable_request and LLM wrappers in chat.py.
+Set a hook and it will be executed with HttpCallMetrics after every logical call, i.e. once for all retry attempts:
+
+    metrics = HttpMetricsAggregator()
+    set_http_metrics_hook(metrics)
+    ...
+    print(metrics.summary())
+    print(metrics.to_prometheus())
+
+Request and response sizes are measured only while a hook is set, measuring JSON request bodies serializes them again.
+"""
+
+# upper bounds in seconds of latency histogram buckets
+LATENCY_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+@dataclasses.dataclass
+class HttpCallMetrics:
+    # scheme, host and path of the url without query, or name of the LLM API
+    endpoint: str
+    method: str
+    # from the first attempt until the result, including backoff and waiting for rate limits
+    latency_seconds: float
+    attempts: int
+    # status of the last response, None if no response was received
+    status_code: int | None
+    request_bytes: int
+    response_bytes: int
+    backoff_seconds: float
+    # exception type if the call failed
+    error: str | None = None
+
+
+_hook: Callable[[HttpCallMetrics], None] | None = None
+
+
+def set_http_metrics_hook(hook: Callable[[HttpCallMetrics], None] | None) -> None:
+    """
+    :param hook: executed with metrics of every outbound call, calls are not measured if None
+    """
+    global _hook
+    _hook = hook
+
+
+class HttpCallRecorder:
+    """
+    Measures one logical call, created with start_http_call only if hook is set.
+    """
+
+    __slots__ = ("endpoint", "method", "request_bytes", "attempts", "status_code", "response_bytes", "backoff_seconds",
+                 "_hook", "_started")
+
+    def __init__(self, hook: Callable[[HttpCallMetrics], None], endpoint: str, method: str, request_bytes: int):
+        self._hook = hook
+        self.endpoint = endpoint
+        self.method = method
+        self.request_bytes = request_bytes
+        self.attempts = 0
+        self.status_code: int | None = None
+        self.response_bytes = 0
+        self.backoff_seconds = 0.0
+        self._started = time.perf_counter()
+
+    def attempt(self, response=None, status_code: int | None = None, response_bytes: int | None = None) -> None:
+        """
+        :param response: of the attempt, None if attempt failed without response
+        :param status_code: if response is not HTTP response, e.g. result of LLM SDK call
+        :param response_bytes: if response is not HTTP response
+        """
+        self.attempts += 1
+        self.status_code = response.status_code if response is not None else status_code
+        self.response_bytes += response_size(response) if response_bytes is None else response_bytes
+
+    def backoff(self, seconds: float) -> None:
+        self.backoff_seconds += seconds
+
+    def finish(self, error: BaseException | None = None) -> None:
+        metrics = HttpCallMetrics(endpoint=self.endpoint, method=self.method, latency_seconds=time.perf_counter() - self._started,
+                                  attempts=self.attempts, status_code=self.status_code, request_bytes=self.request_bytes,
+                                  response_bytes=self.response_bytes, backoff_seconds=self.backoff_seconds,
+                                  error=type(error).__name__ if error else None)
+        # instrumentation must never fail the conversation turn
+        try:
+            self._hook(metrics)
+        except Exception as e:
+            log.error(f"HTTP metrics hook failed for endpoint: {self.endpoint}, error: {e}")
+
+
+def start_http_call(endpoint: str, method: str, request: dict | None = None) -> HttpCallRecorder | None:
+    """
+    :param endpoint: url of the request or name of the API
+    :param method: HTTP method or name of the SDK function
+    :param request: params of the HTTP request, only json and data are measured
+    :return: recorder of the call, None if hook is not set
+    """
+    hook = _hook
+    if hook is None:
+        return None
+    return HttpCallRecorder(hook=hook, endpoint=endpoint_name(endpoint), method=method, request_bytes=request_size(request))
+
+
+def endpoint_name(url: str | None) -> str:
+    if not url or "://" not in url:
+        return url or ""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}{parts.path}"
+
+
+def request_size(request: dict | None) -> int:
+    if not request:
+        return 0
+    if request.get("json") is not None:
+        return json_size(request["json"])
+    data = request.get("data")
+    if isinstance(data, (bytes, bytearray)):
+        return len(data)
+    return len(data.encode("utf-8")) if isinstance(data, str) else 0
+
+
+def response_size(response) -> int:
+    content = getattr(response, "content", None)
+    return len(content) if isinstance(content, (bytes, bytearray)) else 0
+
+
+def json_size(value) -> int:
+    return len(json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8"))
+
+
+class HttpMetricsAggregator:
+    """
+    HTTP metrics hook which aggregates metrics per endpoint in memory. It is safe to share between threads.
+    Latency percentiles are estimated from histogram buckets, see LATENCY_BUCKETS.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._endpoints: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, metrics: HttpCallMetrics) -> None:
+        with self._lock:
+            endpoint = self._endpoints.get(metrics.endpoint)
+            if endpoint is None:
+                endpoint = self._endpoints[metrics.endpoint] = {
+                    "calls": 0, "errors": 0, "attempts": 0, "latency_seconds": 0.0, "max_latency_seconds": 0.0,
+                    "backoff_seconds": 0.0, "request_bytes": 0, "response_bytes": 0, "status_codes": {},
+                    "buckets": [0] * (len(self.buckets) + 1),
+                }
+            endpoint["calls"] += 1
+            endpoint["errors"] += 1 if metrics.error else 0
+            endpoint["attempts"] += metrics.attempts
+            endpoint["latency_seconds"] += metrics.latency_seconds
+            endpoint["max_latency_seconds"] = max(endpoint["max_latency_seconds"], metrics.latency_seconds)
+            endpoint["backoff_seconds"] += metrics.backoff_seconds
+            endpoint["request_bytes"] += metrics.request_bytes
+            endpoint["response_bytes"] += metrics.response_bytes
+            status = str(metrics.status_code) if metrics.status_code is not None else "none"
+            endpoint["status_codes"][status] = endpoint["status_codes"].get(status, 0) + 1
+            endpoint["buckets"][bisect.bisect_left(self.buckets, metrics.latency_seconds)] += 1
+
+    def summary(self) -> dict[str, dict]:
+        """
+        :return: totals and p50/p95/p99 latency per endpoint, sorted by total latency descending
+        """
+        with self._lock:
+            endpoints = sorted(self._endpoints.items(), key=lambda item: item[1]["latency_seconds"], reverse=True)
+            summary = {}
+            for name, totals in endpoints:
+                summary[name] = {key: value for key, value in totals.items() if key != "buckets"}
+                summary[name]["status_codes"] = dict(totals["status_codes"])
+                for percentile in (50, 95, 99):
+                    summary[name][f"p{percentile}_seconds"] = self._percentile(totals, percentile / 100)
+            return summary
+
+    def to_prometheus(self, prefix: str = "omnia_http") -> str:
+        """
+        :param prefix: of metric names
+        :return: metrics in Prometheus text exposition format
+        """
+        with self._lock:
+            endpoints = {name: dict(totals, status_codes=dict(totals["status_codes"]), buckets=list(totals["buckets"]))
+                         for name, totals in self._endpoints.items()}
+        lines = [f"# HELP {prefix}_call_duration_seconds Latency of outbound calls including retries.",
+                 f"# TYPE {prefix}_call_duration_seconds histogram"]
+        for name, totals in endpoints.items():
+            label = _escape(name)
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), totals["buckets"]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{prefix}_call_duration_seconds_bucket{{endpoint="{label}",le="{le}"}} {cumulative}')
+            lines.append(f'{prefix}_call_duration_seconds_sum{{endpoint="{label}"}} {totals["latency_seconds"]}')
+            lines.append(f'{prefix}_call_duration_seconds_count{{endpoint="{label}"}} {totals["calls"]}')
+        lines += [f"# HELP {prefix}_calls_total Outbound calls by status of the last response.", f"# TYPE {prefix}_calls_total counter"]
+        for name, totals in endpoints.items():
+            for status, count in totals["status_codes"].items():
+                lines.append(f'{prefix}_calls_total{{endpoint="{_escape(name)}",status="{status}"}} {count}')
+        for metric, key, help_text in (("attempts_total", "attempts", "Attempts including retries."),
+                                       ("backoff_seconds_total", "backoff_seconds", "Time spent waiting between attempts."),
+                                       ("request_bytes_total", "request_bytes", "Size of request bodies."),
+                                       ("response_bytes_total", "response_bytes", "Size of response bodies.")):
+            lines += [f"# HELP {prefix}_{metric} {help_text}", f"# TYPE {prefix}_{metric} counter"]
+            lines += [f'{prefix}_{metric}{{endpoint="{_escape(name)}"}} {totals[key]}' for name, totals in endpoints.items()]
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._endpoints.clear()
+
+    # linear interpolation inside the bucket containing the percentile, the last bucket is capped by max latency
+    def _percentile(self, totals: dict, quantile: float) -> float:
+        rank = quantile * totals["calls"]
+        cumulative = 0
+        for index, count in enumerate(totals["buckets"]):
+            if count and cumulative + count >= rank:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else totals["max_latency_seconds"]
+                upper = min(upper, totals["max_latency_seconds"])
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return 0.0
+
+
+def _escape(label: str) -> str:
+    return label.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
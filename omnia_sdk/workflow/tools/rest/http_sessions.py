@@ -0,0 +1,180 @@
+import asyncio
+import dataclasses
+import socket
+import threading
+import weakref
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+
+from omnia_sdk.workflow.tools.rest import config as rest_config
+
+"""
+This module provides shared HTTP sessions with keep-alive connection pools, one session per scheme and host.
+Module level functions like requests.post open a new TCP and TLS connection on every call, while pooled connections are
+reused by all requests to the same host, e.g. every outbound message and LLM call to Infobip API.
+
+Functions post, put, get and delete are drop-in replacements for requests functions and should be passed to retryable_request:
+    retryable_request(config, x=http_sessions.post, url=url, json=body, headers=headers)
+
+Coroutine functions post_async, put_async, get_async and delete_async should be passed to retryable_request_async. They use
+one httpx.AsyncClient per event loop, which pools keep-alive connections for all hosts.
+
+Sessions are safe to share between threads. Cookies are never stored, so sessions do not leak state between chatbot sessions.
+Pool sizes are read from the environment (see rest/config.py) or set with configure_http_pools.
+"""
+
+
+@dataclasses.dataclass
+class HttpPoolConfig:
+    # number of hosts for which pools are cached per session
+    pool_connections: int = rest_config.HTTP_POOL_CONNECTIONS
+    # connections kept alive per host, should be at least the number of threads calling the host concurrently
+    pool_maxsize: int = rest_config.HTTP_POOL_MAXSIZE
+    # enables TCP keep-alive probes so idle pooled connections are not silently dropped by NAT and load balancers
+    tcp_keepalive: bool = rest_config.HTTP_TCP_KEEPALIVE
+
+    def __post_init__(self):
+        if self.pool_connections < 1 or self.pool_maxsize < 1:
+            raise ValueError("Connection pool sizes must be positive")
+
+
+_pool_config = HttpPoolConfig()
+_sessions: dict[str, requests.Session] = {}
+_lock = threading.Lock()
+# async clients are bound to the event loop in which they were created
+_async_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient] = weakref.WeakKeyDictionary()
+
+
+class _KeepAliveAdapter(HTTPAdapter):
+
+    def __init__(self, tcp_keepalive: bool, **kwargs):
+        self.tcp_keepalive = tcp_keepalive
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        if self.tcp_keepalive:
+            kwargs["socket_options"] = HTTPConnection.default_socket_options + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+        super().init_poolmanager(*args, **kwargs)
+
+
+def _create_session(pool_config: HttpPoolConfig) -> requests.Session:
+    session = requests.Session()
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    adapter = _KeepAliveAdapter(tcp_keepalive=pool_config.tcp_keepalive, pool_connections=pool_config.pool_connections,
+                                pool_maxsize=pool_config.pool_maxsize)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session(url: str) -> requests.Session:
+    """
+    Returns shared session for the scheme and host of the url, session is created on the first request to the host.
+    :param url: of the request
+    :return: session with connection pool for the host
+    """
+    parts = urlsplit(url)
+    key = f"{parts.scheme}://{parts.netloc}"
+    session = _sessions.get(key)
+    if session is None:
+        with _lock:
+            session = _sessions.get(key)
+            if session is None:
+                session = _sessions[key] = _create_session(_pool_config)
+    return session
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    Returns shared async client for the running event loop, client is created on the first request in the loop.
+    :return: client with connection pool for all hosts
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        client = _async_clients[loop] = _create_async_client(_pool_config)
+    return client
+
+
+def _create_async_client(pool_config: HttpPoolConfig) -> httpx.AsyncClient:
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=pool_config.pool_connections * pool_config.pool_maxsize)
+    transport = httpx.AsyncHTTPTransport(limits=limits, socket_options=[(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+                                         if pool_config.tcp_keepalive else None)
+    return httpx.AsyncClient(transport=transport, cookies=CookieJar(policy=DefaultCookiePolicy(allowed_domains=[])))
+
+
+def configure_http_pools(pool_config: HttpPoolConfig) -> None:
+    """
+    Sets connection pool sizes, existing sessions are closed and recreated on the next request.
+    Async clients are recreated in event loops started afterward, use close_async_client to recreate the client of running loop.
+    :param pool_config: of sessions
+    """
+    global _pool_config
+    with _lock:
+        _pool_config = pool_config
+    close_http_sessions()
+
+
+def close_http_sessions() -> None:
+    """
+    Closes all shared sessions and their pooled connections, e.g. on worker shutdown.
+    """
+    with _lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.close()
+
+
+async def close_async_client() -> None:
+    """
+    Closes async client of the running event loop and its pooled connections, e.g. before the loop is closed.
+    """
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def request(method: str, url: str, **kwargs) -> requests.Response:
+    return get_session(url).request(method=method, url=url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request("POST", url=url, **kwargs)
+
+
+def put(url: str, **kwargs) -> requests.Response:
+    return request("PUT", url=url, **kwargs)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request("GET", url=url, **kwargs)
+
+
+def delete(url: str, **kwargs) -> requests.Response:
+    return request("DELETE", url=url, **kwargs)
+
+
+async def request_async(method: str, url: str, **kwargs) -> httpx.Response:
+    return await get_async_client().request(method=method, url=url, **kwargs)
+
+
+async def post_async(url: str, **kwargs) -> httpx.Response:
+    return await request_async("POST", url=url, **kwargs)
+
+
+async def put_async(url: str, **kwargs) -> httpx.Response:
+    return await request_async("PUT", url=url, **kwargs)
+
+
+async def get_async(url: str, **kwargs) -> httpx.Response:
+    return await request_async("GET", url=url, **kwargs)
+
+
+async def delete_async(url: str, **kwargs) -> httpx.Response:
+    return await request_async("DELETE", url=url, **kwargs)
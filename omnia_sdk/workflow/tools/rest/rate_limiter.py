@@ -0,0 +1,295 @@
+import asyncio
+import dataclasses
+import threading
+import time
+from collections import deque
+
+from omnia_sdk.workflow.tools.channels.config import INFOBIP_BASE_URL
+from omnia_sdk.workflow.tools.rest.deadline import get_remaining_seconds
+from omnia_sdk.workflow.tools.rest.exceptions import DeadlineExceededError
+
+"""
+This module provides client-side rate and concurrency limits per Infobip API family, shared by all sessions of the process.
+Bursts (bulk templates, batched LLM calls, outbound messages of many sessions) are smoothed on the client instead of being
+rejected by the API with 429 and retried.
+
+ - rate: token bucket refilled with rate_per_second tokens up to burst, each request takes one token
+ - concurrency: number of requests in flight is bounded by an adaptive (AIMD) limit. Every successful response increases the
+   limit by 1/limit (about +1 per round trip of all requests in flight) up to max_concurrency, throttling and overload
+   (429, 503, timeouts) multiply it by decrease_factor, at most once per decrease_interval_seconds
+
+Limits are enforced by retryable_request(_async) and LLM wrappers in chat.py. Requests waiting for a permit are bound by the
+turn deadline (see deadline.py). Defaults can be replaced with configure_api_limits, e.g. to match limits of the account:
+    configure_api_limits(family=WHATSAPP, limits=ApiLimits(rate_per_second=80, burst=80, max_concurrency=32))
+"""
+
+MESSAGES = "messages"
+WHATSAPP = "whatsapp"
+PEOPLE = "people"
+GPT_CREATOR = "gpt-creator"
+
+
+@dataclasses.dataclass(frozen=True)
+class ApiLimits:
+    # token bucket refill rate, rate is not limited if None
+    rate_per_second: float | None = None
+    burst: int = 1
+    # upper bound of the adaptive concurrency limit, concurrency is not limited if None
+    max_concurrency: int | None = None
+    min_concurrency: int = 1
+    # limit at start, max_concurrency if None
+    initial_concurrency: int | None = None
+    decrease_factor: float = 0.5
+    decrease_interval_seconds: float = 1.0
+
+    def __post_init__(self):
+        if self.rate_per_second is not None and self.rate_per_second <= 0:
+            raise ValueError("rate_per_second must be positive")
+        if self.burst < 1 or self.min_concurrency < 1:
+            raise ValueError("burst and min_concurrency must be at least 1")
+        if self.max_concurrency is not None and self.max_concurrency < self.min_concurrency:
+            raise ValueError("max_concurrency must not be lower than min_concurrency")
+        if not 0 < self.decrease_factor < 1:
+            raise ValueError("decrease_factor must be between 0 and 1")
+
+
+DEFAULT_API_LIMITS = {
+    MESSAGES: ApiLimits(rate_per_second=100, burst=100, max_concurrency=64, initial_concurrency=16),
+    WHATSAPP: ApiLimits(rate_per_second=20, burst=20, max_concurrency=16, initial_concurrency=4),
+    PEOPLE: ApiLimits(rate_per_second=20, burst=20, max_concurrency=16, initial_concurrency=4),
+    GPT_CREATOR: ApiLimits(max_concurrency=64, initial_concurrency=16),
+}
+
+# url prefix of every API family
+API_FAMILIES = {
+    MESSAGES: f"{INFOBIP_BASE_URL}/messages-api",
+    WHATSAPP: f"{INFOBIP_BASE_URL}/whatsapp",
+    PEOPLE: f"{INFOBIP_BASE_URL}/people",
+    GPT_CREATOR: f"{INFOBIP_BASE_URL}/gpt-creator",
+}
+
+
+class TokenBucket:
+
+    def __init__(self, rate_per_second: float, burst: int):
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    def reserve(self) -> float:
+        """
+        Takes one token, tokens may be taken in advance.
+        :return: seconds to wait until the taken token is available
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate_per_second)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate_per_second
+
+    # returns token of a request which will not be executed
+    def cancel(self) -> None:
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + 1)
+
+
+class _Waiter:
+    __slots__ = ("wake", "granted")
+
+    def __init__(self, wake):
+        self.wake = wake
+        self.granted = False
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Bounds requests in flight with AIMD limit. Released permit is handed over to the oldest waiting thread or coroutine.
+    """
+
+    def __init__(self, limits: ApiLimits):
+        self.limits = limits
+        self.limit = float(limits.initial_concurrency or limits.max_concurrency)
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        self._waiters: deque[_Waiter] = deque()
+        self._last_decrease = 0.0
+
+    def acquire(self, timeout: float | None = None) -> bool:
+        """
+        Waits for a permit, permit must be released with release.
+        :param timeout: seconds, waits indefinitely if None
+        :return: false if permit was not acquired before timeout
+        """
+        event = threading.Event()
+        waiter = self._enqueue(wake=event.set)
+        if waiter is None:
+            return True
+        event.wait(timeout=timeout)
+        return self._granted_or_abandon(waiter)
+
+    async def acquire_async(self, timeout: float | None = None) -> bool:
+        """
+        Waits for a permit without blocking the event loop, see acquire.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        waiter = self._enqueue(wake=lambda: loop.call_soon_threadsafe(_resolve, future))
+        if waiter is None:
+            return True
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            if self._granted_or_abandon(waiter):
+                self.release(overloaded=None)
+            raise
+        return self._granted_or_abandon(waiter)
+
+    def release(self, overloaded: bool | None) -> None:
+        """
+        :param overloaded: True if API was throttling or overloaded, False if request succeeded, None if outcome says nothing
+        about the load, e.g. request failed with client error
+        """
+        with self._lock:
+            self._adjust(overloaded)
+            self.in_flight -= 1
+            granted = []
+            while self._waiters and self.in_flight < int(self.limit):
+                waiter = self._waiters.popleft()
+                waiter.granted = True
+                self.in_flight += 1
+                granted.append(waiter)
+        for waiter in granted:
+            waiter.wake()
+
+    # returns None if permit was acquired immediately, otherwise waiter which is granted permit later
+    def _enqueue(self, wake) -> _Waiter | None:
+        with self._lock:
+            if not self._waiters and self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return None
+            waiter = _Waiter(wake=wake)
+            self._waiters.append(waiter)
+            return waiter
+
+    def _granted_or_abandon(self, waiter: _Waiter) -> bool:
+        with self._lock:
+            if not waiter.granted:
+                self._waiters.remove(waiter)
+            return waiter.granted
+
+    def _adjust(self, overloaded: bool | None) -> None:
+        limits = self.limits
+        if overloaded is False:
+            self.limit = min(limits.max_concurrency, self.limit + 1 / self.limit)
+        elif overloaded:
+            now = time.monotonic()
+            # requests in flight fail together, limit is decreased once for all of them
+            if now - self._last_decrease >= limits.decrease_interval_seconds:
+                self.limit = max(limits.min_concurrency, self.limit * limits.decrease_factor)
+                self._last_decrease = now
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class ApiLimiter:
+    """
+    Rate and concurrency limits of one API family.
+    """
+
+    def __init__(self, family: str, limits: ApiLimits):
+        self.family = family
+        self.limits = limits
+        self.bucket = TokenBucket(limits.rate_per_second, limits.burst) if limits.rate_per_second else None
+        self.concurrency = AdaptiveConcurrencyLimiter(limits) if limits.max_concurrency else None
+
+    def acquire(self, bound_by_deadline: bool = True) -> None:
+        """
+        Waits until request may be executed, DeadlineExceededError is raised if it can not start before the turn deadline.
+        Caller must call release after the request, unless this method raised.
+        :param bound_by_deadline: whether waiting is bound by the turn deadline, see deadline.py
+        """
+        time.sleep(self._reserve_token(bound_by_deadline))
+        if self.concurrency and not self.concurrency.acquire(timeout=_remaining(bound_by_deadline)):
+            raise DeadlineExceededError(message=f"Concurrency limit of {self.family} API not available before deadline.")
+
+    async def acquire_async(self, bound_by_deadline: bool = True) -> None:
+        """
+        Asynchronous version of acquire.
+        """
+        await asyncio.sleep(self._reserve_token(bound_by_deadline))
+        if self.concurrency and not await self.concurrency.acquire_async(timeout=_remaining(bound_by_deadline)):
+            raise DeadlineExceededError(message=f"Concurrency limit of {self.family} API not available before deadline.")
+
+    def release(self, overloaded: bool | None) -> None:
+        if self.concurrency:
+            self.concurrency.release(overloaded=overloaded)
+
+    def _reserve_token(self, bound_by_deadline: bool) -> float:
+        if self.bucket is None:
+            return 0.0
+        wait = self.bucket.reserve()
+        remaining = get_remaining_seconds() if bound_by_deadline else None
+        if remaining is not None and wait >= remaining:
+            self.bucket.cancel()
+            raise DeadlineExceededError(message=f"Rate limit of {self.family} API not available before deadline.")
+        return wait
+
+
+def _remaining(bound_by_deadline: bool) -> float | None:
+    remaining = get_remaining_seconds() if bound_by_deadline else None
+    return None if remaining is None else max(0.0, remaining)
+
+
+def is_overloaded(status_code: int | None) -> bool | None:
+    """
+    Maps outcome of the request to the load signal of ApiLimiter.release.
+    :param status_code: of the response, None if request failed without response, e.g. timed out
+    """
+    if status_code is None or status_code in (429, 503):
+        return True
+    if status_code < 400:
+        return False
+    return None
+
+
+_lock = threading.Lock()
+_limiters: dict[str, ApiLimiter] = {family: ApiLimiter(family, limits) for family, limits in DEFAULT_API_LIMITS.items()}
+
+
+def get_api_limiter(url: str | None) -> ApiLimiter | None:
+    """
+    Returns limiter of the API family of the url, None if url does not belong to any family.
+    :param url: of the request
+    """
+    if url:
+        for family, prefix in API_FAMILIES.items():
+            if url.startswith(prefix):
+                return _limiters.get(family)
+    return None
+
+
+def get_api_limiter_by_family(family: str) -> ApiLimiter | None:
+    return _limiters.get(family)
+
+
+def configure_api_limits(family: str, limits: ApiLimits | None) -> None:
+    """
+    Replaces limits of the API family, requests in flight are completed with the previous limiter.
+    :param family: one of MESSAGES, WHATSAPP, PEOPLE, GPT_CREATOR
+    :param limits: of the family, family is not limited if None
+    """
+    if family not in API_FAMILIES:
+        raise ValueError(f"Unknown API family: {family}")
+    with _lock:
+        if limits is None:
+            _limiters.pop(family, None)
+        else:
+            _limiters[family] = ApiLimiter(family, limits)
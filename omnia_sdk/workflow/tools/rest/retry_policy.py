@@ -0,0 +1,127 @@
+import dataclasses
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+from omnia_sdk.workflow.tools.channels.config import INFOBIP_BASE_URL
+from omnia_sdk.workflow.tools.rest import config as rest_config
+
+"""
+This module defines how retryable_request retries failed requests.
+Delays grow exponentially with the attempt and are drawn uniformly from [0, delay] (full jitter), so clients which failed at
+the same moment do not retry at the same moment again. Retry-After header of throttled/unavailable responses takes precedence.
+
+Policies may be overridden per endpoint with set_retry_policy, e.g. to fail fast when People service is not available:
+    set_retry_policy(url_prefix=f"{INFOBIP_BASE_URL}/people", policy=RetryPolicy(max_attempts=1))
+"""
+
+# statuses which may succeed on retry, other 4xx statuses are errors of the request itself
+RETRYABLE_STATUSES = frozenset({408, 429, *range(500, 600)})
+
+
+@dataclasses.dataclass(frozen=True)
+class RetryPolicy:
+    """
+    :param max_attempts: total number of attempts, including the first one
+    :param base_delay: maximum delay in seconds before the second attempt, doubled for every next attempt
+    :param max_delay: cap of the delay in seconds
+    :param retry_statuses: response statuses which are retried
+    :param respect_retry_after: whether Retry-After response header defines the delay instead of the backoff
+    :param max_retry_after: cap in seconds of the Retry-After delay, longer delays are not waited for and request fails
+    """
+    max_attempts: int = 3
+    base_delay: float = 1.0
+    max_delay: float = 10.0
+    retry_statuses: frozenset[int] = RETRYABLE_STATUSES
+    respect_retry_after: bool = True
+    max_retry_after: float = 30.0
+
+    def __post_init__(self):
+        if self.max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        if self.base_delay < 0 or self.max_delay < 0 or self.max_retry_after < 0:
+            raise ValueError("retry delays must not be negative")
+
+    def is_retryable(self, status_code: int) -> bool:
+        return status_code in self.retry_statuses
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Returns jittered delay in seconds after the failed attempt.
+        :param attempt: number of failed attempts so far, starting with 1
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def delay(self, attempt: int, response=None) -> float | None:
+        """
+        Returns delay in seconds before the next attempt, or None if the server asked to wait longer than max_retry_after.
+        :param attempt: number of failed attempts so far, starting with 1
+        :param response: failed response, None if request raised an exception
+        """
+        retry_after = _retry_after_seconds(response) if self.respect_retry_after and response is not None else None
+        if retry_after is None:
+            return self.backoff(attempt)
+        return retry_after if retry_after <= self.max_retry_after else None
+
+
+# policy of all endpoints without override, see rest/config.py
+default_retry_policy = RetryPolicy(
+    max_attempts=rest_config.RETRY_MAX_ATTEMPTS,
+    base_delay=rest_config.RETRY_BASE_DELAY_SECONDS,
+    max_delay=rest_config.RETRY_MAX_DELAY_SECONDS,
+)
+
+# LLM endpoints recover from overload slowly, failing the turn is worse than waiting
+LLM_RETRY_POLICY = RetryPolicy(max_attempts=4, base_delay=2.0, max_delay=20.0, max_retry_after=60.0)
+# callbacks to user's HTTP endpoint should fail fast, not delaying the rest of the conversation turn
+CALLBACK_RETRY_POLICY = RetryPolicy(max_attempts=2, base_delay=0.2, max_delay=0.5, max_retry_after=1.0)
+
+_lock = threading.Lock()
+# (url_prefix, policy) pairs, the longest prefix first
+_endpoint_policies: tuple[tuple[str, RetryPolicy], ...] = ((f"{INFOBIP_BASE_URL}/gpt-creator", LLM_RETRY_POLICY),)
+
+
+def set_retry_policy(url_prefix: str, policy: RetryPolicy | None) -> None:
+    """
+    Sets retry policy of all requests whose url starts with url_prefix, the longest matching prefix wins.
+    :param url_prefix: e.g. "https://api.infobip.com/gpt-creator"
+    :param policy: of the endpoint, None removes the override
+    """
+    global _endpoint_policies
+    with _lock:
+        policies = {prefix: value for prefix, value in _endpoint_policies if prefix != url_prefix}
+        if policy is not None:
+            policies[url_prefix] = policy
+        _endpoint_policies = tuple(sorted(policies.items(), key=lambda item: len(item[0]), reverse=True))
+
+
+def get_retry_policy(url: str | None, default: RetryPolicy | None = None) -> RetryPolicy:
+    """
+    Returns policy of the endpoint.
+    :param url: of the request
+    :param default: policy if the endpoint has no override, default_retry_policy if None
+    """
+    if url:
+        for prefix, policy in _endpoint_policies:
+            if url.startswith(prefix):
+                return policy
+    return default or default_retry_policy
+
+
+def _retry_after_seconds(response) -> float | None:
+    # Retry-After is either delay in seconds or HTTP date: https://www.rfc-editor.org/rfc/rfc9110#field.retry-after
+    try:
+        value = response.headers.get("Retry-After")
+    except AttributeError:
+        return None
+    if not isinstance(value, str):
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
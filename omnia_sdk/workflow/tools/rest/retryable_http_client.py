@@ -1,60 +1,229 @@
+import asyncio
 import logging as log
 import time
 
 from requests import Response
 
 from omnia_sdk.workflow.chatbot.constants import CONFIGURABLE
-from omnia_sdk.workflow.tools.rest.exceptions import ApplicationError, UserRequestError
+from omnia_sdk.workflow.tools.rest.circuit_breaker import get_circuit_breaker
+from omnia_sdk.workflow.tools.rest.deadline import bound_timeout, check_deadline, get_remaining_seconds
+from omnia_sdk.workflow.tools.rest.exceptions import ApplicationError, CircuitOpenError, DeadlineExceededError, UserRequestError
+from omnia_sdk.workflow.tools.rest.http_metrics import start_http_call
+from omnia_sdk.workflow.tools.rest.rate_limiter import get_api_limiter, is_overloaded
+from omnia_sdk.workflow.tools.rest.retry_policy import RetryPolicy, get_retry_policy
 
 READ_TIMEOUT_SECONDS = 35
-_max_attempts = 3
-_backoff_seconds = 2
 
 """
 This module provides basic retryable HTTP client for making requests to external services.
 Intra-cluster requests are subject to automatic retries, but this SDK mostly communicates with public APIs outside the cluster.
-
+Retries follow RetryPolicy of the endpoint, see retry_policy.py.
 """
 
 
-def retryable_request(config, x, decode_json: bool = True, **kwargs) -> dict | bytes:
+def retryable_request(
+    config, x, decode_json: bool = True, retry_policy: RetryPolicy | None = None, bound_by_deadline: bool = True, **kwargs
+) -> dict | bytes:
+    """
+    Retries request x on failures and retryable statuses as defined by the retry policy.
+    DeadlineExceededError is raised if the turn deadline passes or the next attempt can not start before it.
+    CircuitOpenError is raised without executing the request while circuit breaker of the endpoint is open, see circuit_breaker.py.
+    Requests to Infobip APIs wait for rate and concurrency limits of the API family, see rate_limiter.py.
+
+    :param config: channel and session details
+    :param x: HTTP method to execute, e.g. http_sessions.post which reuses pooled connections
+    :param decode_json: whether to decode response content to JSON or return raw content
+    :param retry_policy: of this request, policy of the endpoint is used if None, see retry_policy.get_retry_policy
+    :param bound_by_deadline: whether timeouts and retries are bound by the turn deadline, see deadline.py
+    :param kwargs: params for HTTP request
+    :return: response of HTTP operation
     """
-    Retries request x if failure occurs up to MAX_ATTEMPTS times.
+    config = config.get(CONFIGURABLE, config)
+    call = _RetryableCall(x, {"timeout": READ_TIMEOUT_SECONDS} | kwargs, retry_policy, bound_by_deadline)
+    try:
+        for attempt in range(1, call.policy.max_attempts + 1):
+            call.check_circuit()
+            if call.limiter:
+                call.limiter.acquire(bound_by_deadline=bound_by_deadline)
+            request_kwargs = call.bound_timeout()
+            response: Response | None = None
+            try:
+                response = x(**request_kwargs)
+            # this will most of the time correspond to timeout error
+            except Exception as most_likely_timeout:
+                call.failed(most_likely_timeout)
+            except BaseException:
+                call.abandoned()
+                raise
+            call.completed(response)
+            if response is not None:
+                if not call.policy.is_retryable(response.status_code):
+                    return _handle_response(config, call.kwargs, response, decode_json)
+                # transient API error (throttling, 5xx) might be fixed with retry
+                _log_transient_error(config, call.kwargs, response, call.attempts)
+
+            delay = call.next_delay(attempt, response)
+            if delay is None:
+                break
+            time.sleep(delay)
+        # all retries failed, endpoint is AFK or the last attempt was cut by the deadline
+        call.raise_failure()
+    except BaseException as error:
+        call.finish(error)
+        raise
+    finally:
+        call.finish()
+
+
+async def retryable_request_async(
+    config, x, decode_json: bool = True, retry_policy: RetryPolicy | None = None, bound_by_deadline: bool = True, **kwargs
+) -> dict | bytes:
+    """
+    Asynchronous version of retryable_request, backoff between attempts does not block the event loop.
+    Errors are the same as in retryable_request.
 
     :param config: channel and session details
-    :param x: HTTP method to execute
+    :param x: coroutine function executing HTTP method, e.g. http_sessions.post_async which reuses pooled connections
     :param decode_json: whether to decode response content to JSON or return raw content
+    :param retry_policy: of this request, policy of the endpoint is used if None, see retry_policy.get_retry_policy
+    :param bound_by_deadline: whether timeouts and retries are bound by the turn deadline, see deadline.py
     :param kwargs: params for HTTP request
     :return: response of HTTP operation
     """
     config = config.get(CONFIGURABLE, config)
-    kwargs = {"timeout": READ_TIMEOUT_SECONDS} | kwargs
-    attempts = []
-    for _ in range(_max_attempts):
+    call = _RetryableCall(x, {"timeout": READ_TIMEOUT_SECONDS} | kwargs, retry_policy, bound_by_deadline)
+    try:
+        for attempt in range(1, call.policy.max_attempts + 1):
+            call.check_circuit()
+            if call.limiter:
+                await call.limiter.acquire_async(bound_by_deadline=bound_by_deadline)
+            request_kwargs = call.bound_timeout()
+            response = None
+            try:
+                response = await x(**request_kwargs)
+            except Exception as most_likely_timeout:
+                call.failed(most_likely_timeout)
+            # caller was cancelled, e.g. turn was superseded or timed out
+            except BaseException:
+                call.abandoned()
+                raise
+            call.completed(response)
+            if response is not None:
+                if not call.policy.is_retryable(response.status_code):
+                    return _handle_response(config, call.kwargs, response, decode_json)
+                _log_transient_error(config, call.kwargs, response, call.attempts)
+
+            delay = call.next_delay(attempt, response)
+            if delay is None:
+                break
+            await asyncio.sleep(delay)
+        call.raise_failure()
+    except BaseException as error:
+        call.finish(error)
+        raise
+    finally:
+        call.finish()
+
+
+class _RetryableCall:
+    """
+    State of one retryable request shared by its attempts: retry policy, circuit breaker, rate limiter and metrics of the endpoint.
+    """
+
+    def __init__(self, x, kwargs: dict, retry_policy: RetryPolicy | None, bound_by_deadline: bool):
+        url = kwargs.get("url")
+        self.kwargs = kwargs
+        self.bound_by_deadline = bound_by_deadline
+        self.policy = retry_policy or get_retry_policy(url)
+        self.breaker = get_circuit_breaker(url) if url else None
+        self.limiter = get_api_limiter(url)
+        self.recorder = start_http_call(endpoint=url, method=getattr(x, "__name__", "").removesuffix("_async").upper(), request=kwargs)
+        self.attempts = []
+
+    def check_circuit(self) -> None:
+        if self.breaker is not None and not self.breaker.allow():
+            raise CircuitOpenError(message=f"Circuit breaker of {self.breaker.endpoint} is open.", trace=self.attempts)
+
+    # returns request params with timeout shrunk to the remaining turn budget, permit of the limiter is released if deadline passed
+    def bound_timeout(self) -> dict:
+        if not self.bound_by_deadline:
+            return self.kwargs
         try:
-            response: Response = x(**kwargs)
-        # this will most of the time correspond to timeout error
-        except Exception as most_likely_timeout:
-            log.error(str(most_likely_timeout))
-            time.sleep(_backoff_seconds)
-            attempts.append({"error": str(most_likely_timeout)})
-            continue
-
-        if response.status_code < 400:
-            return response.json() if decode_json else response.content
-
-        # API call error, no recovery/retries from this
-        if response.status_code < 500:
-            _log_error(config, kwargs, response)
-            raise UserRequestError(code=response.status_code, message=response.text)
-
-        # Transient API error (500+) might be fixed with retry
-        time.sleep(_backoff_seconds)
+            remaining = check_deadline(trace=self.attempts)
+        except DeadlineExceededError:
+            if self.limiter:
+                self.limiter.release(overloaded=None)
+            raise
+        return self.kwargs if remaining is None else self.kwargs | {"timeout": bound_timeout(self.kwargs["timeout"], remaining)}
+
+    def failed(self, error: Exception) -> None:
+        log.error(str(error))
+        self.attempts.append({"error": str(error)})
+
+    # endpoint failed if request raised an exception or server responded with an error, 4xx responses mean the endpoint is up
+    def completed(self, response) -> None:
+        status_code = response.status_code if response is not None else None
+        if self.limiter:
+            self.limiter.release(overloaded=is_overloaded(status_code))
+        if self.breaker is not None:
+            if status_code is None or status_code >= 500:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+        if self.recorder:
+            self.recorder.attempt(response)
+
+    # request was interrupted by the caller (cancellation, interrupt), which says nothing about health of the endpoint
+    def abandoned(self) -> None:
+        if self.limiter:
+            self.limiter.release(overloaded=None)
+
+    # returns None if request should not be attempted again
+    def next_delay(self, attempt: int, response) -> float | None:
+        if attempt >= self.policy.max_attempts:
+            return None
+        delay = self.policy.delay(attempt=attempt, response=response)
+        if delay is None:
+            log.error(f"Retry-After of {response.headers.get('Retry-After')} exceeds {self.policy.max_retry_after} seconds, "
+                      f"request is not retried.")
+            return None
+        remaining = get_remaining_seconds() if self.bound_by_deadline else None
+        # retry would start after the deadline, there is no point in waiting for it
+        if remaining is not None and delay >= remaining:
+            raise DeadlineExceededError(trace=self.attempts)
+        if self.recorder:
+            self.recorder.backoff(delay)
+        return delay
+
+    def raise_failure(self) -> None:
+        if self.bound_by_deadline:
+            check_deadline(trace=self.attempts)
+        raise ApplicationError(code=500, message=f"Request failed after {len(self.attempts)} attempts.", trace=self.attempts)
+
+    # metrics are recorded once, with the error if request failed
+    def finish(self, error: BaseException | None = None) -> None:
+        if self.recorder:
+            self.recorder.finish(error)
+            self.recorder = None
+
+
+def _handle_response(config, kwargs, response, decode_json: bool) -> dict | bytes:
+    if response.status_code < 400:
+        return response.json() if decode_json else response.content
+
+    if response.status_code >= 500:
+        # server error which retry policy of the endpoint does not retry
         _log_error(config, kwargs, response, error_type="application")
-        attempts.append({"error": f"{response.text}", "status_code": {response.status_code}})
+        raise ApplicationError(code=response.status_code, message=response.text)
+
+    # API call error, no recovery/retries from this
+    _log_error(config, kwargs, response)
+    raise UserRequestError(code=response.status_code, message=response.text)
+
 
-    # all retries failed, endpoint is AFK
-    raise ApplicationError(code=500, message=f"Request failed after {_max_attempts} attempts.", trace=attempts)
+def _log_transient_error(config, kwargs, response, attempts: list) -> None:
+    _log_error(config, kwargs, response, error_type="application")
+    attempts.append({"error": f"{response.text}", "status_code": response.status_code})
 
 
 def _log_error(config, kwargs, response, error_type: str = "user"):
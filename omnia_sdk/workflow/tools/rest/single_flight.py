@@ -0,0 +1,221 @@
+import asyncio
+import copy
+import json
+import threading
+import weakref
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+from omnia_sdk.workflow.tools.rest.deadline import get_remaining_seconds
+from omnia_sdk.workflow.tools.rest.exceptions import DeadlineExceededError
+from omnia_sdk.workflow.tools.rest.retryable_http_client import retryable_request, retryable_request_async
+
+"""
+This module coalesces identical concurrent requests (single-flight): while a request is in flight, identical requests do not
+call the endpoint but wait for its result. Useful for lookups issued by many sessions at the same moment, e.g. the same People
+profile during a campaign or the same RAG question.
+
+Requests are identical if they have the same HTTP method, url, params, body and headers, except session specific headers.
+Only idempotent requests should be coalesced, waiting requests receive a copy of the result or the same exception.
+
+    profile = single_flight_request(config, x=http_sessions.post, url=url, json=body, headers=headers)
+
+Threads coalesce with threads (single_flight_request) and coroutines with coroutines of the same event loop
+(single_flight_request_async). Number of executed and deduplicated requests is reported by get_single_flight_stats.
+"""
+
+# headers which differ between sessions without changing the response
+SESSION_HEADERS = frozenset({"x-ib-omnia-session-id", "session-id"})
+
+
+class SingleFlightStats:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # requests which called the endpoint, requests which received result of identical in-flight request
+        self.executed = 0
+        self.deduplicated = 0
+
+    def record(self, deduplicated: bool) -> None:
+        with self._lock:
+            if deduplicated:
+                self.deduplicated += 1
+            else:
+                self.executed += 1
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """
+    Executes function once for all threads calling do with the same key at the same time.
+    """
+
+    def __init__(self, stats: SingleFlightStats | None = None):
+        self.stats = stats if stats else SingleFlightStats()
+        self._lock = threading.Lock()
+        self._flights: dict[Hashable, _Flight] = {}
+
+    def do(self, key: Hashable, function: Callable[[], Any]) -> Any:
+        """
+        :param key: identifying the call
+        :param function: executed if there is no call with the same key in flight
+        :return: result of the function, waiting threads receive a deep copy
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        self.stats.record(deduplicated=not leader)
+        if not leader:
+            return _wait(flight)
+        try:
+            flight.result = function()
+            return flight.result
+        except BaseException as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+
+def _wait(flight: _Flight) -> Any:
+    # waiting thread is bound by its own turn deadline, not the deadline of the executing thread
+    remaining = get_remaining_seconds()
+    if not flight.done.wait(timeout=None if remaining is None else max(0.0, remaining)):
+        raise DeadlineExceededError()
+    if flight.error is not None:
+        raise flight.error
+    return copy.deepcopy(flight.result)
+
+
+class _LeaderCancelled(Exception):
+    """
+    Set on the flight when the executing coroutine was cancelled, waiting coroutines execute the function again.
+    """
+
+
+class AsyncSingleFlight:
+    """
+    Executes coroutine function once for all coroutines calling do with the same key at the same time.
+    Instance must be used from a single event loop.
+    """
+
+    def __init__(self, stats: SingleFlightStats | None = None):
+        self.stats = stats if stats else SingleFlightStats()
+        self._flights: dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, function: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        :param key: identifying the call
+        :param function: coroutine function awaited if there is no call with the same key in flight
+        :return: result of the function, waiting coroutines receive a deep copy
+        """
+        while (future := self._flights.get(key)) is not None:
+            try:
+                # shield, so waiter hitting its deadline does not cancel the request of other coroutines
+                result = await asyncio.wait_for(asyncio.shield(future), timeout=get_remaining_seconds())
+            except asyncio.TimeoutError:
+                raise DeadlineExceededError()
+            # only the cancelled caller sees CancelledError, one of the waiting coroutines takes over the request
+            except _LeaderCancelled:
+                continue
+            self.stats.record(deduplicated=True)
+            return copy.deepcopy(result)
+
+        self.stats.record(deduplicated=False)
+        future = self._flights[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await function()
+        except asyncio.CancelledError:
+            _set_exception(future, _LeaderCancelled())
+            raise
+        except BaseException as error:
+            _set_exception(future, error)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._flights[key]
+
+
+def _set_exception(future: asyncio.Future, error: BaseException) -> None:
+    future.set_exception(error)
+    # exception is raised by the executing coroutine, future without waiters should not be logged as unretrieved
+    future.exception()
+
+
+_stats = SingleFlightStats()
+_single_flight = SingleFlight(stats=_stats)
+_async_single_flights: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncSingleFlight] = weakref.WeakKeyDictionary()
+
+
+def single_flight_request(config, x, decode_json: bool = True, ignored_headers: frozenset[str] = SESSION_HEADERS, **kwargs) -> dict | bytes:
+    """
+    Executes retryable_request, identical requests executed concurrently by other threads share one upstream call.
+
+    :param config: channel and session details
+    :param x: HTTP method to execute, e.g. http_sessions.post
+    :param decode_json: whether to decode response content to JSON or return raw content
+    :param ignored_headers: lowercase names of headers which do not make requests different
+    :param kwargs: params for retryable_request and HTTP request
+    :return: response of HTTP operation
+    """
+    key = request_key(x, kwargs, decode_json=decode_json, ignored_headers=ignored_headers)
+    return _single_flight.do(key, lambda: retryable_request(config, x, decode_json=decode_json, **kwargs))
+
+
+async def single_flight_request_async(
+    config, x, decode_json: bool = True, ignored_headers: frozenset[str] = SESSION_HEADERS, **kwargs
+) -> dict | bytes:
+    """
+    Executes retryable_request_async, identical requests awaited concurrently in the same event loop share one upstream call.
+    See single_flight_request pydocs for params.
+    """
+    loop = asyncio.get_running_loop()
+    single_flight = _async_single_flights.get(loop)
+    if single_flight is None:
+        single_flight = _async_single_flights[loop] = AsyncSingleFlight(stats=_stats)
+    key = request_key(x, kwargs, decode_json=decode_json, ignored_headers=ignored_headers)
+    return await single_flight.do(key, lambda: retryable_request_async(config, x, decode_json=decode_json, **kwargs))
+
+
+def request_key(x, kwargs: dict, decode_json: bool = True, ignored_headers: frozenset[str] = SESSION_HEADERS) -> tuple:
+    """
+    Returns key under which identical requests are coalesced. Timeouts and retry settings do not make requests different.
+    :param x: HTTP method
+    :param kwargs: params of HTTP request
+    :param decode_json: whether response is decoded to JSON
+    :param ignored_headers: lowercase names of headers which do not make requests different
+    """
+    headers = kwargs.get("headers") or {}
+    return (
+        getattr(x, "__name__", repr(x)),
+        kwargs.get("url"),
+        decode_json,
+        _canonical(kwargs.get("params")),
+        _canonical(kwargs.get("json")),
+        _canonical(kwargs.get("data")),
+        tuple(sorted((name.lower(), str(value)) for name, value in headers.items() if name.lower() not in ignored_headers)),
+    )
+
+
+def _canonical(value) -> str | bytes | None:
+    if value is None or isinstance(value, (str, bytes)):
+        return value
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def get_single_flight_stats() -> SingleFlightStats:
+    return _stats
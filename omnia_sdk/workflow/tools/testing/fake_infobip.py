@@ -0,0 +1,268 @@
+import argparse
+import asyncio
+import dataclasses
+import itertools
+import json
+import random
+import threading
+import time
+import uuid
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+"""
+This module provides local stand-in for Infobip API endpoints used by the tool modules, so flows can be load tested end-to-end
+without the live platform. Point the SDK at it before tool modules are imported:
+
+    python -m omnia_sdk.workflow.tools.testing.fake_infobip --port 8089 --latency-ms 300 --error-rate 0.01
+    INFOBIP_BASE_URL=http://127.0.0.1:8089 python my_load_test.py
+
+Implemented endpoints:
+ - messages:     POST /messages-api/1/messages
+ - whatsapp:     POST /whatsapp/1/message/template
+ - people:       POST /people/2/custom/persons/find, POST /people/2/custom/persons/find/list, POST, PUT and DELETE /people/2/persons
+ - chat_session: POST /gpt-creator/omnia/chat-session
+ - intent:       POST /gpt-creator/omnia/2/intent
+ - query:        POST /gpt-creator/omnia/2/query
+ - openai:       POST /gpt-creator/omnia/openai/v1/chat/completions
+ - google:       POST /gpt-creator/omnia/google/v1/models/{model}:generateContent
+
+Latency and errors are configured per endpoint name with EndpointBehavior, LLM endpoints return canned responses.
+Server runs with uvicorn (installed with mlflow), app can be also used in-process with starlette.testclient.TestClient.
+"""
+
+MESSAGES = "messages"
+WHATSAPP = "whatsapp"
+PEOPLE = "people"
+CHAT_SESSION = "chat_session"
+INTENT = "intent"
+QUERY = "query"
+OPENAI = "openai"
+GOOGLE = "google"
+
+
+@dataclasses.dataclass
+class LatencyProfile:
+    """
+    :param distribution: constant, uniform (between min_ms and max_ms) or lognormal (with median_ms and sigma)
+    """
+    distribution: str = "constant"
+    median_ms: float = 0.0
+    sigma: float = 0.5
+    min_ms: float = 0.0
+    max_ms: float = 60_000.0
+
+    def __post_init__(self):
+        if self.distribution not in ("constant", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {self.distribution}")
+
+    def sample(self, rng: random.Random) -> float:
+        """
+        :return: latency in seconds
+        """
+        if self.distribution == "uniform":
+            latency_ms = rng.uniform(self.min_ms, self.max_ms)
+        elif self.distribution == "lognormal" and self.median_ms > 0:
+            latency_ms = self.median_ms * rng.lognormvariate(0.0, self.sigma)
+        else:
+            latency_ms = self.median_ms
+        return min(max(latency_ms, self.min_ms), self.max_ms) / 1000
+
+
+@dataclasses.dataclass
+class EndpointBehavior:
+    latency: LatencyProfile = dataclasses.field(default_factory=LatencyProfile)
+    # share of requests failing with error_status
+    error_rate: float = 0.0
+    error_status: int = 503
+    # share of requests rejected with 429 and Retry-After header
+    throttle_rate: float = 0.0
+    retry_after_seconds: int = 1
+
+    def __post_init__(self):
+        if not 0 <= self.error_rate <= 1 or not 0 <= self.throttle_rate <= 1:
+            raise ValueError("Error and throttle rates must be between 0 and 1")
+
+
+@dataclasses.dataclass
+class FakeInfobipConfig:
+    default: EndpointBehavior = dataclasses.field(default_factory=EndpointBehavior)
+    # behavior by endpoint name, e.g. {OPENAI: EndpointBehavior(latency=LatencyProfile("lognormal", median_ms=800))}
+    endpoints: dict[str, EndpointBehavior] = dataclasses.field(default_factory=dict)
+    llm_response: str = "This is a canned response of the fake Infobip API."
+    # intent returned by intent endpoint, the first intent of the request if None
+    intent: str | None = None
+    seed: int | None = None
+
+    def behavior(self, endpoint: str) -> EndpointBehavior:
+        return self.endpoints.get(endpoint, self.default)
+
+
+class FakeInfobip:
+    """
+    State of the fake API: configuration, People profiles and request counts per endpoint and status.
+    """
+
+    def __init__(self, config: FakeInfobipConfig | None = None):
+        self.config = config if config else FakeInfobipConfig()
+        self.profiles: dict[tuple[str, str], dict] = {}
+        self.requests: dict[str, dict[int, int]] = {}
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def app(self) -> Starlette:
+        routes = [
+            Route("/messages-api/1/messages", self._endpoint(MESSAGES, self._messages), methods=["POST"]),
+            Route("/whatsapp/1/message/template", self._endpoint(WHATSAPP, self._messages), methods=["POST"]),
+            Route("/people/2/custom/persons/find", self._endpoint(PEOPLE, self._find_person), methods=["POST"]),
+            Route("/people/2/custom/persons/find/list", self._endpoint(PEOPLE, self._find_persons), methods=["POST"]),
+            Route("/people/2/persons", self._endpoint(PEOPLE, self._person), methods=["POST", "PUT", "DELETE"]),
+            Route("/people/2/persons/", self._endpoint(PEOPLE, self._person), methods=["POST", "PUT", "DELETE"]),
+            Route("/gpt-creator/omnia/chat-session", self._endpoint(CHAT_SESSION, self._chat_session), methods=["POST"]),
+            Route("/gpt-creator/omnia/2/intent", self._endpoint(INTENT, self._intent), methods=["POST"]),
+            Route("/gpt-creator/omnia/2/query", self._endpoint(QUERY, self._query), methods=["POST"]),
+            Route("/gpt-creator/omnia/openai/v1/chat/completions", self._endpoint(OPENAI, self._chat_completions), methods=["POST"]),
+            Route("/gpt-creator/omnia/google/v1/models/{model_action}", self._endpoint(GOOGLE, self._generate_content), methods=["POST"]),
+        ]
+        return Starlette(routes=routes)
+
+    def request_count(self, endpoint: str) -> int:
+        with self._lock:
+            return sum(self.requests.get(endpoint, {}).values())
+
+    def _endpoint(self, name: str, handler):
+        async def endpoint(request: Request) -> Response:
+            current = self.config.behavior(name)
+            with self._lock:
+                latency = current.latency.sample(self._rng)
+                draw = self._rng.random()
+            if latency:
+                await asyncio.sleep(latency)
+            if draw < current.throttle_rate:
+                response = JSONResponse({"requestError": {"serviceException": {"messageId": "TOO_MANY_REQUESTS"}}}, status_code=429,
+                                        headers={"Retry-After": str(current.retry_after_seconds)})
+            elif draw < current.throttle_rate + current.error_rate:
+                response = JSONResponse({"requestError": {"serviceException": {"messageId": "GENERAL_ERROR"}}},
+                                        status_code=current.error_status)
+            else:
+                body = await request.body()
+                response = await handler(request, json.loads(body) if body else {})
+            with self._lock:
+                statuses = self.requests.setdefault(name, {})
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            return response
+
+        return endpoint
+
+    async def _messages(self, _: Request, body: dict) -> Response:
+        messages = [{"messageId": str(uuid.uuid4()), "status": {"groupName": "PENDING", "name": "PENDING_ACCEPTED"},
+                     "to": message.get("to") or [d.get("to") for d in message.get("destinations", [])]}
+                    for message in body.get("messages", [])]
+        return JSONResponse({"bulkId": str(uuid.uuid4()), "messages": messages})
+
+    async def _find_person(self, _: Request, body: dict) -> Response:
+        key = (body.get("type", ""), body.get("identifier", ""))
+        with self._lock:
+            profile = self.profiles.get(key)
+        if profile is None:
+            profile = {"id": 0, "type": "CUSTOMER", "contactInformation": {"phone": [{"number": key[1]}]}, "customAttributes": {}}
+        return JSONResponse(profile)
+
+    async def _find_persons(self, _: Request, body: dict) -> Response:
+        with self._lock:
+            persons = list(self.profiles.values())
+        limit = body.get("limit", 20)
+        return JSONResponse({"persons": persons[:limit], "limit": limit, "page": 1})
+
+    async def _person(self, request: Request, body: dict) -> Response:
+        key = (request.query_params.get("type", ""), request.query_params.get("identifier", ""))
+        with self._lock:
+            if request.method == "DELETE":
+                self.profiles.pop(key, None)
+                return Response(status_code=204)
+            if request.method == "PUT":
+                profile = self.profiles.setdefault(key, {"id": next(self._ids)})
+                profile.update(body)
+                return JSONResponse(profile)
+            profile = {"id": next(self._ids), **body}
+            for phone in body.get("contactInformation", {}).get("phone", []):
+                self.profiles[("PHONE", phone.get("number", ""))] = profile
+            return JSONResponse(profile)
+
+    async def _chat_session(self, _: Request, body: dict) -> Response:
+        return JSONResponse({"response": self.config.llm_response, "tool_calls": None,
+                             "parsed_params": {} if body.get("extract_params") else None,
+                             "model_usages": [_usage(body.get("prompt") or body.get("user_message") or "")]})
+
+    async def _intent(self, _: Request, body: dict) -> Response:
+        intents = body.get("intents") or ["unknown"]
+        return JSONResponse({"response": self.config.intent or intents[0]})
+
+    async def _query(self, _: Request, body: dict) -> Response:
+        return JSONResponse({"message": self.config.llm_response, "contexts": []})
+
+    async def _chat_completions(self, _: Request, body: dict) -> Response:
+        prompt = " ".join(str(message.get("content", "")) for message in body.get("messages", []))
+        usage = _usage(prompt)
+        return JSONResponse({
+            "id": f"chatcmpl-{uuid.uuid4().hex}", "object": "chat.completion", "created": int(time.time()),
+            "model": body.get("model") or "fake",
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": self.config.llm_response}}],
+            "usage": {"prompt_tokens": usage["input_tokens"], "completion_tokens": usage["output_tokens"],
+                      "total_tokens": usage["input_tokens"] + usage["output_tokens"]},
+        })
+
+    async def _generate_content(self, request: Request, _: dict) -> Response:
+        model = request.path_params["model_action"].split(":")[0]
+        return JSONResponse({
+            "candidates": [{"content": {"role": "model", "parts": [{"text": self.config.llm_response}]}, "finishReason": "STOP",
+                            "index": 0}],
+            "modelVersion": model,
+        })
+
+
+# token counts are approximated by words
+def _usage(prompt: str) -> dict:
+    return {"model": "fake", "input_tokens": len(prompt.split()), "output_tokens": 10}
+
+
+def run(config: FakeInfobipConfig | None = None, host: str = "127.0.0.1", port: int = 8089) -> None:
+    """
+    Serves the fake API until interrupted.
+    :param config: of the fake API
+    :param host: to bind
+    :param port: to bind
+    """
+    import uvicorn
+
+    uvicorn.run(FakeInfobip(config).app(), host=host, port=port, log_level="warning")
+
+
+def _parse_args() -> tuple[FakeInfobipConfig, int]:
+    parser = argparse.ArgumentParser(description="Local stand-in for Infobip API endpoints.")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="median latency of every endpoint")
+    parser.add_argument("--llm-latency-ms", type=float, default=None, help="median latency of LLM endpoints")
+    parser.add_argument("--sigma", type=float, default=0.0, help="sigma of lognormal latency, constant latency if 0")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    def behavior(median_ms: float) -> EndpointBehavior:
+        latency = LatencyProfile(distribution="lognormal" if args.sigma else "constant", median_ms=median_ms, sigma=args.sigma)
+        return EndpointBehavior(latency=latency, error_rate=args.error_rate, throttle_rate=args.throttle_rate)
+
+    endpoints = {}
+    if args.llm_latency_ms is not None:
+        endpoints = {name: behavior(args.llm_latency_ms) for name in (CHAT_SESSION, INTENT, QUERY, OPENAI, GOOGLE)}
+    return FakeInfobipConfig(default=behavior(args.latency_ms), endpoints=endpoints, seed=args.seed), args.port
+
+
+if __name__ == "__main__":
+    fake_config, fake_port = _parse_args()
+    run(config=fake_config, port=fake_port)